@@ -0,0 +1,69 @@
+"""
+Micro-benchmark for parse_pubdate() against the arrow call it replaced.
+
+usage:
+    python -m benchmarks.bench_pubdate [--rounds N]
+
+Run from the repo root. Uses every <pubDate> in test_xml_planet_money.xml.
+"""
+import argparse
+import re
+import timeit
+from typing import List
+
+import arrow  # type: ignore
+
+from podcast_cli.controllers.dates import parse_pubdate, zone_offset
+
+
+ARROW_FORMAT: str = "ddd, DD MMM YYYY hh:mm:ss Z"
+FIXTURE: str = "test_xml_planet_money.xml"
+
+
+def load_pubdates() -> List[str]:
+    with open(FIXTURE, "r") as F:
+        return re.findall(r"<pubDate>(.*?)</pubDate>", F.read())
+
+
+def bench_arrow(dates: List[str]) -> None:
+    for date in dates:
+        arrow.get(date, ARROW_FORMAT).timestamp
+
+
+def bench_parse_pubdate(dates: List[str]) -> None:
+    for date in dates:
+        parse_pubdate(date)
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--rounds", type=int, default=20)
+    args = cli.parse_args()
+
+    dates: List[str] = load_pubdates()
+    mismatched: List[str] = [
+        d for d in dates
+        if parse_pubdate(d) != arrow.get(d, ARROW_FORMAT).timestamp
+    ]
+    if mismatched:
+        raise SystemExit("parse_pubdate disagrees with arrow on {}".format(mismatched[:5]))  # noqa: E501
+
+    for name, func in (
+        ("arrow.get", bench_arrow),
+        ("parse_pubdate", bench_parse_pubdate),
+    ):
+        zone_offset.cache_clear()
+        best: float = min(timeit.repeat(
+            lambda: func(dates),
+            number=1,
+            repeat=args.rounds
+        ))
+        print("{:<15} {:>8.2f} us/date  ({} dates)".format(
+            name,
+            best / len(dates) * 1e6,
+            len(dates)
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares two JSON result files from benchmarks/run.py.
+
+usage:
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 1.2]
+
+Prints the median of every benchmark in both runs and the ratio between
+them. Exits non-zero if any benchmark got slower than the threshold, so it
+can sit in a script that runs before merging.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional, Tuple
+
+
+Key = Tuple[str, int]
+
+
+def load(path: str) -> Tuple[Dict, Dict[Key, Dict]]:
+    with open(path, "r") as F:
+        report: Dict = json.load(F)
+    return report["meta"], {
+        (r["name"], r["size"]): r
+        for r in report["results"]
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("baseline")
+    cli.add_argument("candidate")
+    cli.add_argument("--threshold", type=float, default=1.2, help="candidate / baseline ratio that counts as a regression.")  # noqa: E501
+    args = cli.parse_args(argv)
+
+    base_meta, base = load(args.baseline)
+    cand_meta, cand = load(args.candidate)
+    print("baseline {}  vs  candidate {}".format(
+        base_meta.get("commit"),
+        cand_meta.get("commit")
+    ))
+
+    regressions: int = 0
+    for key in sorted(set(base) & set(cand)):
+        ratio: float = cand[key]["median"] / base[key]["median"]
+        flag: str = ""
+        if ratio > args.threshold:
+            flag = "  <-- slower"
+            regressions += 1
+        print("{:<30} {:>7}  {:>10.4f}s  {:>10.4f}s  x{:.2f}{}".format(
+            key[0],
+            key[1],
+            base[key]["median"],
+            cand[key]["median"],
+            ratio,
+            flag
+        ))
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
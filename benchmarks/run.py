@@ -0,0 +1,283 @@
+"""
+Benchmark suite for podcast_cli.
+
+usage:
+    python -m benchmarks.run [--full] [--rounds N] [--only NAME ...]
+                             [--output results.json]
+
+Run from the repo root. Every benchmark runs against synthetic feeds and an
+in-memory database (see benchmarks/synthetic.py), so no network and no
+~/.podcasts are involved. Results are printed as a table and, with
+--output, written as JSON that benchmarks/compare.py can diff against
+another run.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from click.testing import CliRunner, Result
+
+from podcast_cli.models.database_models import PodcastModel
+from podcast_cli.models.custom_types import EpisodeType, PodcastType
+from podcast_cli.controllers.parser import (
+    parse_podcast_episodeset,
+    insert_to_db
+)
+from podcast_cli.controllers.parse_cache import parse_feed_cached
+from podcast_cli.models.custom_types import FeedResponse
+from podcast_cli.views.utils import get_latest_number
+from podcast_cli.views.list_podcast_latest_episode_command import (
+    podcast_list_latest_episodes
+)
+from podcast_cli.views.update_podcast_command import podcast_update
+
+from benchmarks.synthetic import (
+    fresh_database,
+    make_database,
+    make_feed,
+    feed_url,
+    serve_feeds
+)
+
+
+# NOTE: A benchmark takes a size and returns (setup, run). setup() is
+#       called before every round and isn't timed, run(state) is timed and
+#       gets whatever setup() returned.
+Setup = Callable[[], Any]
+Run = Callable[[Any], None]
+Benchmark = Callable[[int], Tuple[Setup, Run]]
+
+FEED_SIZES: List[int] = [10, 100, 1000, 10000]
+FULL_FEED_SIZES: List[int] = FEED_SIZES + [100000]
+PODCAST_COUNTS: List[int] = [1, 100, 1000]
+FULL_PODCAST_COUNTS: List[int] = PODCAST_COUNTS + [5000]
+UPDATE_COUNTS: List[int] = [1, 10, 100]
+FULL_UPDATE_COUNTS: List[int] = UPDATE_COUNTS + [1000, 5000]
+
+STARTUP_RUNS: List[int] = [1, 10]
+FULL_STARTUP_RUNS: List[int] = STARTUP_RUNS
+STARTUP_COMMANDS: List[str] = ["podcast-list"]
+
+EPISODES_PER_PODCAST: int = 20
+MISSED_RELEASES: int = 2
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_parse(items: int) -> Tuple[Setup, Run]:
+    feed: bytes = make_feed(items)
+    return (
+        lambda: None,
+        lambda _: parse_podcast_episodeset(feed)
+    )
+
+
+def bench_parse_cached(items: int) -> Tuple[Setup, Run]:
+    feed: bytes = make_feed(items)
+    response: FeedResponse = FeedResponse(
+        url=feed_url(0),
+        not_modified=False,
+        body=feed,
+        etag=None,
+        last_modified=None,
+        content_hash=None
+    )
+    # NOTE: warm, this measures the cache load an identical feed costs.
+    root: str = tempfile.mkdtemp(prefix="podcast_cli_bench_")
+    atexit.register(shutil.rmtree, root, True)
+    parse_feed_cached(response, root)
+    return (
+        lambda: None,
+        lambda _: parse_feed_cached(response, root)
+    )
+
+
+def bench_insert(items: int) -> Tuple[Setup, Run]:
+    episodes: List[EpisodeType] = parse_podcast_episodeset(make_feed(items))
+    podcast: PodcastType = PodcastType(
+        title="Synthetic Podcast 0",
+        description="",
+        link=feed_url(0),
+        guid="podcast-0",
+    )
+    return (
+        fresh_database,
+        lambda _: insert_to_db(dict(podcast), episodes)
+    )
+
+
+def bench_get_latest_number(podcasts: int) -> Tuple[Setup, Run]:
+    casts: List[PodcastModel] = make_database(podcasts, EPISODES_PER_PODCAST)
+
+    def run(_):
+        for cast in casts:
+            get_latest_number(cast, 5)
+
+    return lambda: None, run
+
+
+def bench_list_latest(podcasts: int) -> Tuple[Setup, Run]:
+    make_database(podcasts, EPISODES_PER_PODCAST)
+
+    def run(_):
+        result: Result = CliRunner().invoke(
+            podcast_list_latest_episodes,
+            ["--count", "5"]
+        )
+        assert result.exit_code == 0, result.output
+
+    return lambda: None, run
+
+
+def bench_update(podcasts: int) -> Tuple[Setup, Run]:
+    feeds: Dict[str, bytes] = {
+        feed_url(p): make_feed(EPISODES_PER_PODCAST + MISSED_RELEASES, p)
+        for p in range(podcasts)
+    }
+
+    def setup():
+        make_database(podcasts, EPISODES_PER_PODCAST, skip=MISSED_RELEASES)
+
+    def run(_):
+        with serve_feeds(feeds):
+            result: Result = CliRunner().invoke(podcast_update, [])
+        assert result.exit_code == 0, result.output
+        assert "Found {} new episodes!".format(
+            podcasts * MISSED_RELEASES
+        ) in result.output, result.output
+
+    return setup, run
+
+
+def bench_startup(runs: int) -> Tuple[Setup, Run]:
+    """
+    Wall time of "runs" back to back `python main.py podcast-list` in fresh
+    interpreters, against an empty database, i.e what the lazy loading of
+    commands is there to keep down. A throwaway HOME keeps the real
+    ~/.podcasts (and a running daemon) out of it.
+    """
+    home: str = tempfile.mkdtemp(prefix="podcast_cli_bench_")
+    atexit.register(shutil.rmtree, home, True)
+    env: Dict[str, str] = dict(
+        os.environ,
+        HOME=home,
+        PODCAST_CLI_DB=os.path.join(home, "datastore.db")
+    )
+    command: List[str] = [
+        sys.executable,
+        os.path.join(REPO_ROOT, "main.py"),
+        "--no-daemon"
+    ] + STARTUP_COMMANDS
+
+    def launch():
+        subprocess.run(
+            command,
+            cwd=home,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+    # NOTE: the first run creates the database and warms the bytecode
+    #       cache, neither of which an everyday run pays for.
+    launch()
+
+    def run(_):
+        for _ in range(runs):
+            launch()
+
+    return lambda: None, run
+
+
+BENCHMARKS: Dict[str, Tuple[Benchmark, str, List[int], List[int]]] = {
+    "parse_podcast_episodeset": (bench_parse, "items", FEED_SIZES, FULL_FEED_SIZES),  # noqa: E501
+    "parse_feed_cached": (bench_parse_cached, "items", FEED_SIZES, FULL_FEED_SIZES),  # noqa: E501
+    "insert_to_db": (bench_insert, "items", FEED_SIZES, FULL_FEED_SIZES),
+    "get_latest_number": (bench_get_latest_number, "podcasts", PODCAST_COUNTS, FULL_PODCAST_COUNTS),  # noqa: E501
+    "podcast_list_latest_episodes": (bench_list_latest, "podcasts", PODCAST_COUNTS, FULL_PODCAST_COUNTS),  # noqa: E501
+    "podcast_update": (bench_update, "podcasts", UPDATE_COUNTS, FULL_UPDATE_COUNTS),  # noqa: E501
+    "startup": (bench_startup, "runs", STARTUP_RUNS, FULL_STARTUP_RUNS),
+}
+
+
+def measure(setup: Setup, run: Run, rounds: int) -> List[float]:
+    timings: List[float] = []
+    for _ in range(rounds):
+        state: Any = setup()
+        start: float = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--full", action="store_true", help="Include the largest sizes (100k item feeds, 5k podcasts).")  # noqa: E501
+    cli.add_argument("--rounds", type=int, default=5)
+    cli.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS.keys()))
+    cli.add_argument("--output", help="Write the results here as JSON.")
+    args = cli.parse_args(argv)
+
+    results: List[Dict] = []
+    for name, (bench, unit, sizes, full_sizes) in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        for size in (full_sizes if args.full else sizes):
+            setup, run = bench(size)
+            timings: List[float] = measure(setup, run, args.rounds)
+            results.append({
+                "name": name,
+                "unit": unit,
+                "size": size,
+                "rounds": args.rounds,
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.mean(timings),
+            })
+            print(
+                "{:<30} {:>7} {:<8} min {:>10.4f}s  median {:>10.4f}s".format(
+                    name, size, unit, min(timings), statistics.median(timings)
+                ),
+                file=sys.stderr
+            )
+
+    report: Dict = {
+        "meta": {
+            "commit": current_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": int(time.time()),
+            "full": args.full,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as F:
+            json.dump(report, F, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
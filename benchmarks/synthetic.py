@@ -0,0 +1,191 @@
+"""
+Synthetic feeds and databases for the benchmarks.
+
+Everything here is deterministic: the same arguments always give the same
+bytes / rows, so numbers from different commits are comparable.
+"""
+import calendar
+import tempfile
+from contextlib import contextmanager
+from email.utils import formatdate
+from typing import Dict, Iterator, List
+from unittest.mock import patch
+
+from peewee import SqliteDatabase  # type: ignore
+
+from podcast_cli.models.database_models import db, PodcastModel
+from podcast_cli.models.custom_types import EpisodeType
+from podcast_cli.models.migrations import migrate
+from podcast_cli.models.storage import (
+    configure_database,
+    load_storage_config,
+    MEMORY_PATH
+)
+from podcast_cli.controllers.ingest import ingest_episodes
+
+
+# NOTE: Newest episode in every synthetic feed, episodes go back one day
+#       at a time from here.
+NEWEST: int = calendar.timegm((2020, 10, 16, 23, 47, 20))
+DAY: int = 24 * 3600
+
+DESCRIPTION: str = (
+    "In this episode we talk about things. | Subscribe to our newsletter "
+    "<a href=\"https://example.com/newsletter?utm_source=rss&utm_medium=podcast\">here</a>."  # noqa: E501
+)
+
+
+def feed_url(podcast: int) -> str:
+    return "https://feeds{}.example.com/{}/podcast.xml".format(
+        podcast % 7,
+        podcast
+    )
+
+
+def make_episode(podcast: int, n: int) -> EpisodeType:
+    """
+    The n-th newest episode of a synthetic podcast, as the parser would
+    return it.
+    """
+    return EpisodeType(
+        title="Episode {} of podcast {}".format(n, podcast),
+        description=DESCRIPTION,
+        pubDate=NEWEST - n * DAY,
+        guid="podcast-{}-episode-{}".format(podcast, n),
+        link="https://media.example.com/{}/{}.mp3".format(podcast, n),
+    )
+
+
+def make_feed(items: int, podcast: int = 0, skip: int = 0) -> bytes:
+    """
+    Builds an RSS feed for a synthetic podcast, newest episode first, with
+    roughly the same tags per item as a real NPR feed.
+
+    args:
+    items - int, number of <item>s.
+    podcast - int, which synthetic podcast this is. Changes titles, guids
+        and links.
+    skip - int, leave out the newest "skip" episodes, i.e what the feed
+        looked like a few releases ago.
+
+    returns:
+    the feed, as utf-8 bytes.
+    """
+    parts: List[str] = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd" '
+        'xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'version="2.0">\n<channel>\n'
+        "<title>Synthetic Podcast {0}</title>\n"
+        "<link>https://example.com/{0}</link>\n"
+        "<description><![CDATA[A podcast made up for benchmarking.]]>"
+        "</description>\n"
+        "<language>en</language>\n"
+        "<itunes:author>Nobody</itunes:author>\n".format(podcast)
+    ]
+    for n in range(skip, skip + items):
+        episode: EpisodeType = make_episode(podcast, n)
+        parts.append(
+            "<item>\n"
+            "<title>{title}</title>\n"
+            "<description><![CDATA[{description}]]></description>\n"
+            "<pubDate>{pubdate}</pubDate>\n"
+            '<guid isPermaLink="false">{guid}</guid>\n'
+            "<itunes:title>{title}</itunes:title>\n"
+            "<itunes:duration>1800</itunes:duration>\n"
+            "<content:encoded><![CDATA[<p>{description}</p>]]>"
+            "</content:encoded>\n"
+            '<enclosure url="{link}" length="0" type="audio/mpeg"/>\n'
+            "</item>\n".format(
+                title=episode["title"],
+                description=episode["description"],
+                pubdate=formatdate(episode["pubDate"], localtime=False),
+                guid=episode["guid"],
+                link=episode["link"],
+            )
+        )
+    parts.append("</channel>\n</rss>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def fresh_database() -> SqliteDatabase:
+    """
+    Points database_models.db at a new, empty, fully migrated in-memory
+    database.
+    """
+    if not db.is_closed():
+        db.close()
+    configure_database(db, load_storage_config(MEMORY_PATH))
+    db.connect()
+    migrate(db)
+    return db
+
+
+def make_database(
+    podcasts: int,
+    episodes: int,
+    skip: int = 0
+) -> List[PodcastModel]:
+    """
+    Fills a fresh in-memory database with synthetic podcasts.
+
+    args:
+    podcasts - int, how many podcasts.
+    episodes - int, how many episodes each.
+    skip - int, leave out each podcast's newest "skip" episodes so that an
+        update has something to find.
+
+    returns:
+    the PodcastModels that were created.
+    """
+    fresh_database()
+    created: List[PodcastModel] = []
+    with db.atomic():
+        for p in range(podcasts):
+            parent: PodcastModel = PodcastModel.create(
+                title="Synthetic Podcast {}".format(p),
+                description="A podcast made up for benchmarking.",
+                link=feed_url(p),
+                guid="podcast-{}".format(p),
+            )
+            ingest_episodes(
+                parent,
+                (make_episode(p, n) for n in range(skip, skip + episodes))
+            )
+            created.append(parent)
+    return created
+
+
+class FakeResponse():
+    def __init__(self, content: bytes):
+        self.status_code: int = 200
+        self.ok: bool = True
+        self.content: bytes = content
+        self.headers: Dict[str, str] = {}
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+
+@contextmanager
+def serve_feeds(feeds: Dict[str, bytes]) -> Iterator[None]:
+    """
+    Answers every feed request from "feeds" (url -> body) instead of the
+    network, so the update benchmark measures our code and not the
+    internet. Fetched feeds get archived to a temporary directory rather
+    than ~/.podcasts/feeds.
+    """
+    def fake_get(url: str, *args, **kwargs) -> FakeResponse:
+        return FakeResponse(feeds[url])
+
+    with tempfile.TemporaryDirectory() as archive, \
+            patch("podcast_cli.controllers.parser.http_get", fake_get), \
+            patch("podcast_cli.controllers.archive.archive_dir", lambda: archive):  # noqa: E501
+        yield
@@ -1,14 +1,40 @@
 import os
 import click
 
-from podcast_cli.models.database_models import PodcastModel, EpisodeModel, db
-from podcast_cli.views.add_podcast_command import podcast_add
-from podcast_cli.views.list_podcast_command import podcast_list
-from podcast_cli.views.remove_podcast_command import podcast_remove
-from podcast_cli.views.update_podcast_command import podcast_update
-from podcast_cli.views.inspect_podcast_command import podcast_inspect
-from podcast_cli.views.list_podcast_episodes_command import podcast_list_episodes
-from podcast_cli.views.list_podcast_latest_episode_command import podcast_list_latest_episodes
+from typing import List, Optional
+
+from podcast_cli.models.database_models import db
+from podcast_cli.models.migrations import migrate
+from podcast_cli.models.storage import (
+    load_storage_config,
+    configure_database,
+    podcast_dir,
+    MEMORY_PATH,
+    StorageConfig
+)
+from podcast_cli.views.lazy_group import LazyGroup
+from podcast_cli.controllers.profiling import PROFILER, render_report
+from podcast_cli.controllers.daemon import client_for_cli, DAEMON_COMMANDS
+
+
+# NOTE: Commands are only imported when they're run (see LazyGroup), so
+#       listing podcasts doesn't pay for the network / parsing stack that
+#       podcast-add and podcast-update need.
+COMMANDS = {
+    "podcast-add": "podcast_cli.views.add_podcast_command:podcast_add",
+    "podcast-list": "podcast_cli.views.list_podcast_command:podcast_list",
+    "podcast-remove": "podcast_cli.views.remove_podcast_command:podcast_remove",  # noqa: E501
+    "podcast-update": "podcast_cli.views.update_podcast_command:podcast_update",  # noqa: E501
+    "podcast-inspect": "podcast_cli.views.inspect_podcast_command:podcast_inspect",  # noqa: E501
+    "podcast-list-episodes": "podcast_cli.views.list_podcast_episodes_command:podcast_list_episodes",  # noqa: E501
+    "podcast-list-latest-episodes": "podcast_cli.views.list_podcast_latest_episode_command:podcast_list_latest_episodes",  # noqa: E501
+    "download": "podcast_cli.views.download_command:podcast_download",
+    "playlist": "podcast_cli.views.playlist_command:podcast_playlist",
+    "search": "podcast_cli.views.search_command:podcast_search",
+    "serve": "podcast_cli.views.serve_command:podcast_serve",
+    "import-opml": "podcast_cli.views.opml_command:podcast_import_opml",
+    "export-opml": "podcast_cli.views.opml_command:podcast_export_opml",
+}
 
 
 # disregard this it isn't being used anywhere.
@@ -20,28 +46,86 @@ podcast_mapping = {
 }
 
 
-@click.group()
-def cli():
+def start_profiling(
+    ctx: click.Context,
+    fmt: str,
+    dump_path: Optional[str]
+) -> None:
+    """
+    Switches on the stage timers and, if dump_path is given, cProfile for
+    the whole command. Both get reported once the command finishes: the
+    stage timings on stderr so they don't mix with the command's output,
+    and the cProfile stats in pstats format at dump_path.
+    """
+    PROFILER.enable()
+    profile = None
+    if dump_path:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+
+    def report():
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(dump_path)
+        PROFILER.disable()
+        click.echo(render_report(PROFILER.report(), fmt), err=True)
+
+    ctx.call_on_close(report)
+
+
+def run_in_daemon(ctx: click.Context, argv: List[str]) -> Optional[int]:
+    """
+    Hands the command over to `serve` if one is running on the same
+    database, see LazyGroup and controllers/daemon.py. --profile and
+    --no-daemon always run locally, as does an in-memory database.
+    """
+    if ctx.params["profile"] or ctx.params["no_daemon"]:
+        return None
+    if argv[0] not in DAEMON_COMMANDS:
+        return None
+    database: str = load_storage_config(ctx.params["db_path"])["path"]
+    if database == MEMORY_PATH:
+        return None
+    return client_for_cli(argv, database)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS, delegate=run_in_daemon)
+@click.option("--db", "db_path", default=None, help="Path to the sqlite database, or :memory:. Overrides PODCAST_CLI_DB and config.ini.")  # noqa: E501
+@click.option("--profile", "--timings", "profile", is_flag=True, help="Print per-stage and per-feed timings to stderr when done.")  # noqa: E501
+@click.option("--profile-format", type=click.Choice(["table", "json"]), default="table", help="How --profile prints its report.")  # noqa: E501
+@click.option("--profile-dump", default=None, help="With --profile, also write a cProfile (pstats) dump of the whole command here.")  # noqa: E501
+@click.option("--no-daemon", is_flag=True, help="Run the command here even if `serve` is running.")  # noqa: E501
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    db_path: Optional[str],
+    profile: bool,
+    profile_format: str,
+    profile_dump: Optional[str],
+    no_daemon: bool
+):
+    if profile:
+        start_profiling(ctx, profile_format, profile_dump)
     # NOTE: Until I see evidence to suggest that this is a bad idea, I am going
     #       to put the db connection code here.
-    full_path: str = os.path.expanduser("~/.podcasts")
+    full_path: str = podcast_dir()
+    # NOTE: Status messages go to stderr so that commands whose output is
+    #       meant to be piped somewhere (playlist) stay clean on stdout.
     if not os.path.exists(full_path):
-        click.echo("NO PODCAST DIRECTORY FOUND, CREATING ONE.")
+        click.echo("NO PODCAST DIRECTORY FOUND, CREATING ONE.", err=True)
         os.mkdir(full_path)
-        click.echo("IF YOU SEE THIS, A DIRECTORY WAS MADE")
+        click.echo("IF YOU SEE THIS, A DIRECTORY WAS MADE", err=True)
     else:
-        click.echo("PODCASTS STORED AT {}".format(full_path))
+        click.echo("PODCASTS STORED AT {}".format(full_path), err=True)
+    storage: StorageConfig = load_storage_config(db_path)
+    configure_database(db, storage)
     db.connect()
-    db.create_tables([PodcastModel, EpisodeModel])
-
+    # NOTE: Only does any work the first time a new version of the
+    #       schema is seen, see models/migrations.py.
+    for version in migrate(db):
+        click.echo("Migrated database to schema version {}".format(version), err=True)  # noqa: E501
 
-cli.add_command(podcast_add)
-cli.add_command(podcast_list)
-cli.add_command(podcast_remove)
-cli.add_command(podcast_update)
-cli.add_command(podcast_inspect)
-cli.add_command(podcast_list_episodes)
-cli.add_command(podcast_list_latest_episodes)
 
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,410 @@
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import click
+
+from podcast_cli.models.storage import podcast_dir
+
+
+# NOTE: The daemon and its clients talk over a unix socket, one request per
+#       connection: the client sends a single line of JSON,
+#
+#           {"method": "search", "params": {"query": "caste"}}
+#
+#       and gets a single line of JSON back,
+#
+#           {"ok": true, "data": [...], "output": "", "stderr": "",
+#            "exit_code": 0, "error": null, "refused": false}
+#
+#       "refused" means the daemon turned the request down without running
+#       anything (wrong database, a command it doesn't run), as opposed to
+#       a request that ran and failed.
+#
+#       "cli" runs one of the regular commands in the daemon and returns
+#       what it printed, which is how the click commands hand their work
+#       over when a daemon is running (see client_for_cli()).
+SOCKET_ENV: str = "PODCAST_CLI_SOCKET"
+CONNECT_TIMEOUT: float = 0.5
+MAX_REQUEST: int = 1024 * 1024
+
+# NOTE: Commands the daemon will run on behalf of the cli. Anything that
+#       prompts (podcast-remove) or writes files relative to the caller's
+#       directory (playlist, download) stays local.
+DAEMON_COMMANDS: List[str] = [
+    "podcast-list",
+    "podcast-inspect",
+    "podcast-list-episodes",
+    "podcast-list-latest-episodes",
+    "podcast-update",
+    "search",
+]
+# NOTE: Of those, the ones whose output only depends on what's in the
+#       database, so it can be served from memory until the data changes.
+CACHEABLE_COMMANDS: List[str] = [
+    c for c in DAEMON_COMMANDS if c != "podcast-update"
+]
+
+
+def socket_path() -> str:
+    """
+    Where the daemon listens, ~/.podcasts/daemon.sock unless
+    PODCAST_CLI_SOCKET says otherwise.
+    """
+    return os.path.expanduser(
+        os.environ.get(SOCKET_ENV) or os.path.join(podcast_dir(), "daemon.sock")  # noqa: E501
+    )
+
+
+def same_database(a: str, b: str) -> bool:
+    return os.path.realpath(os.path.expanduser(a)) == os.path.realpath(os.path.expanduser(b))  # noqa: E501
+
+
+# client side, kept to the standard library so that checking for a daemon
+# costs the cli next to nothing.
+
+
+def request(
+    method: str,
+    params: Optional[Dict] = None,
+    path: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Sends one request to the daemon.
+
+    args:
+    method - str, one of "ping", "list", "latest", "search", "update" or
+        "cli".
+    params - dict, the method's parameters.
+    path - str, the socket, defaults to socket_path().
+
+    returns:
+    the daemon's response as a dict, or None if no daemon is listening.
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+
+    client: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT)
+        try:
+            client.connect(path)
+        except OSError:
+            # NOTE: a socket file left over from a daemon that died.
+            return None
+        # NOTE: an update can take a while, only the connect is timed out.
+        client.settimeout(None)
+        client.sendall(
+            json.dumps({"method": method, "params": params or {}}).encode("utf-8")  # noqa: E501
+            + b"\n"
+        )
+        client.shutdown(socket.SHUT_WR)
+        with client.makefile("rb") as F:
+            line: bytes = F.readline()
+    finally:
+        client.close()
+
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def client_for_cli(
+    argv: List[str],
+    database: str
+) -> Optional[int]:
+    """
+    Hands a cli invocation over to the daemon, if there is one running on
+    the same database and the command is one it runs.
+
+    args:
+    argv - list of str, the command and its arguments, i.e
+        ["podcast-list-episodes", "1", "--limit", "10"]
+    database - str, path of the database this invocation would have used.
+
+    returns:
+    the command's exit code once its output has been printed, or None if
+    the command should just run locally. That's only when the daemon can't
+    be reached or refuses the command: one that ran and failed there may
+    already have written to the database, so running it again here would
+    do it twice.
+    """
+    if not argv or argv[0] not in DAEMON_COMMANDS:
+        return None
+    try:
+        # NOTE: The daemon's output goes into a buffer, which click would
+        #       strip of ANSI codes (search's highlighting, for one) unless
+        #       told the output ends up on a terminal after all.
+        response: Optional[Dict] = request(
+            "cli",
+            {"argv": argv, "database": database, "color": sys.stdout.isatty()}  # noqa: E501
+        )
+    except (OSError, ValueError):
+        return None
+    if response is None or response.get("refused"):
+        return None
+    if not response["ok"]:
+        click.echo("Error: {}".format(response["error"]), err=True)
+        return 1
+
+    click.echo(response["output"], nl=False)
+    if response["stderr"]:
+        click.echo(response["stderr"], nl=False, err=True)
+    return response["exit_code"]
+
+
+# daemon side.
+
+
+class HotCache:
+    """
+    Remembers responses until the database changes.
+
+    sqlite's PRAGMA data_version goes up whenever another connection
+    commits, which covers podcast-add / podcast-remove run without the
+    daemon. Writes made through the daemon itself don't move it, so those
+    clear() the cache by hand.
+    """
+    def __init__(self, database):
+        self.database = database
+        self._version: Optional[int] = None
+        self._entries: Dict[str, Any] = {}
+
+    def __data_version(self) -> int:
+        return self.database.execute_sql("PRAGMA data_version").fetchone()[0]  # noqa: E501
+
+    def get(self, key: str) -> Optional[Any]:
+        version: int = self.__data_version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        return self._entries.get(key)
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def run_command(
+    command: click.Command,
+    name: str,
+    args: List[str],
+    color: Optional[bool] = None
+) -> Tuple[int, str, str]:
+    """
+    Runs a click command in this process, the way it would run from the
+    shell, and collects what it printed.
+
+    The daemon handles one request at a time, so swapping out
+    sys.stdout / sys.stderr for the duration is safe.
+
+    args:
+    command - click.Command to run.
+    name - str, what the command is called on the command line.
+    args - list of str, its arguments.
+    color - bool, keep ANSI styling in the output even though it's not
+        going to a terminal. None leaves it to click, which strips it.
+
+    returns:
+    a tuple of (exit code, stdout, stderr).
+    """
+    out: io.StringIO = io.StringIO()
+    err: io.StringIO = io.StringIO()
+    exit_code: int = 0
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            # NOTE: outside standalone mode click hands back the code of
+            #       an Exit (ctx.exit()) instead of raising it.
+            result = command.main(
+                args=args,
+                prog_name=name,
+                standalone_mode=False,
+                color=color
+            )
+            if isinstance(result, int) and not isinstance(result, bool):
+                exit_code = result
+        except click.ClickException as e:
+            e.show()
+            exit_code = e.exit_code
+        except click.Abort:
+            click.echo("Aborted!", err=True)
+            exit_code = 1
+        except Exception:
+            # NOTE: what an uncaught exception would have printed running
+            #       locally, the daemon itself carries on.
+            traceback.print_exc()
+            exit_code = 1
+    return exit_code, out.getvalue(), err.getvalue()
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    The daemon: a single threaded unix socket server that keeps the
+    database connection, every command's imports and recent answers warm
+    between requests.
+
+    Requests are handled one at a time on the thread that opened the
+    database, which is what peewee's sqlite connection wants anyway.
+    """
+    def __init__(
+        self,
+        path: str,
+        group: click.MultiCommand,
+        ctx: click.Context,
+        database,
+        database_path: str
+    ):
+        self.path: str = path
+        self.group: click.MultiCommand = group
+        self.ctx: click.Context = ctx
+        self.database = database
+        self.database_path: str = database_path
+        self.cache: HotCache = HotCache(database)
+        self.methods: Dict[str, Callable[[Dict], Dict]] = {
+            "ping": self.ping,
+            "list": self.list_podcasts,
+            "latest": self.latest,
+            "search": self.search,
+            "update": self.update,
+            "cli": self.cli,
+        }
+
+        if os.path.exists(path):
+            if request("ping", path=path) is not None:
+                raise click.ClickException(
+                    "A daemon is already listening on {}".format(path)
+                )
+            os.remove(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        old_umask: int = os.umask(0o077)
+        try:
+            super().__init__(path, DaemonHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def dispatch(self, message: Dict) -> Dict:
+        response: Dict = {
+            "ok": True,
+            "data": None,
+            "output": "",
+            "stderr": "",
+            "exit_code": 0,
+            "error": None,
+            "refused": False,
+        }
+        method: Optional[Callable[[Dict], Dict]] = self.methods.get(
+            message.get("method")
+        )
+        if method is None:
+            response.update(ok=False, refused=True, error="Unknown method {!r}".format(message.get("method")))  # noqa: E501
+            return response
+        try:
+            response.update(method(message.get("params") or {}))
+        except Exception as e:
+            response.update(ok=False, error="{}: {}".format(type(e).__name__, e))  # noqa: E501
+        return response
+
+    def cached(self, key: str, compute: Callable[[], Dict]) -> Dict:
+        hit: Optional[Dict] = self.cache.get(key)
+        if hit is None:
+            hit = compute()
+            self.cache.put(key, hit)
+        return hit
+
+    def ping(self, params: Dict) -> Dict:
+        from podcast_cli.controllers.httpclient import session_stats
+
+        return {"data": {
+            "pid": os.getpid(),
+            "database": self.database_path,
+            "http": session_stats(),
+        }}
+
+    def list_podcasts(self, params: Dict) -> Dict:
+        from podcast_cli.controllers.podcasts import get_all_podcasts
+
+        return self.cached("list", lambda: {
+            "data": [p._asdict() for p in get_all_podcasts()]
+        })
+
+    def latest(self, params: Dict) -> Dict:
+        from podcast_cli.controllers.episodes import get_latest_per_podcast
+
+        count: int = int(params.get("count", 5))
+        return self.cached("latest:{}".format(count), lambda: {
+            "data": get_latest_per_podcast(count)
+        })
+
+    def search(self, params: Dict) -> Dict:
+        from podcast_cli.controllers.search import (
+            search_episodes,
+            DEFAULT_SEARCH_LIMIT
+        )
+
+        query: str = params["query"]
+        limit: int = int(params.get("limit", DEFAULT_SEARCH_LIMIT))
+        pk: Optional[int] = params.get("pk")
+        return self.cached(
+            json.dumps(["search", query, limit, pk]),
+            lambda: {"data": search_episodes(query, limit=limit, podcast=pk)}
+        )
+
+    def update(self, params: Dict) -> Dict:
+        args: List[str] = []
+        if params.get("pk") is not None:
+            args += ["--pk", str(params["pk"])]
+        if params.get("jobs") is not None:
+            args += ["--jobs", str(params["jobs"])]
+        if params.get("full"):
+            args.append("--full")
+        if params.get("force"):
+            args.append("--force")
+        return self.cli({"argv": ["podcast-update"] + args})
+
+    def cli(self, params: Dict) -> Dict:
+        argv: List[str] = params["argv"]
+        database: Optional[str] = params.get("database")
+        if database is not None and not same_database(database, self.database_path):  # noqa: E501
+            return {"ok": False, "refused": True, "error": "The daemon is serving {}".format(self.database_path)}  # noqa: E501
+        if not argv or argv[0] not in DAEMON_COMMANDS:
+            return {"ok": False, "refused": True, "error": "The daemon doesn't run {!r}".format(argv[:1])}  # noqa: E501
+
+        command: Optional[click.Command] = self.group.get_command(self.ctx, argv[0])  # noqa: E501
+
+        color: bool = bool(params.get("color"))
+
+        def run() -> Dict:
+            exit_code, output, stderr = run_command(command, argv[0], argv[1:], color)  # noqa: E501
+            return {"exit_code": exit_code, "output": output, "stderr": stderr}
+
+        if argv[0] in CACHEABLE_COMMANDS:
+            return self.cached(json.dumps([argv, color]), run)
+
+        result: Dict = run()
+        self.cache.clear()
+        return result
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line: bytes = self.rfile.readline(MAX_REQUEST)
+        try:
+            message: Dict = json.loads(line)
+        except ValueError:
+            message = {}
+        response: Dict = self.server.dispatch(message)
+        self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")  # noqa: E501
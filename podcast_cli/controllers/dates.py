@@ -0,0 +1,117 @@
+import calendar
+import re
+from email.utils import parsedate_tz, mktime_tz
+from functools import lru_cache
+from typing import Dict, Optional, Pattern
+
+from dateutil import parser as dateutil_parser  # type: ignore
+from dateutil import tz as dateutil_tz  # type: ignore
+
+
+# NOTE: The shape nearly every feed uses, "Fri, 16 Oct 2020 19:47:20 -0400",
+#       plus the variants that arrow's "ddd, DD MMM YYYY hh:mm:ss Z" choked
+#       on: no weekday, one digit days, two digit years, no seconds and
+#       named zones like GMT or EST.
+RFC822: Pattern = re.compile(
+    r"^\s*(?:[A-Za-z]{3,9},?\s*)?"
+    r"(\d{1,2})\s+([A-Za-z]{3})[A-Za-z]*\.?\s+(\d{2,4})\s+"
+    r"(\d{1,2}):(\d{2})(?::(\d{2}))?"
+    r"\s*([+-]\d{2}:?\d{2}|[A-Za-z]{1,5})?\s*$"
+)
+
+MONTHS: Dict[str, int] = {
+    name.lower(): number
+    for number, name in enumerate(calendar.month_abbr)
+    if name
+}
+
+# NOTE: RFC 822's named zones, in seconds east of UTC.
+NAMED_ZONES: Dict[str, int] = {
+    "UT": 0, "UTC": 0, "GMT": 0, "Z": 0,
+    "EST": -5 * 3600, "EDT": -4 * 3600,
+    "CST": -6 * 3600, "CDT": -5 * 3600,
+    "MST": -7 * 3600, "MDT": -6 * 3600,
+    "PST": -8 * 3600, "PDT": -7 * 3600,
+}
+
+
+@lru_cache(maxsize=128)
+def zone_offset(zone: Optional[str]) -> Optional[int]:
+    """
+    Turns a zone suffix ("-0400", "+05:30", "GMT", "EST") into an offset in
+    seconds east of UTC. A feed uses the same one or two suffixes on every
+    item, so these get memoized.
+
+    args:
+    zone - str, the zone suffix, or None if the date didn't have one.
+
+    returns:
+    the offset in seconds, or None if the zone isn't one we know.
+    """
+    if not zone:
+        return 0
+    if zone[0] in "+-":
+        digits: str = zone[1:].replace(":", "")
+        offset: int = int(digits[:2]) * 3600 + int(digits[2:]) * 60
+        return -offset if zone[0] == "-" else offset
+    return NAMED_ZONES.get(zone.upper())
+
+
+def __parse_lenient(text: str) -> int:
+    """
+    Internal use only, the slow path for dates parse_pubdate()'s regex
+    doesn't recognise. Tries the stdlib's RFC 2822 parser first and then
+    dateutil, which will take just about anything. Dates without a zone are
+    taken to be UTC.
+    """
+    parsed = parsedate_tz(text)
+    if parsed is not None and parsed[0] > 0:
+        return mktime_tz(parsed)
+
+    try:
+        when = dateutil_parser.parse(text, tzinfos=NAMED_ZONES)
+    except (ValueError, OverflowError) as e:
+        raise ValueError("Unrecognised pubDate {!r}".format(text)) from e
+
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=dateutil_tz.UTC)
+    return int(when.timestamp())
+
+
+def parse_pubdate(text: str) -> int:
+    """
+    Parses an RSS pubDate into a unix timestamp.
+
+    Standard RFC 822 dates go through a precompiled regex and
+    calendar.timegm(), which is a lot cheaper than arrow's token based
+    parsing. Anything else falls back to a lenient parser.
+
+    args:
+    text - str, the contents of a <pubDate> tag.
+
+    returns:
+    int, seconds since the epoch.
+    """
+    match = RFC822.match(text)
+    if match is None:
+        return __parse_lenient(text)
+
+    day, month_name, year, hour, minute, second, zone = match.groups()
+    month: Optional[int] = MONTHS.get(month_name.lower())
+    offset: Optional[int] = zone_offset(zone)
+    if month is None or offset is None:
+        return __parse_lenient(text)
+
+    full_year: int = int(year)
+    if len(year) == 2:
+        # NOTE: RFC 2822's rule for two digit years.
+        full_year += 2000 if full_year < 50 else 1900
+
+    return calendar.timegm((
+        full_year,
+        month,
+        int(day),
+        int(hour),
+        int(minute),
+        int(second or 0),
+    )) - offset
@@ -0,0 +1,358 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    DownloadModel
+)
+from podcast_cli.models.custom_types import (
+    DownloadJob,
+    DownloadResult,
+    DownloadOutcome
+)
+from podcast_cli.models.storage import podcast_dir
+from podcast_cli.controllers.refresh import (
+    HostLimiter,
+    interleave_by_host,
+    DEFAULT_PER_HOST
+)
+from podcast_cli.controllers.profiling import span, count
+from podcast_cli.controllers.httpclient import DEFAULT_TIMEOUT
+
+
+# NOTE: Episodes are tens of MB each, so unlike feeds a handful of
+#       downloads at once is enough to fill most connections.
+DEFAULT_DOWNLOAD_JOBS: int = 4
+CHUNK_SIZE: int = 64 * 1024
+PART_SUFFIX: str = ".part"
+DEFAULT_EXTENSION: str = ".mp3"
+GUID_HASH_LENGTH: int = 8
+
+UNSAFE_CHARACTERS = re.compile(r"[^\w\-.,()&' ]+")
+CONTENT_RANGE = re.compile(r"bytes\s+(\d+|\*)(?:-(\d+))?/(\d+|\*)")
+RATE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)i?b?\s*$", re.IGNORECASE)
+RATE_UNITS: Dict[str, int] = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def safe_filename(name: str, max_length: int = 150) -> str:
+    """
+    Turns a podcast or episode title into something that's safe to use as
+    a file or directory name on any OS.
+    """
+    cleaned: str = UNSAFE_CHARACTERS.sub("_", name or "").strip(" ._")
+    return cleaned[:max_length].rstrip(" ._") or "untitled"
+
+
+def podcast_download_dir(podcast: PodcastModel) -> str:
+    """
+    Returns the directory a podcast's episodes get downloaded to, i.e
+    ~/.podcasts/Planet Money
+    """
+    return os.path.join(podcast_dir(), safe_filename(podcast.title))
+
+
+def guid_hash(guid: str) -> str:
+    return hashlib.sha1(guid.encode("utf-8")).hexdigest()[:GUID_HASH_LENGTH]
+
+
+def episode_filename(episode: EpisodeModel) -> str:
+    """
+    Builds the file name for an episode, "YYYY-MM-DD Title [hash].ext".
+    The date goes first so the files sort by release. The hash is the
+    start of the sha1 of the episode's guid, so two episodes with the same
+    title out on the same day (i.e a part 1 and 2 that didn't say so) get
+    their own file, and their own .part to resume, instead of downloading
+    into each other's.
+    """
+    extension: str = os.path.splitext(urlparse(episode.link).path)[1]
+    if not re.match(r"^\.[A-Za-z0-9]{1,5}$", extension):
+        extension = DEFAULT_EXTENSION
+    return "{} {} [{}]{}".format(
+        episode.pubDate.strftime("%Y-%m-%d"),
+        safe_filename(episode.title),
+        guid_hash(episode.guid),
+        extension.lower()
+    )
+
+
+def parse_rate(text: Optional[str]) -> Optional[int]:
+    """
+    Parses a bandwidth cap like "500K", "2M" or "1.5MB" into bytes per
+    second. None or "" means no cap.
+    """
+    if not text:
+        return None
+    match = RATE.match(text)
+    if match is None:
+        raise ValueError("Unrecognised rate {!r}, try i.e 500K or 2M".format(text))  # noqa: E501
+    return int(float(match.group(1)) * RATE_UNITS[match.group(2).lower()])
+
+
+class RateLimiter:
+    """
+    Caps the combined throughput of every download thread that shares it,
+    in bytes per second. Each chunk books the next free slot on a shared
+    schedule and its thread sleeps until then, so threads take turns
+    rather than one of them starving the rest.
+    """
+    def __init__(
+        self,
+        rate: Optional[int],
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate: Optional[int] = rate
+        self._clock: Callable[[], float] = clock
+        self._sleep: Callable[[float], None] = sleep
+        self._lock: threading.Lock = threading.Lock()
+        self._next: float = 0.0
+
+    def consume(self, amount: int) -> None:
+        if not self.rate:
+            return
+        with self._lock:
+            now: float = self._clock()
+            self._next = max(self._next, now) + amount / self.rate
+            delay: float = self._next - now
+        if delay > 0:
+            self._sleep(delay)
+
+
+def __expected_size(res: requests.Response, offset: int) -> Optional[int]:
+    content_range: Optional[str] = res.headers.get("Content-Range")
+    if res.status_code == 206 and content_range:
+        match = CONTENT_RANGE.match(content_range)
+        if match is not None and match.group(1) != str(offset):
+            raise IOError(
+                "Asked for bytes from {} but got {}".format(offset, content_range)  # noqa: E501
+            )
+        if match is not None and match.group(3) != "*":
+            return int(match.group(3))
+    length: Optional[str] = res.headers.get("Content-Length")
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def download_file(
+    session: requests.Session,
+    url: str,
+    path: str,
+    limiter: Optional[RateLimiter] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> DownloadResult:
+    """
+    Downloads url to path.
+
+    The download goes to path + ".part" first and is only renamed to path
+    once it's complete and fsync'd, so path either doesn't exist or holds
+    the whole file. If a .part file is already there, only the rest of it
+    is asked for with a Range request. Servers that ignore Range send the
+    whole file back, in which case the download starts over.
+
+    args:
+    session - requests.Session to download with, see httpclient.get_session().
+    url - str, the enclosure url.
+    path - str, where the finished file should end up.
+    limiter - RateLimiter shared by every download, or None for no cap.
+    chunk_size - int, bytes read from the socket at a time.
+
+    returns:
+    DownloadResult, a dictionary with the keys ["path", "size", "resumed"]
+    """
+    part: str = path + PART_SUFFIX
+    offset: int = os.path.getsize(part) if os.path.exists(part) else 0
+    headers: Dict[str, str] = {}
+    if offset:
+        headers["Range"] = "bytes={}-".format(offset)
+
+    with span("download"):
+        with session.get(
+            url,
+            headers=headers,
+            stream=True,
+            timeout=DEFAULT_TIMEOUT
+        ) as res:
+            expected: Optional[int]
+            if offset and res.status_code == 416:
+                # NOTE: The range starts at or past the end of the file,
+                #       which is fine if the .part file is the whole thing.
+                match = CONTENT_RANGE.match(res.headers.get("Content-Range", ""))  # noqa: E501
+                if match is not None and match.group(3) not in ("*", str(offset)):  # noqa: E501
+                    os.remove(part)
+                    raise IOError(
+                        "{} doesn't match the remote file, removed it".format(part)  # noqa: E501
+                    )
+                expected = offset
+            else:
+                res.raise_for_status()
+                if res.status_code != 206:
+                    offset = 0
+                expected = __expected_size(res, offset)
+                with open(part, "ab" if offset else "wb") as F:
+                    for chunk in res.iter_content(chunk_size):
+                        F.write(chunk)
+                        count("bytes_fetched", len(chunk))
+                        if limiter is not None:
+                            limiter.consume(len(chunk))
+                    F.flush()
+                    os.fsync(F.fileno())
+
+    size: int = os.path.getsize(part)
+    if expected is not None and size != expected:
+        raise IOError(
+            "Got {} of {} bytes, run it again to resume".format(size, expected)
+        )
+    os.replace(part, path)
+    return DownloadResult(path=path, size=size, resumed=offset > 0)
+
+
+def load_download_states(
+    episodes: Iterable[EpisodeModel]
+) -> Dict[int, DownloadModel]:
+    """
+    Loads the download state of the given episodes in one query.
+
+    returns:
+    a dict mapping episode id to DownloadModel. Episodes that were never
+    queued for download are missing.
+    """
+    ids: List[int] = [e.id for e in episodes]
+    return {
+        state.episode_id: state
+        for state in DownloadModel.select().where(DownloadModel.episode.in_(ids))  # noqa: E501
+    }
+
+
+def plan_downloads(
+    episodes: Iterable[EpisodeModel],
+    states: Dict[int, DownloadModel]
+) -> List[DownloadJob]:
+    """
+    Works out where each episode goes, leaving out the ones that are
+    already downloaded and still on disk. Episodes need their podcast
+    joined in, see the download command.
+    """
+    jobs: List[DownloadJob] = []
+    for episode in episodes:
+        state: Optional[DownloadModel] = states.get(episode.id)
+        if state is not None and state.status == "done" and os.path.exists(state.path):  # noqa: E501
+            continue
+        jobs.append(DownloadJob(
+            episode=episode,
+            url=episode.link,
+            path=os.path.join(
+                podcast_download_dir(episode.podcast),
+                episode_filename(episode)
+            )
+        ))
+    return jobs
+
+
+def record_download(
+    job: DownloadJob,
+    status: str,
+    error: Optional[str] = None
+) -> None:
+    """
+    Stores the state of a download, creating the row the first time an
+    episode is queued.
+
+    args:
+    job - DownloadJob, the download in question.
+    status - str, one of "downloading", "done" or "failed".
+    error - str, what went wrong if it failed.
+
+    returns:
+    nothing.
+    """
+    on_disk: int = 0
+    for candidate in (job["path"], job["path"] + PART_SUFFIX):
+        if os.path.exists(candidate):
+            on_disk = os.path.getsize(candidate)
+            break
+    (
+        DownloadModel.insert(
+            episode=job["episode"],
+            status=status,
+            path=job["path"],
+            size_on_disk=on_disk,
+            total_size=on_disk if status == "done" else None,
+            error=error,
+        )
+        .on_conflict(
+            conflict_target=[DownloadModel.episode],
+            preserve=[
+                DownloadModel.status,
+                DownloadModel.path,
+                DownloadModel.size_on_disk,
+                DownloadModel.total_size,
+                DownloadModel.error,
+            ]
+        )
+        .execute()
+    )
+
+
+def download_episodes(
+    jobs: List[DownloadJob],
+    session: requests.Session,
+    workers: int = DEFAULT_DOWNLOAD_JOBS,
+    per_host: int = DEFAULT_PER_HOST,
+    limiter: Optional[RateLimiter] = None
+) -> Iterator[DownloadOutcome]:
+    """
+    Downloads every job on a thread pool, at most per_host at a time from
+    any one host, and yields each outcome as it finishes.
+
+    Like refresh_feeds(), the worker threads only do network and disk
+    work; recording the outcomes in the database is up to the caller, on
+    the thread that owns the connection.
+
+    args:
+    jobs - list of DownloadJob, see plan_downloads().
+    session - requests.Session shared by every worker, see
+        httpclient.get_session().
+    workers - int, maximum number of downloads at the same time.
+    per_host - int, maximum number of downloads from any one host at the
+        same time.
+    limiter - RateLimiter shared by every worker, or None for no cap.
+
+    returns:
+    an iterator of DownloadOutcome, one per job. If the download failed,
+    "error" holds the exception and "result" is None.
+    """
+    hosts: HostLimiter = HostLimiter(per_host)
+    by_episode: Dict[int, DownloadJob] = {j["episode"].id: j for j in jobs}
+    ordered: List[DownloadJob] = [
+        by_episode[episode.id]
+        for episode in interleave_by_host(j["episode"] for j in jobs)
+    ]
+    if not ordered:
+        return
+
+    def __work(job: DownloadJob) -> DownloadResult:
+        os.makedirs(os.path.dirname(job["path"]), exist_ok=True)
+        with hosts.get(job["url"]):
+            return download_file(session, job["url"], job["path"], limiter)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures: Dict[Future, DownloadJob] = {
+            pool.submit(__work, job): job
+            for job in ordered
+        }
+        for future in as_completed(futures):
+            job: DownloadJob = futures[future]
+            try:
+                yield DownloadOutcome(job=job, result=future.result(), error=None)  # noqa: E501
+            except Exception as e:
+                yield DownloadOutcome(job=job, result=None, error=e)
@@ -1,28 +1,204 @@
-from typing import List
-from peewee import ModelObjectCursorWrapper
-from podcast_cli.models.database_models import EpisodeModel
-from podcast_cli.models.custom_types import EpisodeType
-
-
-def __ep_model_to_type(model: EpisodeModel) -> EpisodeType:
-    return EpisodeType(
-        title=model.title,
-        description=model.description,
-        pubDate=model.pubDate,
-        link=model.link,
-        podcast=model.podcast.title,
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+from peewee import ModelSelect, fn  # type: ignore
+from podcast_cli.models.database_models import EpisodeModel, PodcastModel
+from podcast_cli.models.custom_types import EpisodeType, Episode
+
+
+def select_episodes() -> ModelSelect:
+    """
+    The query every Episode record comes from: the columns in Episode's
+    order, with the podcast title joined in rather than lazily loaded one
+    episode at a time. Add .where() / .order_by() and then .tuples().
+    """
+    return (
+        EpisodeModel.select(
+            EpisodeModel.id,
+            EpisodeModel.title,
+            EpisodeModel.description,
+            EpisodeModel.link,
+            EpisodeModel.guid,
+            EpisodeModel.pubDate,
+            PodcastModel.title,
+        )
+        .join(PodcastModel)
+    )
+
+
+def get_one_episode(pk: int) -> Episode:
+    return Episode._make(
+        select_episodes().where(EpisodeModel.id == pk).tuples().get()
+    )
+
+
+def get_all_episodes(parent: int) -> List[Episode]:
+    rows = (
+        select_episodes()
+        .where(EpisodeModel.podcast == parent)
+        .order_by(EpisodeModel.pubDate.desc())
+        .tuples()
+    )
+    return [Episode._make(row) for row in rows]
+
+
+def get_episodes_by_guid(guids: Iterable[str]) -> List[Episode]:
+    """
+    Gets the episodes with the given guids, newest first, i.e the ones an
+    update just inserted.
+    """
+    rows = (
+        select_episodes()
+        .where(EpisodeModel.guid.in_(list(guids)))
+        .order_by(EpisodeModel.pubDate.desc())
+        .tuples()
     )
+    return [Episode._make(row) for row in rows]
+
+
+def format_pubdate(pubdate: Union[int, datetime]) -> str:
+    """
+    Turns a pubDate into a string in the local timezone, same as
+    str(arrow.get(timestamp).to("local").datetime) but without going
+    through arrow for every row.
+
+    args:
+    pubdate - either a unix timestamp, or the naive local datetime that
+        EpisodeModel.pubDate (a TimestampField) hands back.
+    """
+    if isinstance(pubdate, datetime):
+        return str(pubdate.astimezone())
+    return str(datetime.fromtimestamp(pubdate, timezone.utc).astimezone())
 
 
-def get_one_episode(pk: int) -> EpisodeType:
-    ep: EpisodeModel = (
-        EpisodeModel.get_by_id(pk)
+def get_latest_per_podcast(count: int) -> List[EpisodeType]:
+    """
+    Gets the latest "count" episodes of every podcast in a single query,
+    numbering each podcast's episodes with ROW_NUMBER() and keeping the
+    first "count" of them. The podcast title comes from a join, so nothing
+    gets lazily loaded afterwards.
+
+    args:
+    count - int, how many episodes per podcast.
+
+    returns:
+    a list of EpisodeType instances with the keys
+        ["pk", "title", "guid", "podcast", "pubDate"]
+    ordered by podcast and then newest first, ready for tabulate().
+    """
+    ranked = (
+        EpisodeModel.select(
+            EpisodeModel.id,
+            EpisodeModel.title,
+            EpisodeModel.guid,
+            EpisodeModel.pubDate,
+            EpisodeModel.podcast,
+            fn.ROW_NUMBER().over(
+                partition_by=[EpisodeModel.podcast],
+                order_by=[EpisodeModel.pubDate.desc(), EpisodeModel.id.desc()]
+            ).alias("position")
+        )
+        .alias("ranked")
     )
-    return __ep_model_to_type(ep)
+    rows = (
+        PodcastModel.select(
+            ranked.c.id,
+            ranked.c.title,
+            ranked.c.guid,
+            PodcastModel.title,
+            ranked.c.pubDate
+        )
+        .join(ranked, on=(ranked.c.podcast_id == PodcastModel.id))
+        .where(ranked.c.position <= count)
+        .order_by(PodcastModel.id, ranked.c.position)
+        .tuples()
+    )
+
+    return [
+        EpisodeType(
+            pk=pk,
+            title=title,
+            guid=guid,
+            podcast=podcast,
+            pubDate=format_pubdate(pubdate)
+        )
+        for pk, title, guid, podcast, pubdate in rows
+    ]
+
+
+# NOTE: A position in a podcast's episode list, (pubDate, id) of the last
+#       episode on the previous page. id breaks ties between episodes that
+#       came out at the same second, and goes in ascending order because
+#       that's the order the (podcast, pubDate DESC) index keeps rowids in.
+#       Ordering by id DESC instead makes sqlite sort every page in a temp
+#       b-tree.
+EpisodeCursor = Tuple[int, int]
+
 
+def encode_cursor(cursor: EpisodeCursor) -> str:
+    return "{}:{}".format(*cursor)
 
-def get_all_episodes(parent: int) -> List[EpisodeType]:
-    eps: ModelObjectCursorWrapper = (
-        EpisodeModel.select().where(EpisodeModel.podcast == parent).execute()
+
+def decode_cursor(text: str) -> EpisodeCursor:
+    """
+    The inverse of encode_cursor(), raises ValueError on anything that
+    isn't "<pubDate>:<id>".
+    """
+    pubdate, _, pk = text.partition(":")
+    return int(pubdate), int(pk)
+
+
+def iter_episodes(
+    parent: int,
+    limit: Optional[int] = None,
+    after: Optional[EpisodeCursor] = None
+) -> Iterator[EpisodeType]:
+    """
+    Streams a podcast's episodes newest first, one page at a time using
+    keyset pagination on (pubDate, id).
+
+    Unlike OFFSET, seeking to "after" is a range scan on the
+    (podcast, pubDate) index, so page 500 costs the same as page 1. Rows
+    come straight off the cursor without peewee caching them, so memory
+    stays flat however many episodes there are.
+
+    args:
+    parent - int, pk of the podcast.
+    limit - int, the most episodes to return, None for all of them.
+    after - EpisodeCursor, only return episodes older than this one, i.e
+        the "cursor" of the last episode of the previous page.
+
+    returns:
+    an iterator of EpisodeType with the keys
+        ["pk", "title", "pubDate", "cursor"]
+    where pubDate is a unix timestamp and cursor is what to pass as
+    "after" to get the page that follows this episode.
+    """
+    query = (
+        EpisodeModel.select(
+            EpisodeModel.id,
+            EpisodeModel.title,
+            EpisodeModel.pubDate
+        )
+        .where(EpisodeModel.podcast == parent)
+        .order_by(EpisodeModel.pubDate.desc(), EpisodeModel.id.asc())
     )
-    return [__ep_model_to_type(ep) for ep in eps]
+    if after is not None:
+        after_pubdate, after_pk = after
+        query = query.where(
+            (EpisodeModel.pubDate < after_pubdate)
+            | (
+                (EpisodeModel.pubDate == after_pubdate)
+                & (EpisodeModel.id > after_pk)
+            )
+        )
+    if limit:
+        query = query.limit(limit)
+
+    for pk, title, pubdate in query.tuples().iterator():
+        timestamp: int = EpisodeModel.pubDate.db_value(pubdate)
+        yield EpisodeType(
+            pk=pk,
+            title=title,
+            pubDate=timestamp,
+            cursor=encode_cursor((timestamp, pk))
+        )
@@ -0,0 +1,72 @@
+from typing import Dict, Iterable
+
+from peewee import chunked  # type: ignore
+
+from podcast_cli.models.database_models import PodcastModel, FeedCacheModel
+from podcast_cli.models.custom_types import FeedCacheType, FeedResponse
+from podcast_cli.controllers.ingest import DEFAULT_CHUNK_SIZE
+
+
+def load_feed_caches(
+    podcasts: Iterable[PodcastModel]
+) -> Dict[int, FeedCacheType]:
+    """
+    Loads the stored HTTP validators for the given podcasts, one query per
+    DEFAULT_CHUNK_SIZE podcasts (sqlite's bound parameter limit, see
+    ingest.py).
+
+    This is meant to run on the main thread before feeds are handed off to
+    refresh_feeds(), since the workers shouldn't be touching the database.
+
+    args:
+    podcasts - any iterable of PodcastModel instances.
+
+    returns:
+    a dict mapping podcast id to a FeedCacheType. Podcasts that have never
+    been fetched through fetch_podcast_feed() are simply missing.
+    """
+    caches: Dict[int, FeedCacheType] = {}
+    for chunk in chunked([p.id for p in podcasts], DEFAULT_CHUNK_SIZE):
+        rows = (
+            FeedCacheModel.select()
+            .where(FeedCacheModel.podcast.in_(chunk))
+            .dicts()
+        )
+        for row in rows:
+            caches[row["podcast"]] = FeedCacheType(
+                etag=row["etag"],
+                last_modified=row["last_modified"],
+                content_hash=row["content_hash"],
+            )
+    return caches
+
+
+def save_feed_cache(podcast: PodcastModel, feed: FeedResponse) -> None:
+    """
+    Stores the validators from a fetch, so the next fetch of this podcast
+    can be a conditional one.
+
+    args:
+    podcast - PodcastModel, the podcast the feed belongs to.
+    feed - FeedResponse, output of fetch_podcast_feed().
+
+    returns:
+    nothing.
+    """
+    (
+        FeedCacheModel.insert(
+            podcast=podcast,
+            etag=feed["etag"],
+            last_modified=feed["last_modified"],
+            content_hash=feed["content_hash"],
+        )
+        .on_conflict(
+            conflict_target=[FeedCacheModel.podcast],
+            preserve=[
+                FeedCacheModel.etag,
+                FeedCacheModel.last_modified,
+                FeedCacheModel.content_hash,
+            ]
+        )
+        .execute()
+    )
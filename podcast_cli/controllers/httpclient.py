@@ -0,0 +1,147 @@
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+
+from podcast_cli.controllers.profiling import count
+
+
+# NOTE: Everything that goes over the network, feeds and media alike, goes
+#       through one shared requests.Session, so that consecutive requests
+#       to the same host (and most feeds live on a handful of hosts:
+#       megaphone, libsyn, omny, npr) reuse a kept-alive connection
+#       instead of paying for a new TCP + TLS handshake each.
+#
+#       POOL_HOSTS is how many hosts keep a pool of idle connections at
+#       once, POOL_SIZE how many connections each host's pool keeps. The
+#       latter only needs to cover refresh_feeds()'s per host limit, it's
+#       configurable with PODCAST_CLI_POOL_SIZE.
+POOL_SIZE_ENV: str = "PODCAST_CLI_POOL_SIZE"
+DEFAULT_POOL_SIZE: int = 8
+DEFAULT_POOL_HOSTS: int = 64
+# NOTE: (connect, read) in seconds. The read timeout is between chunks,
+#       not for the whole response.
+DEFAULT_TIMEOUT = (10, 60)
+
+
+def counting_pool_class(base, adapter: "CountingAdapter"):
+    """
+    A subclass of urllib3's connection pool class "base" that tells
+    adapter every time it has to open a new connection. That happens on
+    the thread making the request, so it's attributed to the right feed.
+    """
+    class CountingPool(base):
+        def _new_conn(self):
+            adapter.connection_opened()
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class CountingAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that keeps track of how many requests it sent and how
+    many new connections it had to open for them, so it's possible to see
+    how many handshakes keep-alive saved. Both also go to the profiler's
+    "http_requests" / "http_connections" counters (see --profile).
+    """
+    def __init__(self, *args, **kwargs):
+        self._lock: threading.Lock = threading.Lock()
+        self.requests: int = 0
+        self.connections: int = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": counting_pool_class(HTTPConnectionPool, self),
+            "https": counting_pool_class(HTTPSConnectionPool, self),
+        }
+
+    def connection_opened(self) -> None:
+        with self._lock:
+            self.connections += 1
+        count("http_connections", 1)
+
+    def send(self, request, *args, **kwargs):
+        with self._lock:
+            self.requests += 1
+        count("http_requests", 1)
+        return super().send(request, *args, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": self.requests - self.connections,
+            }
+
+
+def pool_size() -> int:
+    value: Optional[str] = os.environ.get(POOL_SIZE_ENV)
+    return max(1, int(value)) if value else DEFAULT_POOL_SIZE
+
+
+def make_session(
+    size: Optional[int] = None,
+    hosts: int = DEFAULT_POOL_HOSTS
+) -> requests.Session:
+    """
+    A requests.Session with a CountingAdapter mounted for http and https.
+
+    args:
+    size - int, connections kept per host, defaults to pool_size().
+    hosts - int, hosts whose connections are kept at once.
+
+    returns:
+    a requests.Session.
+    """
+    adapter: CountingAdapter = CountingAdapter(
+        pool_connections=hosts,
+        pool_maxsize=size or pool_size()
+    )
+    session: requests.Session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+__session: Optional[requests.Session] = None
+__session_lock: threading.Lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    The process wide session, made on first use. requests.Session is fine
+    to share between refresh_feeds()'s / download_episodes()' workers.
+    """
+    global __session
+    with __session_lock:
+        if __session is None:
+            __session = make_session()
+        return __session
+
+
+def session_stats(session: Optional[requests.Session] = None) -> Dict[str, int]:  # noqa: E501
+    """
+    returns:
+    a dict with the keys ["requests", "connections", "reused"] for the
+    given session, the shared one by default.
+    """
+    adapter = (session or get_session()).get_adapter("https://")
+    if not isinstance(adapter, CountingAdapter):
+        return {"requests": 0, "connections": 0, "reused": 0}
+    return adapter.stats()
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """
+    requests.get(), over the shared session and with DEFAULT_TIMEOUT
+    unless another timeout is given.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_session().get(url, **kwargs)
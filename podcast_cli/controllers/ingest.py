@@ -0,0 +1,170 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from peewee import chunked  # type: ignore
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import EpisodeType, IngestReport
+from podcast_cli.controllers.profiling import span, count
+
+
+# NOTE: Each row is 6 bound parameters, and older sqlite builds cap a single
+#       statement at 999 of them. 100 rows keeps us well under that.
+DEFAULT_CHUNK_SIZE: int = 100
+
+UPDATABLE_FIELDS: Tuple[str, ...] = ("title", "description", "link", "pubDate")
+
+
+def __episode_to_row(parent: PodcastModel, episode: EpisodeType) -> Dict:
+    return {
+        "title": episode["title"],
+        "description": episode["description"],
+        "link": episode["link"],
+        "guid": episode["guid"],
+        "pubDate": episode["pubDate"],
+        "podcast": parent.id,
+    }
+
+
+def __is_unchanged(stored: Dict, row: Dict) -> bool:
+    # NOTE: pubDate comes back out of the db as a datetime, the feed
+    #       gives us a unix timestamp. db_value() puts both on the same
+    #       footing.
+    return all(
+        getattr(EpisodeModel, field).db_value(stored[field])
+        == getattr(EpisodeModel, field).db_value(row[field])
+        for field in UPDATABLE_FIELDS
+    )
+
+
+def load_foreign_guids(
+    parent: PodcastModel,
+    guids: Iterable[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Set[str]:
+    """
+    Picks out the guids that are already stored under some other podcast.
+    guid is unique across every podcast, so those can't be stored under
+    parent; upserting them would take over the other podcast's row.
+
+    args:
+    parent - PodcastModel, the podcast the guids would belong to.
+    guids - any iterable of guids.
+    chunk_size - int, how many guids go into each query.
+
+    returns:
+    a set of guids.
+    """
+    foreign: Set[str] = set()
+    for chunk in chunked(guids, chunk_size):
+        rows = (
+            EpisodeModel.select(EpisodeModel.guid)
+            .where(
+                EpisodeModel.guid.in_(chunk),
+                EpisodeModel.podcast != parent
+            )
+            .tuples()
+        )
+        foreign.update(guid for (guid,) in rows)
+    return foreign
+
+
+def ingest_episodes(
+    parent: PodcastModel,
+    episodes: Iterable[EpisodeType],
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> IngestReport:
+    """
+    Writes a podcast's episodes to the database in chunked, multi-row
+    INSERTs, all inside a single transaction.
+
+    Episodes are upserted on guid: new guids are inserted, known guids
+    whose title / description / link / pubDate changed are updated, and
+    anything identical to what's stored is skipped. An episode whose link
+    already belongs to a different guid is skipped too, since link is
+    unique and sqlite can only upsert on one constraint at a time. So is
+    one whose guid belongs to another podcast's episode, which would
+    otherwise be overwritten (feeds with guids like "1" or "ep-1" aren't
+    rare).
+
+    args:
+    parent - PodcastModel, the podcast the episodes belong to.
+    episodes - any iterable of EpisodeType, i.e the output of
+        parse_podcast_episodeset() or iter_podcast_episodes().
+    chunk_size - int, how many rows go into each INSERT.
+
+    returns:
+    IngestReport, a dictionary with the keys
+        ["inserted", "updated", "skipped", "new_guids"]
+    """
+    report: IngestReport = IngestReport(
+        inserted=0,
+        updated=0,
+        skipped=0,
+        new_guids=[]
+    )
+    seen_guids: Set[str] = set()
+    seen_links: Set[str] = set()
+
+    with span("insert"), EpisodeModel._meta.database.atomic():
+        for chunk in chunked(episodes, chunk_size):
+            rows: List[Dict] = []
+            for episode in chunk:
+                # NOTE: Some feeds repeat items. The first one wins.
+                if episode["guid"] in seen_guids or episode["link"] in seen_links:  # noqa: E501
+                    report["skipped"] += 1
+                    continue
+                seen_guids.add(episode["guid"])
+                seen_links.add(episode["link"])
+                rows.append(__episode_to_row(parent, episode))
+
+            if not rows:
+                continue
+
+            guids: List[str] = [r["guid"] for r in rows]
+            stored_rows = (
+                EpisodeModel.select()
+                .where(
+                    EpisodeModel.guid.in_(guids),
+                    EpisodeModel.podcast == parent
+                )
+                .dicts()
+            )
+            stored: Dict[str, Dict] = {row["guid"]: row for row in stored_rows}
+            foreign_guids: Set[str] = load_foreign_guids(parent, guids)
+            owner_rows = (
+                EpisodeModel.select(EpisodeModel.link, EpisodeModel.guid)
+                .where(EpisodeModel.link.in_([r["link"] for r in rows]))
+                .tuples()
+            )
+            link_owners: Dict[str, str] = dict(owner_rows)
+
+            pending: List[Dict] = []
+            for row in rows:
+                owner: str = link_owners.get(row["link"], row["guid"])
+                if owner != row["guid"] or row["guid"] in foreign_guids:
+                    report["skipped"] += 1
+                elif row["guid"] not in stored:
+                    report["inserted"] += 1
+                    report["new_guids"].append(row["guid"])
+                    pending.append(row)
+                elif __is_unchanged(stored[row["guid"]], row):
+                    report["skipped"] += 1
+                else:
+                    report["updated"] += 1
+                    pending.append(row)
+
+            if pending:
+                preserve: List = [
+                    getattr(EpisodeModel, field) for field in UPDATABLE_FIELDS
+                ]
+                (
+                    EpisodeModel.insert_many(pending)
+                    .on_conflict(
+                        conflict_target=[EpisodeModel.guid],
+                        preserve=preserve
+                    )
+                    .execute()
+                )
+
+    count("rows_written", report["inserted"] + report["updated"])
+    return report
@@ -0,0 +1,249 @@
+from typing import Iterable, List, Set, Tuple
+
+from lxml import etree  # type: ignore
+from peewee import IntegrityError, chunked  # type: ignore
+
+from podcast_cli.models.custom_types import (
+    FeedRefreshResult,
+    FeedResponse,
+    IngestReport,
+    OpmlFeed,
+    OpmlImportResult,
+    ParsedFeed,
+    Podcast,
+    PodcastType
+)
+from podcast_cli.models.database_models import PodcastModel
+from podcast_cli.controllers.parser import (
+    fetch_podcast_feed,
+    create_podcast_model
+)
+from podcast_cli.controllers.ingest import ingest_episodes, DEFAULT_CHUNK_SIZE
+from podcast_cli.controllers.feed_cache import save_feed_cache
+from podcast_cli.controllers.archive import archive_feed
+from podcast_cli.controllers.parse_cache import parse_feed_cached
+from podcast_cli.controllers.refresh import refresh_feeds, DEFAULT_JOBS
+from podcast_cli.controllers.playlist import add_to_playlist
+from podcast_cli.controllers.profiling import feed_context
+
+
+OPML_TITLE: str = "podcast_cli subscriptions"
+
+
+def parse_opml(source: bytes) -> List[OpmlFeed]:
+    """
+    Pulls the feeds out of an OPML subscription list, the format every
+    podcast app exports. Outlines can be nested in folders, those are
+    flattened. A feed listed twice only comes back once.
+
+    args:
+    source - bytes, the OPML document.
+
+    returns:
+    a list of OpmlFeed, in the order they appear in the document.
+    """
+    parser = etree.XMLParser(
+        recover=True,
+        resolve_entities=False,
+        no_network=True
+    )
+    root = etree.fromstring(source, parser=parser)
+    if root is None:
+        raise ValueError("Not an OPML document")
+
+    feeds: List[OpmlFeed] = []
+    seen: Set[str] = set()
+    for outline in root.iter("outline"):
+        url: str = (outline.get("xmlUrl") or "").strip()
+        if not url or url in seen:
+            continue
+        seen.add(url)
+        feeds.append(OpmlFeed(
+            title=outline.get("title") or outline.get("text"),
+            url=url
+        ))
+    return feeds
+
+
+def render_opml(podcasts: Iterable[Podcast], title: str = OPML_TITLE) -> bytes:  # noqa: E501
+    """
+    Writes podcasts out as an OPML 2.0 subscription list that other
+    podcast apps can import.
+
+    args:
+    podcasts - any iterable of Podcast records, i.e get_all_podcasts().
+    title - str, what goes in the document's <title>.
+
+    returns:
+    the OPML document as utf-8 bytes.
+    """
+    opml = etree.Element("opml", version="2.0")
+    head = etree.SubElement(opml, "head")
+    etree.SubElement(head, "title").text = title
+    body = etree.SubElement(opml, "body")
+    for podcast in podcasts:
+        outline = etree.SubElement(
+            body,
+            "outline",
+            type="rss",
+            text=podcast.title,
+            title=podcast.title,
+            xmlUrl=podcast.link
+        )
+        if podcast.description:
+            outline.set("description", podcast.description)
+    return etree.tostring(
+        opml,
+        xml_declaration=True,
+        encoding="utf-8",
+        pretty_print=True
+    )
+
+
+def split_known_feeds(
+    feeds: List[OpmlFeed]
+) -> Tuple[List[OpmlFeed], List[OpmlFeed]]:
+    """
+    Splits feeds into the ones we aren't subscribed to yet and the ones we
+    are, going by PodcastModel.link, so the known ones never get fetched.
+
+    returns:
+    a tuple of (new, known) lists of OpmlFeed.
+    """
+    known: Set[str] = set()
+    for chunk in chunked([f["url"] for f in feeds], DEFAULT_CHUNK_SIZE):
+        known.update(
+            link for (link,) in
+            PodcastModel.select(PodcastModel.link)
+                        .where(PodcastModel.link.in_(chunk))
+                        .tuples()
+        )
+    return (
+        [f for f in feeds if f["url"] not in known],
+        [f for f in feeds if f["url"] in known],
+    )
+
+
+def fetch_new_podcast(podcast: PodcastModel) -> ParsedFeed:
+    """
+    Fetches and parses a feed we're about to subscribe to. This runs on
+    refresh_feeds()'s worker threads, so it doesn't touch the database;
+    podcast is an unsaved PodcastModel that only carries the feed's url.
+    """
+    with feed_context(podcast.link):
+        feed: FeedResponse = fetch_podcast_feed(podcast.link)
+        archive_feed(feed)
+        cast: PodcastType
+        cast, episodes = parse_feed_cached(feed)
+        # NOTE: same as podcast_add, the link is the feed and not the
+        #       homepage.
+        cast["link"] = podcast.link
+        return ParsedFeed(feed=feed, podcast=cast, episodes=episodes)
+
+
+def store_fetched_podcasts(
+    fetched: Iterable[FeedRefreshResult]
+) -> List[OpmlImportResult]:
+    """
+    Subscribes to every feed that was fetched successfully, episodes and
+    all, in one transaction.
+
+    Each podcast goes in under its own savepoint, so one that can't be
+    stored (i.e a title we already have under another url) is reported as
+    failed without taking the rest down with it. Podcasts already stored
+    under another url are recognised by guid, same as podcast_add.
+
+    args:
+    fetched - FeedRefreshResult from refresh_feeds(), whose "result" is a
+        ParsedFeed.
+
+    returns:
+    a list of OpmlImportResult, one per feed.
+    """
+    results: List[OpmlImportResult] = []
+    new_guids: List[str] = []
+    database = PodcastModel._meta.database
+
+    with database.atomic():
+        for refresh in fetched:
+            url: str = refresh["podcast"].link
+            if refresh["error"] is not None:
+                results.append(OpmlImportResult(
+                    url=url,
+                    title=refresh["podcast"].title,
+                    status="failed",
+                    episodes=0,
+                    error=str(refresh["error"])
+                ))
+                continue
+
+            parsed: ParsedFeed = refresh["result"]
+            cast: PodcastType = parsed["podcast"]
+            result: OpmlImportResult = OpmlImportResult(
+                url=url,
+                title=cast["title"],
+                status="added",
+                episodes=0,
+                error=None
+            )
+            results.append(result)
+
+            if PodcastModel.select().where(PodcastModel.guid == cast["guid"]).exists():  # noqa: E501
+                result["status"] = "exists"
+                continue
+            try:
+                with database.atomic():
+                    parent: PodcastModel = create_podcast_model(cast)
+                    with feed_context(url):
+                        report: IngestReport = ingest_episodes(parent, parsed["episodes"])  # noqa: E501
+                    save_feed_cache(parent, parsed["feed"])
+            except IntegrityError as e:
+                result.update(status="failed", error=str(e))
+                continue
+            result["episodes"] = report["inserted"]
+            new_guids.extend(report["new_guids"])
+
+        add_to_playlist(new_guids)
+
+    return results
+
+
+def import_opml(
+    feeds: List[OpmlFeed],
+    jobs: int = DEFAULT_JOBS
+) -> List[OpmlImportResult]:
+    """
+    Subscribes to every feed in an OPML list that we aren't subscribed to
+    already.
+
+    Feeds we have are weeded out by url before anything goes over the
+    network, the rest are fetched and parsed concurrently (see
+    refresh_feeds()), and only once they're all in are they written, in a
+    single transaction (see store_fetched_podcasts()). Nothing holds the
+    database's write lock while waiting on the network.
+
+    args:
+    feeds - list of OpmlFeed, i.e from parse_opml().
+    jobs - int, number of feeds to fetch at the same time.
+
+    returns:
+    a list of OpmlImportResult, one per feed, where "status" is one of
+    "added", "exists" or "failed".
+    """
+    new, known = split_known_feeds(feeds)
+    fetched: List[FeedRefreshResult] = list(refresh_feeds(
+        [PodcastModel(title=f["title"], link=f["url"]) for f in new],
+        fetch_new_podcast,
+        jobs=jobs
+    ))
+    results: List[OpmlImportResult] = [
+        OpmlImportResult(
+            url=feed["url"],
+            title=feed["title"],
+            status="exists",
+            episodes=0,
+            error=None
+        )
+        for feed in known
+    ]
+    return results + store_fetched_podcasts(fetched)
@@ -0,0 +1,223 @@
+import hashlib
+import marshal
+import os
+import re
+import shutil
+import sys
+import threading
+from typing import List, Optional, Tuple
+
+from podcast_cli.models.custom_types import (
+    EpisodeType,
+    FeedResponse,
+    PodcastType
+)
+from podcast_cli.models.storage import podcast_dir
+from podcast_cli.controllers.parser import (
+    parse_podcast_metadata,
+    parse_podcast_episodeset,
+    PARSER_VERSION
+)
+from podcast_cli.controllers.profiling import count
+
+
+# NOTE: What a feed parses into only depends on its bytes and on the
+#       parser, so parsed feeds are cached on disk by the sha256 of the
+#       body, under a directory named for the parser version and the
+#       python version (marshal's format is only stable within one). Either
+#       changing makes every old entry a miss. Directories left by an older
+#       parser version get cleared out the next time something is stored,
+#       ones for another python are left alone, since i.e "serve" and a
+#       cron job may well run under different interpreters and share
+#       ~/.podcasts.
+#
+#       Entries are marshal dumps of plain tuples: no field names repeated
+#       per episode, and loading one is a single C call.
+#
+#       The cache is bounded by total size, least recently used goes
+#       first. A hit bumps the entry's mtime, which is what "used" means.
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+CACHE_SUFFIX: str = ".marshal"
+
+PODCAST_FIELDS: Tuple[str, ...] = ("title", "description", "link", "guid")
+EPISODE_FIELDS: Tuple[str, ...] = (
+    "title",
+    "description",
+    "pubDate",
+    "guid",
+    "link",
+)
+
+ParsedFeedSet = Tuple[PodcastType, List[EpisodeType]]
+
+__write_lock: threading.Lock = threading.Lock()
+
+
+def cache_root() -> str:
+    return os.path.join(podcast_dir(), "parsed")
+
+
+def python_tag() -> str:
+    return "py{}{}".format(*sys.version_info[:2])
+
+
+def cache_dir(root: Optional[str] = None) -> str:
+    return os.path.join(
+        root or cache_root(),
+        "v{}-{}".format(PARSER_VERSION, python_tag())
+    )
+
+
+def stale_dirs(root: Optional[str] = None) -> List[str]:
+    """
+    returns:
+    paths to the cache directories of older parser versions under this
+    python, which will never be read again.
+    """
+    root = root or cache_root()
+    pattern = re.compile(r"v(\d+)-{}$".format(re.escape(python_tag())))
+    stale: List[str] = []
+    for entry in os.scandir(root):
+        match = pattern.match(entry.name)
+        if match and entry.is_dir() and int(match.group(1)) < PARSER_VERSION:
+            stale.append(entry.path)
+    return stale
+
+
+def encode_parsed(podcast: PodcastType, episodes: List[EpisodeType]) -> bytes:
+    return marshal.dumps((
+        tuple(podcast.get(f) for f in PODCAST_FIELDS),
+        [tuple(e.get(f) for f in EPISODE_FIELDS) for e in episodes],
+    ))
+
+
+def decode_parsed(data: bytes) -> ParsedFeedSet:
+    # NOTE: TypedDicts are plain dicts at runtime, dict(zip()) builds them
+    #       without going through keyword arguments.
+    podcast, episodes = marshal.loads(data)
+    fields: Tuple[str, ...] = EPISODE_FIELDS
+    return (
+        dict(zip(PODCAST_FIELDS, podcast)),  # type: ignore
+        [dict(zip(fields, e)) for e in episodes],  # type: ignore
+    )
+
+
+def load_parsed(
+    content_hash: str,
+    root: Optional[str] = None
+) -> Optional[ParsedFeedSet]:
+    """
+    returns:
+    the cached (PodcastType, episodes) for a feed body with this hash, or
+    None on a miss.
+    """
+    path: str = os.path.join(cache_dir(root), content_hash + CACHE_SUFFIX)
+    try:
+        with open(path, "rb") as F:
+            data: bytes = F.read()
+        os.utime(path)
+    except OSError:
+        return None
+    try:
+        return decode_parsed(data)
+    except (ValueError, EOFError, TypeError):
+        # NOTE: a damaged entry is just a miss, it gets rewritten.
+        return None
+
+
+def evict(
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    root: Optional[str] = None
+) -> int:
+    """
+    Deletes least recently used entries until the cache fits in
+    max_bytes.
+
+    returns:
+    int, how many entries were deleted.
+    """
+    directory: str = cache_dir(root)
+    entries: List[Tuple[float, int, str]] = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(CACHE_SUFFIX):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total: int = sum(size for _, size, _ in entries)
+    evicted: int = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def store_parsed(
+    content_hash: str,
+    podcast: PodcastType,
+    episodes: List[EpisodeType],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    root: Optional[str] = None
+) -> None:
+    """
+    Stores a parsed feed under content_hash, then evicts down to
+    max_bytes.
+
+    The cache is only ever an optimisation, so failing to write to it (a
+    full disk, or another process clearing a stale directory at the same
+    time) is not an error, the feed just stays uncached.
+    """
+    directory: str = cache_dir(root)
+    with __write_lock:
+        try:
+            if not os.path.isdir(directory):
+                # NOTE: first write since the parser changed (or under a
+                #       new python), clear out older parser versions.
+                if os.path.isdir(root or cache_root()):
+                    for stale in stale_dirs(root):
+                        shutil.rmtree(stale, ignore_errors=True)
+                os.makedirs(directory, exist_ok=True)
+
+            path: str = os.path.join(directory, content_hash + CACHE_SUFFIX)
+            partial: str = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())  # noqa: E501
+            with open(partial, "wb") as F:
+                F.write(encode_parsed(podcast, episodes))
+            os.replace(partial, path)
+            evict(max_bytes, root)
+        except OSError:
+            pass
+
+
+def parse_feed_cached(
+    feed: FeedResponse,
+    root: Optional[str] = None
+) -> ParsedFeedSet:
+    """
+    parse_podcast_metadata() and parse_podcast_episodeset() of a fetched
+    feed's body, from the cache if this exact body has been parsed before.
+
+    args:
+    feed - FeedResponse with a body, i.e from fetch_podcast_feed() or
+        archive.load_archived_feed().
+    root - str, where the cache lives, defaults to ~/.podcasts/parsed
+
+    returns:
+    a tuple of (PodcastType, list of EpisodeType, newest first).
+    """
+    body: bytes = feed["body"]
+    content_hash: str = feed["content_hash"] or hashlib.sha256(body).hexdigest()  # noqa: E501
+
+    cached: Optional[ParsedFeedSet] = load_parsed(content_hash, root)
+    if cached is not None:
+        count("parse_cache_hits", 1)
+        return cached
+
+    podcast: PodcastType = parse_podcast_metadata(body)
+    episodes: List[EpisodeType] = parse_podcast_episodeset(body)
+    store_parsed(content_hash, podcast, episodes, root=root)
+    return podcast, episodes
@@ -1,64 +1,345 @@
+import hashlib
+import io
+
 import requests
-import arrow  # type: ignore
-from bs4 import BeautifulSoup, ResultSet, Tag  # type: ignore
-from typing import List
+from lxml import etree  # type: ignore
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union
+)
 
 from podcast_cli.models.custom_types import (
     PodcastType,
     EpisodeType,
-    PodcastEpisodeBundle
-)
-from podcast_cli.models.database_models import (
-    PodcastModel,
-    EpisodeModel
+    PodcastEpisodeBundle,
+    FeedResponse
 )
+from podcast_cli.models.database_models import PodcastModel
+from podcast_cli.controllers.ingest import ingest_episodes
+from podcast_cli.controllers.dates import parse_pubdate
+from podcast_cli.controllers.profiling import span, count
+from podcast_cli.controllers.httpclient import http_get
+
+
+FeedSource = Union[bytes, str, BinaryIO]
+
+# NOTE: These are the only tags we care about. For each one, the first
+#       occurrence wins, same as bs4's soup.channel.title / item.title did.
+CHANNEL_FIELDS: Tuple[str, ...] = ("title", "description", "link", "guid")
+ITEM_FIELDS: Tuple[str, ...] = ("title", "description", "pubDate", "guid")
+
+# NOTE: Feeds are fetched as raw bytes and handed to the XML parser as-is,
+#       so the encoding comes from the feed's own <?xml ?> declaration.
+#       Going through res.text instead has requests guess the charset
+#       with chardet over the whole body whenever the server leaves it
+#       out, decode it, and then the parser encodes it right back.
+FEED_HEADERS: Dict[str, str] = {"Accept-Encoding": "gzip, deflate"}
+FETCH_CHUNK_SIZE: int = 64 * 1024
+# NOTE: The biggest feed I know of is around 10MB uncompressed. This is
+#       there so a misconfigured server (or a gzip bomb) can't eat all the
+#       memory, it's checked against the decompressed size.
+MAX_FEED_BYTES: int = 64 * 1024 * 1024
+
+# NOTE: Bump this whenever a change here makes the same feed parse into
+#       something different. Parsed feeds are cached by the hash of their
+#       body (see parse_cache.py), and this is what tells the cache its
+#       entries are stale.
+PARSER_VERSION: int = 2
+
+
+def read_feed_body(
+    res: requests.models.Response,
+    max_bytes: int = MAX_FEED_BYTES
+) -> bytes:
+    """
+    Reads a streamed response's body as bytes, decompressed but otherwise
+    untouched, and closes the response.
 
+    args:
+    res - a requests Response fetched with stream=True.
+    max_bytes - int, the most (decompressed) bytes to accept.
+
+    returns:
+    the body, as bytes.
 
-def parse_podcast_xml(url: str) -> BeautifulSoup:
+    raises IOError if the body is bigger than max_bytes.
     """
-    Takes a URL to a podcast's RSS feed and returns an
-    instance of BeautifulSoup, primed with the contents of the
-    rss feed and set up to parse XML.
+    try:
+        declared: str = res.headers.get("Content-Length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise IOError("Feed is {} bytes, more than the limit of {}".format(declared, max_bytes))  # noqa: E501
+
+        chunks: List[bytes] = []
+        size: int = 0
+        for chunk in res.iter_content(FETCH_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_bytes:
+                raise IOError("Feed is more than the limit of {} bytes".format(max_bytes))  # noqa: E501
+            chunks.append(chunk)
+    finally:
+        res.close()
+    return b"".join(chunks)
+
+
+def fetch_podcast_feed(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    content_hash: Optional[str] = None
+) -> FeedResponse:
+    """
+    Fetches a podcast's RSS feed, using a conditional GET when we have
+    validators from a previous fetch.
+
+    If the server answers 304 Not Modified, or sends back a body whose
+    sha256 matches content_hash, the feed is flagged as not_modified and
+    "body" is None, so callers can skip parsing altogether.
 
     args:
     url - str, absolute url to the path of an RSS feed
+    etag - str, the ETag header from the last fetch, if any.
+    last_modified - str, the Last-Modified header from the last fetch, if any.
+    content_hash - str, sha256 hexdigest of the last body we saw, if any.
 
     returns:
-    A BeautifulSoup instance set up to parse the contents of the xml file.
+    FeedResponse, a dictionary with the keys
+        ["url", "not_modified", "body", "etag", "last_modified",
+         "content_hash"]
+    """
+    headers: Dict[str, str] = dict(FEED_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    with span("fetch"):
+        res: requests.models.Response = http_get(
+            url,
+            headers=headers,
+            stream=True
+        )
+        if res.status_code == 304:
+            res.close()
+            return FeedResponse(
+                url=url,
+                not_modified=True,
+                body=None,
+                etag=res.headers.get("ETag", etag),
+                last_modified=res.headers.get("Last-Modified", last_modified),
+                content_hash=content_hash
+            )
+        if not res.ok:
+            res.close()
+            res.raise_for_status()
+        body: bytes = read_feed_body(res)
+
+    count("bytes_fetched", len(body))
+    new_hash: str = hashlib.sha256(body).hexdigest()
+    unchanged: bool = new_hash == content_hash
+    return FeedResponse(
+        url=url,
+        not_modified=unchanged,
+        body=None if unchanged else body,
+        etag=res.headers.get("ETag"),
+        last_modified=res.headers.get("Last-Modified"),
+        content_hash=new_hash
+    )
+
+
+def __open_source(source: FeedSource) -> BinaryIO:
+    """
+    Internal use only, turns whatever we were handed into a file-like
+    object of bytes for iterparse().
+    """
+    if isinstance(source, str):
+        return io.BytesIO(source.encode("utf-8"))
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def __local_name(element: etree._Element) -> str:
+    # NOTE: lxml spells namespaced tags as "{http://...}title". bs4 matched
+    #       on the bare name regardless of prefix, and so do we.
+    tag = element.tag
+    if not isinstance(tag, str):
+        return ""
+    return tag.rpartition("}")[2]
+
+
+def __text(element: etree._Element) -> str:
+    return "".join(element.itertext())
+
+
+def __release(element: etree._Element) -> None:
+    """
+    Frees an element we're done with, along with any siblings that came
+    before it, so the tree iterparse() builds never grows past one item.
     """
-    res: requests.models.Response = requests.get(url)
-    soup: BeautifulSoup = BeautifulSoup(res.text, "xml")
-    return soup
+    element.clear()
+    parent: Optional[etree._Element] = element.getparent()
+    if parent is None:
+        return
+    while element.getprevious() is not None:
+        del parent[0]
 
 
-def parse_podcast_metadata(soup: BeautifulSoup) -> PodcastType:
+def iter_podcast_feed(
+    source: FeedSource
+) -> Iterator[Tuple[str, Union[PodcastType, EpisodeType]]]:
     """
-    Parses a podcast xml file, through a BeautifulSoup instance, and returns
-    the following information:
+    Streams through a podcast's RSS feed one element at a time, without ever
+    building the whole document in memory.
+
+    It yields ("podcast", PodcastType) once, as soon as the channel's
+    metadata is known, and then ("episode", EpisodeType) for every <item>,
+    in the order they appear in the feed. Each <item> is freed once it has
+    been turned into an EpisodeType, so memory use stays flat no matter how
+    large the feed is.
+
+    NOTE: The podcast's guid is whatever <guid> turns up first under the
+          channel. Most feeds don't have a channel-level guid, in which case
+          it's the first episode's guid; this is what bs4's channel.guid
+          gave us and the duplicate check in podcast_add depends on it.
+
+    args:
+    source - the raw feed body (bytes or str), or a binary file object.
+
+    returns:
+    an iterator of (kind, record) tuples, where kind is "podcast" or
+    "episode".
+    """
+    podcast: Dict[str, Optional[str]] = {}
+    podcast_sent: bool = False
+    item: Optional[Dict[str, Optional[str]]] = None
+    depth: int = 0
+    item_depth: int = 0
+
+    context = etree.iterparse(
+        __open_source(source),
+        events=("start", "end"),
+        recover=True,
+        huge_tree=True,
+        resolve_entities=False,
+    )
+    for event, element in context:
+        name: str = __local_name(element)
+
+        if event == "start":
+            depth += 1
+            if name == "item" and item is None:
+                item = {}
+                item_depth = depth
+            elif name == "enclosure" and item is not None:
+                item.setdefault("link", element.get("url"))
+            continue
+
+        depth -= 1
+        if name in CHANNEL_FIELDS and name not in podcast:
+            podcast[name] = __text(element)
+
+        if item is None:
+            continue
+
+        if name in ITEM_FIELDS and name not in item:
+            item[name] = __text(element)
+        elif name == "item" and depth == item_depth - 1:
+            if not podcast_sent:
+                podcast_sent = True
+                yield "podcast", __make_podcast(podcast)
+
+            episode: Optional[EpisodeType] = __make_episode(item)
+            if episode is not None:
+                yield "episode", episode
+            item = None
+            __release(element)
+
+    if not podcast_sent:
+        yield "podcast", __make_podcast(podcast)
+
+
+def __make_podcast(fields: Dict[str, Optional[str]]) -> PodcastType:
+    return PodcastType(
+        title=fields.get("title"),
+        description=fields.get("description"),
+        link=fields.get("link"),
+        guid=fields.get("guid")
+    )
+
+
+def __make_episode(fields: Dict[str, Optional[str]]) -> Optional[EpisodeType]:
+    # NOTE: An item with no enclosure has nothing to listen to, and the
+    #       enclosure url is what EpisodeModel.link stores. bs4 used to blow
+    #       up on these, now they're just skipped.
+    if not fields.get("link"):
+        return None
+
+    with span("dates"):
+        pubdate: int = parse_pubdate(fields.get("pubDate") or "")
+    return EpisodeType(
+        title=fields.get("title"),
+        description=fields.get("description"),
+        pubDate=pubdate,
+        # NOTE: guid is optional in RSS but the episode table needs one, and
+        #       a single NOT NULL failure rolls back a whole update. The
+        #       enclosure url is the next best thing to identify it by.
+        guid=fields.get("guid") or fields["link"],
+        link=fields["link"]
+    )
+
+
+def iter_podcast_episodes(source: FeedSource) -> Iterator[EpisodeType]:
+    """
+    Streams the episodes out of a podcast's RSS feed, one at a time and in
+    feed order. See iter_podcast_feed().
+
+    args:
+    source - the raw feed body, or a binary file object.
+
+    returns:
+    an iterator of EpisodeType instances.
+    """
+    for kind, record in iter_podcast_feed(source):
+        if kind == "episode":
+            yield record
+
+
+def parse_podcast_metadata(source: FeedSource) -> PodcastType:
+    """
+    Parses a podcast xml file and returns the following information:
         - podcast title,
         - podacst description,
         - link to the rss feed,
         - a guid, for identification / tracking purposes.
 
+    Only reads as far into the feed as it needs to, which is usually
+    the end of the first <item>.
+
     args:
-    soup - An instance of BeautifulSoup, preferably the output of
-        parse_podcast_xml(), but can be any BeautifulSoup instance
-        set up to parse a podcast's RSS feed.
+    source - the raw feed body (bytes or str), preferably the "body" of
+        fetch_podcast_feed(), or a binary file object.
 
     returns:
     PodcastType, a dictionary, containing the keys
         ["title", "description", "link", "guid"]
     """
-    channel: Tag = soup.channel
-    return PodcastType(
-        title=channel.title.text,
-        description=channel.description.text,
-        link=channel.link.text,
-        guid=channel.guid.text
-    )
+    with span("parse"):
+        for kind, record in iter_podcast_feed(source):
+            if kind == "podcast":
+                return record
 
+    # NOTE: iter_podcast_feed() always yields the podcast, this is
+    #       just here to keep mypy happy.
+    return PodcastType()
 
-def parse_podcast_episodeset(soup: BeautifulSoup) -> List[EpisodeType]:
+
+def parse_podcast_episodeset(source: FeedSource) -> List[EpisodeType]:
     """
     Parses a podcast xml file and returns a list of all the podcast
     episodes it describes.
@@ -71,9 +352,8 @@ def parse_podcast_episodeset(soup: BeautifulSoup) -> List[EpisodeType]:
         - link, a url to the actual episode itself.
 
     args:
-    soup - An instance of BeautifulSoup, preferably the output of
-        parse_podcast_xml(), but can be any BeautifulSoup instance
-        set up to parse a podcast's RSS feed.
+    source - the raw feed body (bytes or str), preferably the "body" of
+        fetch_podcast_feed(), or a binary file object.
 
     returns:
     a list of EpisodeType instances (dictionaries), that have the following
@@ -85,24 +365,14 @@ def parse_podcast_episodeset(soup: BeautifulSoup) -> List[EpisodeType]:
         - link
 
     """
-    def __extract_details(item: Tag) -> EpisodeType:
-        dateformatstr: str = "ddd, DD MMM YYYY hh:mm:ss Z"
-        return EpisodeType(
-            title=item.title.text,
-            description=item.description.text,
-            pubDate=arrow.get(item.pubDate.text, dateformatstr).timestamp,
-            guid=item.guid.text,
-            link=item.enclosure["url"]
+    with span("parse"):
+        return sorted(
+            iter_podcast_episodes(source),
+            # NOTE: I realize this might be redundant but I'm doing it
+            #       anyways. I refuse to leave sort order to chance.
+            key=lambda x: -(x["pubDate"])
         )
 
-    items: ResultSet = soup.find_all("item")
-    return sorted(
-        [__extract_details(item) for item in items],
-        # NOTE: I realize this might be redundant but I'm doing it anyways.
-        #       I refuse to leave sort order to chance.
-        key=lambda x: -(x["pubDate"])
-    )
-
 
 def create_podcast_model(podcast: PodcastType) -> PodcastModel:
     """
@@ -126,48 +396,25 @@ def create_podcast_model(podcast: PodcastType) -> PodcastModel:
     )
 
 
-def create_podcast_episode(
-    parent: PodcastModel,
-    episode: EpisodeType
-) -> EpisodeModel:
-    """
-    A thin wrapper around EpisodeModel.create() just so I can annotate
-    the function with a return type of EpisodeModel. .create() will
-    insert a record into the database.
-
-    args:
-    parent - instance of PodcastModel, describing a podcast.
-    episode - instance of EpisodeType, or any dictionary that has the
-        following keys: ["title", "description", "link", "guid"]
-
-    returns:
-    an instance of EpisodeModel, which is a subclass of peewee.Model and
-    allows access to the database.
-    """
-    return EpisodeModel.create(
-        title=episode["title"],
-        description=episode["description"],
-        link=episode["link"],
-        guid=episode["guid"],
-        pubDate=episode["pubDate"],
-        podcast=parent
-    )
-
-
-# TODO: Mothball this. It was the wrong thing to do..
 def insert_to_db(
     podcast: PodcastType,
-    episodes: List[EpisodeType]
+    episodes: Iterable[EpisodeType]
 ) -> PodcastEpisodeBundle:
     """
     A helper function that will insert a PodcastModel and all associated
-    EpisodeModels into the database.
+    EpisodeModels into the database, in one transaction. The episodes go
+    through ingest_episodes(), so they're written in chunks rather than
+    one INSERT (and one fsync) each.
 
     args:
     podcast - instance of PodcastType, representing a podcast,
-    episodes - a list of EpisodeTypes, representing all the episodes for the
-        passed-in podcast.
+    episodes - any iterable of EpisodeTypes, representing all the episodes
+        for the passed-in podcast.
+
+    returns:
+    a (PodcastModel, IngestReport) tuple.
     """
-    parent_model = create_podcast_model(podcast)
-    ep_models = [create_podcast_episode(parent_model, ep) for ep in episodes]
-    return PodcastEpisodeBundle((parent_model, ep_models))
+    with PodcastModel._meta.database.atomic():
+        parent_model = create_podcast_model(podcast)
+        report = ingest_episodes(parent_model, episodes)
+    return PodcastEpisodeBundle((parent_model, report))
@@ -0,0 +1,181 @@
+from typing import Iterable, List, Tuple
+
+from peewee import JOIN, chunked, fn  # type: ignore
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    DownloadModel,
+    PlaylistModel
+)
+from podcast_cli.models.custom_types import PlaylistEntry
+from podcast_cli.controllers.ingest import DEFAULT_CHUNK_SIZE
+
+
+# NOTE: How many of each podcast's newest episodes make the playlist. More
+#       than one, so that a few days without running the update doesn't
+#       lose anything.
+PLAYLIST_PER_PODCAST: int = 3
+
+
+def add_to_playlist(
+    guids: Iterable[str],
+    keep: int = PLAYLIST_PER_PODCAST
+) -> None:
+    """
+    Adds newly ingested episodes to the playlist and drops whatever they
+    pushed out, so each podcast keeps only its newest "keep" episodes on
+    it.
+
+    Meant to be called once per run with every new guid, whatever podcast
+    they belong to: it's one INSERT (per chunk of guids) plus one DELETE
+    that ranks the playlist itself, which is only ever a few rows per
+    podcast. That's what lets podcast_update keep the playlist current
+    without ranking the whole archive.
+
+    args:
+    guids - the guids of the new episodes, i.e IngestReport["new_guids"].
+    keep - int, how many episodes of each podcast stay on the playlist.
+
+    returns:
+    nothing.
+    """
+    guids = list(guids)
+    if not guids:
+        return
+
+    ranked = (
+        PlaylistModel.select(
+            PlaylistModel.id,
+            fn.ROW_NUMBER().over(
+                partition_by=[PlaylistModel.podcast],
+                order_by=[EpisodeModel.pubDate.desc(), EpisodeModel.id.desc()]
+            ).alias("position")
+        )
+        .join(EpisodeModel)
+        .alias("ranked")
+    )
+    with PlaylistModel._meta.database.atomic():
+        # NOTE: chunked for the same reason as ingest_episodes(), a freshly
+        #       added podcast can bring in more guids than older sqlite
+        #       builds allow bound parameters in one statement.
+        for chunk in chunked(guids, DEFAULT_CHUNK_SIZE):
+            (
+                PlaylistModel.insert_from(
+                    EpisodeModel.select(EpisodeModel.id, EpisodeModel.podcast)  # noqa: E501
+                                .where(EpisodeModel.guid.in_(chunk)),
+                    fields=[PlaylistModel.episode, PlaylistModel.podcast]
+                )
+                .on_conflict_ignore()
+                .execute()
+            )
+        overflow = (
+            PlaylistModel.select(ranked.c.id)
+            .from_(ranked)
+            .where(ranked.c.position > keep)
+        )
+        PlaylistModel.delete().where(PlaylistModel.id.in_(overflow)).execute()
+
+
+def rebuild_playlist(keep: int = PLAYLIST_PER_PODCAST) -> int:
+    """
+    Throws the playlist away and builds it again from scratch out of every
+    podcast's newest "keep" episodes.
+
+    returns:
+    int, the number of episodes on the new playlist.
+    """
+    ranked = (
+        EpisodeModel.select(
+            EpisodeModel.id,
+            EpisodeModel.podcast,
+            fn.ROW_NUMBER().over(
+                partition_by=[EpisodeModel.podcast],
+                order_by=[EpisodeModel.pubDate.desc(), EpisodeModel.id.desc()]
+            ).alias("position")
+        )
+        .alias("ranked")
+    )
+    with PlaylistModel._meta.database.atomic():
+        PlaylistModel.delete().execute()
+        (
+            PlaylistModel.insert_from(
+                EpisodeModel.select(ranked.c.id, ranked.c.podcast_id)
+                            .from_(ranked)
+                            .where(ranked.c.position <= keep),
+                fields=[PlaylistModel.episode, PlaylistModel.podcast]
+            )
+            .execute()
+        )
+    return PlaylistModel.select().count()
+
+
+def get_playlist() -> List[PlaylistEntry]:
+    """
+    Reads the playlist, newest episode first.
+
+    returns:
+    a list of PlaylistEntry, where "path" is the downloaded file if the
+    episode has finished downloading and None otherwise.
+    """
+    rows = (
+        PlaylistModel.select(
+            EpisodeModel.id,
+            PodcastModel.title,
+            EpisodeModel.title,
+            EpisodeModel.link,
+            EpisodeModel.pubDate,
+            DownloadModel.path,
+        )
+        .join(EpisodeModel)
+        .join(PodcastModel, on=(PlaylistModel.podcast == PodcastModel.id))
+        .join(
+            DownloadModel,
+            JOIN.LEFT_OUTER,
+            on=(
+                (DownloadModel.episode == EpisodeModel.id)
+                & (DownloadModel.status == "done")
+            )
+        )
+        .order_by(EpisodeModel.pubDate.desc(), EpisodeModel.id.desc())
+        .tuples()
+    )
+    return [
+        PlaylistEntry(
+            pk=pk,
+            podcast=podcast,
+            title=title,
+            link=link,
+            pubDate=pubdate,
+            path=path
+        )
+        for pk, podcast, title, link, pubdate, path in rows
+    ]
+
+
+def render_m3u(
+    entries: Iterable[PlaylistEntry],
+    local: bool = False
+) -> Tuple[str, int]:
+    """
+    Writes the playlist out as an extended M3U playlist.
+
+    args:
+    entries - the output of get_playlist().
+    local - bool, point at the downloaded files instead of the enclosure
+        urls. Episodes that aren't downloaded yet are left out.
+
+    returns:
+    a tuple of (the playlist as a str, how many entries were left out).
+    """
+    lines: List[str] = ["#EXTM3U"]
+    skipped: int = 0
+    for entry in entries:
+        location = entry["path"] if local else entry["link"]
+        if not location:
+            skipped += 1
+            continue
+        name: str = "{} - {}".format(entry["podcast"], entry["title"])
+        lines.append("#EXTINF:-1,{}".format(" ".join(name.split())))
+        lines.append(location)
+    return "\n".join(lines) + "\n", skipped
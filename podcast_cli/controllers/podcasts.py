@@ -1,20 +1,34 @@
 from typing import List
-from peewee import ModelObjectCursorWrapper
+from peewee import ModelSelect  # type: ignore
 from podcast_cli.models.database_models import PodcastModel
-from podcast_cli.models.custom_types import PodcastType
+from podcast_cli.models.custom_types import PodcastType, Podcast
 
 
-def __pc_model_to_type(podcast: PodcastModel) -> PodcastType:
+def select_podcasts() -> ModelSelect:
     """
-    Internal use only, converts a PodcastModel to PodcastType.
+    The query every Podcast record comes from, the columns in Podcast's
+    order. Add .where() and then .tuples().
+    """
+    return PodcastModel.select(
+        PodcastModel.id,
+        PodcastModel.title,
+        PodcastModel.description,
+        PodcastModel.link,
+        PodcastModel.guid,
+    )
+
+
+def podcast_record(podcast: PodcastModel) -> Podcast:
+    """
+    Converts a PodcastModel that's already been loaded to a Podcast.
 
     args:
     podcast - PodcastModel, instance of a PodcastModel.
 
     returns:
-    An instance of PodcastType
+    An instance of Podcast
     """
-    return PodcastType(
+    return Podcast(
         pk=podcast.id,
         title=podcast.title,
         description=podcast.description,
@@ -23,7 +37,7 @@ def __pc_model_to_type(podcast: PodcastModel) -> PodcastType:
     )
 
 
-def add_one_podcast(some_podcast: PodcastType) -> PodcastModel:
+def add_one_podcast(some_podcast: PodcastType) -> Podcast:
     """
     Wrapper over PodcastModel.create().
 
@@ -32,7 +46,7 @@ def add_one_podcast(some_podcast: PodcastType) -> PodcastModel:
         "description", "link", "guid"
 
     returns:
-    An instance of PodcastModel.
+    An instance of Podcast.
     """
     mod: PodcastModel = PodcastModel.create(
         title=some_podcast["title"],
@@ -41,7 +55,7 @@ def add_one_podcast(some_podcast: PodcastType) -> PodcastModel:
         guid=some_podcast["guid"],
     )
 
-    return __pc_model_to_type(mod)
+    return podcast_record(mod)
 
 
 # NOTE: it's worth noting that I could probably hack something
@@ -58,17 +72,11 @@ def add_one_podcast(some_podcast: PodcastType) -> PodcastModel:
 #       interact with.
 #       Thankfully, the use cases aren't complex enough to require
 #       anything more than simple PK search.
-def get_one_podcast(pk: int) -> PodcastType:
-    podcast: PodcastModel = (
-        PodcastModel.get_by_id(pk)
+def get_one_podcast(pk: int) -> Podcast:
+    return Podcast._make(
+        select_podcasts().where(PodcastModel.id == pk).tuples().get()
     )
 
-    return __pc_model_to_type(podcast)
-
-
-def get_all_podcasts() -> List[PodcastType]:
-    q: ModelObjectCursorWrapper = (
-        PodcastModel.select().execute()
-    )
 
-    return [__pc_model_to_type(p) for p in q]
+def get_all_podcasts() -> List[Podcast]:
+    return [Podcast._make(row) for row in select_podcasts().tuples()]
@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional, TypedDict
+
+
+# NOTE: The stages a slow nightly update can be spending its time in.
+#       "dates" happens inside "parse", so the two overlap.
+STAGES: List[str] = ["fetch", "parse", "dates", "insert", "render"]
+COUNTERS: List[str] = [
+    "bytes_fetched",
+    "rows_written",
+    "http_requests",
+    "http_connections",
+    "parse_cache_hits",
+]
+
+
+class StageTiming(TypedDict):
+    calls: int
+    wall: float
+    cpu: float
+
+
+class FeedTiming(TypedDict):
+    # NOTE: kept apart so a stage can't collide with a counter's name.
+    stages: Dict[str, StageTiming]
+    counters: Dict[str, int]
+
+
+class Profiler:
+    """
+    Collects named spans (wall + cpu time) and counters, overall and per
+    feed. Spans can be opened from any thread, refresh_feeds() workers
+    included; cpu time is per thread so it adds up correctly.
+
+    Disabled by default, in which case span() hands back a shared no-op
+    and costs next to nothing.
+    """
+    def __init__(self):
+        self.enabled: bool = False
+        self._lock: threading.Lock = threading.Lock()
+        self._local: threading.local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages: Dict[str, StageTiming] = {}
+            self.feeds: Dict[str, FeedTiming] = {}
+            self.counters: Dict[str, int] = {}
+            self.started_wall: float = time.perf_counter()
+            self.started_cpu: float = time.process_time()
+
+    def enable(self) -> None:
+        self.reset()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def current_feed(self) -> Optional[str]:
+        return getattr(self._local, "feed", None)
+
+    def __feed(self, feed: str) -> FeedTiming:
+        # NOTE: callers hold self._lock.
+        return self.feeds.setdefault(
+            feed,
+            FeedTiming(stages={}, counters={})
+        )
+
+    def record(self, stage: str, wall: float, cpu: float) -> None:
+        feed: Optional[str] = self.current_feed()
+        with self._lock:
+            totals: List[Dict[str, StageTiming]] = [self.stages]
+            if feed is not None:
+                totals.append(self.__feed(feed)["stages"])
+            for stages in totals:
+                timing: StageTiming = stages.setdefault(
+                    stage,
+                    StageTiming(calls=0, wall=0.0, cpu=0.0)
+                )
+                timing["calls"] += 1
+                timing["wall"] += wall
+                timing["cpu"] += cpu
+
+    def count(self, counter: str, amount: int) -> None:
+        if not self.enabled:
+            return
+        feed: Optional[str] = self.current_feed()
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+            if feed is not None:
+                per_feed: Dict[str, int] = self.__feed(feed)["counters"]
+                per_feed[counter] = per_feed.get(counter, 0) + amount
+
+    def report(self) -> Dict:
+        """
+        returns:
+        a dict with the keys ["total", "stages", "counters", "feeds"], ready
+        for json.dumps(). Each feed has its own "stages" and "counters",
+        shaped like the overall ones.
+        """
+        with self._lock:
+            return {
+                "total": {
+                    "wall": time.perf_counter() - self.started_wall,
+                    "cpu": time.process_time() - self.started_cpu,
+                },
+                "stages": {k: dict(v) for k, v in self.stages.items()},
+                "counters": dict(self.counters),
+                "feeds": {
+                    k: {
+                        "stages": {s: dict(t) for s, t in v["stages"].items()},  # noqa: E501
+                        "counters": dict(v["counters"]),
+                    }
+                    for k, v in self.feeds.items()
+                },
+            }
+
+
+class _Span:
+    def __init__(self, profiler: Profiler, stage: str):
+        self.profiler: Profiler = profiler
+        self.stage: str = stage
+
+    def __enter__(self):
+        self.wall: float = time.perf_counter()
+        self.cpu: float = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(
+            self.stage,
+            time.perf_counter() - self.wall,
+            time.thread_time() - self.cpu
+        )
+        return False
+
+
+class _FeedContext:
+    def __init__(self, profiler: Profiler, feed: str):
+        self.profiler: Profiler = profiler
+        self.feed: str = feed
+
+    def __enter__(self):
+        self.previous: Optional[str] = self.profiler.current_feed()
+        self.profiler._local.feed = self.feed
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._local.feed = self.previous
+        return False
+
+
+class _NoOp:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+PROFILER: Profiler = Profiler()
+NO_OP: _NoOp = _NoOp()
+
+
+def span(stage: str):
+    """
+    Times the enclosed block as "stage", i.e
+
+        with span("fetch"):
+            http_get(url)
+
+    Does nothing unless profiling was switched on with --profile.
+    """
+    if not PROFILER.enabled:
+        return NO_OP
+    return _Span(PROFILER, stage)
+
+
+def feed_context(feed: str):
+    """
+    Attributes every span and counter in the enclosed block, on this
+    thread, to "feed" as well as to the overall totals.
+    """
+    if not PROFILER.enabled:
+        return NO_OP
+    return _FeedContext(PROFILER, feed)
+
+
+def count(counter: str, amount: int) -> None:
+    """
+    Adds to a counter, i.e count("bytes_fetched", len(body)).
+    """
+    PROFILER.count(counter, amount)
+
+
+def __stage_rows(stages: Dict, label: Dict) -> List[Dict]:
+    rows: List[Dict] = []
+    for stage in STAGES + sorted(set(stages) - set(STAGES)):
+        if stage not in stages:
+            continue
+        row: Dict = dict(label)
+        row["stage"] = stage
+        row["calls"] = stages[stage]["calls"]
+        row["wall (s)"] = round(stages[stage]["wall"], 4)
+        row["cpu (s)"] = round(stages[stage]["cpu"], 4)
+        rows.append(row)
+    return rows
+
+
+def render_report(report: Dict, fmt: str = "table") -> str:
+    """
+    Formats the output of Profiler.report() as either JSON or a few
+    tables: one row per stage, the counters, then one row per feed and
+    stage, and each feed's counters.
+    """
+    if fmt == "json":
+        return json.dumps(report, indent=2)
+
+    from tabulate import tabulate
+
+    stage_rows: List[Dict] = __stage_rows(report["stages"], {})
+    stage_rows.append({
+        "stage": "total",
+        "calls": "",
+        "wall (s)": round(report["total"]["wall"], 4),
+        "cpu (s)": round(report["total"]["cpu"], 4),
+    })
+    output: List[str] = [tabulate(stage_rows, headers="keys", tablefmt="grid")]
+
+    if report["counters"]:
+        output.append(tabulate(
+            [report["counters"]],
+            headers="keys",
+            tablefmt="grid"
+        ))
+
+    feeds: List = sorted(report["feeds"].items())
+    feed_rows: List[Dict] = [
+        row
+        for feed, values in feeds
+        for row in __stage_rows(values["stages"], {"feed": feed})
+    ]
+    if feed_rows:
+        output.append(tabulate(feed_rows, headers="keys", tablefmt="grid"))
+
+    counter_rows: List[Dict] = []
+    for feed, values in feeds:
+        if not values["counters"]:
+            continue
+        row: Dict = {"feed": feed}
+        row.update(values["counters"])
+        counter_rows.append(row)
+    if counter_rows:
+        output.append(tabulate(counter_rows, headers="keys", tablefmt="grid"))
+
+    return "\n".join(output)
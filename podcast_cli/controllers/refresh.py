@@ -0,0 +1,136 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from itertools import zip_longest
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Protocol,
+    TypeVar
+)
+from urllib.parse import urlparse
+
+from podcast_cli.models.custom_types import FeedRefreshResult
+from podcast_cli.models.database_models import PodcastModel
+
+
+DEFAULT_JOBS: int = 8
+# NOTE: Most of the feeds I follow live on a handful of hosts (megaphone,
+#       libsyn, omny, npr). Hammering one of them with every worker at once
+#       is rude and tends to get throttled, so each host gets its own cap
+#       on top of the global one.
+DEFAULT_PER_HOST: int = 2
+
+
+class HostLimiter:
+    """
+    Hands out one BoundedSemaphore per host so that no single host sees more
+    than per_host requests in flight at any given time.
+    """
+    def __init__(self, per_host: int):
+        self.per_host: int = max(1, per_host)
+        self._lock: threading.Lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def get(self, url: str) -> threading.BoundedSemaphore:
+        host: str = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(
+                    self.per_host
+                )
+            return self._semaphores[host]
+
+
+class HasLink(Protocol):
+    link: str
+
+
+# NOTE: PodcastModel (feed url) or EpisodeModel (media url), anything with
+#       a .link.
+Linked = TypeVar("Linked", bound=HasLink)
+
+
+def interleave_by_host(podcasts: Iterable[Linked]) -> List[Linked]:
+    """
+    Reorders podcasts round-robin by host, so that workers aren't all stuck
+    waiting on the same host's semaphore while other hosts sit idle. Works
+    the same for episodes, by the host of their media url.
+
+    args:
+    podcasts - any iterable of PodcastModel or EpisodeModel instances.
+
+    returns:
+    a list of the same podcasts, interleaved by the host of their link.
+    """
+    buckets: Dict[str, List[Linked]] = {}
+    for podcast in podcasts:
+        host: str = urlparse(podcast.link).netloc.lower()
+        buckets.setdefault(host, []).append(podcast)
+
+    return [
+        podcast
+        for group in zip_longest(*buckets.values())
+        for podcast in group
+        if podcast is not None
+    ]
+
+
+def refresh_feeds(
+    podcasts: Iterable[PodcastModel],
+    fetch: Callable[[PodcastModel], Any],
+    jobs: int = DEFAULT_JOBS,
+    per_host: int = DEFAULT_PER_HOST
+) -> Iterator[FeedRefreshResult]:
+    """
+    Runs fetch() over every podcast using a thread pool, and yields the
+    results as each feed finishes rather than in the order they went in.
+
+    fetch() runs on worker threads, so it should stick to network / parsing
+    work and leave the database alone; peewee's sqlite connection belongs to
+    the thread that called this function.
+
+    args:
+    podcasts - any iterable of PodcastModel instances.
+    fetch - callable that takes a PodcastModel and returns whatever the
+        caller needs, i.e get_latest_episode_remote.
+    jobs - int, maximum number of feeds being fetched at the same time.
+    per_host - int, maximum number of feeds being fetched from any one host
+        at the same time.
+
+    returns:
+    an iterator of FeedRefreshResult, one per podcast. If fetch() raised,
+    "error" holds the exception and "result" is None.
+    """
+    limiter: HostLimiter = HostLimiter(per_host)
+
+    def __work(podcast: PodcastModel) -> Any:
+        with limiter.get(podcast.link):
+            return fetch(podcast)
+
+    ordered: List[PodcastModel] = interleave_by_host(podcasts)
+    if not ordered:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures: Dict[Future, PodcastModel] = {
+            pool.submit(__work, podcast): podcast
+            for podcast in ordered
+        }
+        for future in as_completed(futures):
+            podcast: PodcastModel = futures[future]
+            try:
+                yield FeedRefreshResult(
+                    podcast=podcast,
+                    result=future.result(),
+                    error=None
+                )
+            except Exception as e:
+                yield FeedRefreshResult(
+                    podcast=podcast,
+                    result=None,
+                    error=e
+                )
@@ -0,0 +1,205 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from peewee import chunked, fn  # type: ignore
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    ScheduleModel
+)
+from podcast_cli.controllers.ingest import DEFAULT_CHUNK_SIZE
+
+
+# NOTE: A feed is checked a few times per release, i.e a daily show every
+#       6 hours, but never more often than the hourly cron runs and never
+#       less than once a day, so a show that breaks its usual rhythm is
+#       noticed within a day.
+MIN_INTERVAL: int = 60 * 60
+MAX_INTERVAL: int = 24 * 60 * 60
+CHECKS_PER_RELEASE: int = 4
+# NOTE: How many of the newest episodes the cadence is learned from. Old
+#       enough history stops saying much about how a show publishes now.
+CADENCE_HISTORY: int = 10
+# NOTE: cron doesn't start on the exact second, so a feed that comes due
+#       a few minutes after this run would otherwise wait a whole extra
+#       interval for the next one.
+DUE_SLACK: int = 5 * 60
+
+
+def as_timestamp(value: Union[int, datetime]) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def estimate_cadence(pubdates: List[int]) -> Optional[int]:
+    """
+    Works out how often a podcast puts out an episode, as the median gap
+    between its releases. The median rather than the mean, so a bonus
+    episode or a summer break doesn't throw it off.
+
+    args:
+    pubdates - list of int, unix times of its newest episodes, newest
+        first.
+
+    returns:
+    int, seconds between releases, or None if there isn't enough history
+    to tell.
+    """
+    gaps: List[int] = sorted(
+        newer - older
+        for newer, older in zip(pubdates, pubdates[1:])
+        if newer > older
+    )
+    if len(gaps) < 2:
+        return None
+    return gaps[len(gaps) // 2]
+
+
+def plan_next_check(pubdates: List[int], now: int) -> Tuple[int, int]:
+    """
+    Decides when a feed that was just checked should be checked again.
+
+    Normally that's a fraction of the podcast's cadence from now (see
+    CHECKS_PER_RELEASE), but if the next episode is expected sooner than
+    that, the check is moved up to when it's due out.
+
+    args:
+    pubdates - list of int, unix times of its newest episodes, newest
+        first.
+    now - int, unix time of the check.
+
+    returns:
+    a tuple of (interval, next check), both in seconds.
+    """
+    cadence: Optional[int] = estimate_cadence(pubdates)
+    if cadence is None:
+        return MIN_INTERVAL, now + MIN_INTERVAL
+
+    interval: int = min(max(cadence // CHECKS_PER_RELEASE, MIN_INTERVAL), MAX_INTERVAL)  # noqa: E501
+    next_check: int = now + interval
+    expected: int = pubdates[0] + cadence
+    if now < expected < next_check:
+        next_check = max(expected, now + MIN_INTERVAL)
+    return interval, next_check
+
+
+def load_pubdate_history(
+    podcasts: Iterable[PodcastModel],
+    history: int = CADENCE_HISTORY
+) -> Dict[int, List[int]]:
+    """
+    Loads the release times of each podcast's newest "history" episodes,
+    one query per DEFAULT_CHUNK_SIZE podcasts, with the same ROW_NUMBER()
+    ranking get_latest_per_podcast() uses.
+
+    returns:
+    a dict mapping podcast id to a list of unix times, newest first.
+    Podcasts without episodes are missing.
+    """
+    pubdates: Dict[int, List[int]] = {}
+    for chunk in chunked([p.id for p in podcasts], DEFAULT_CHUNK_SIZE):
+        ranked = (
+            EpisodeModel.select(
+                EpisodeModel.podcast,
+                EpisodeModel.pubDate,
+                fn.ROW_NUMBER().over(
+                    partition_by=[EpisodeModel.podcast],
+                    order_by=[EpisodeModel.pubDate.desc()]
+                ).alias("position")
+            )
+            .where(EpisodeModel.podcast.in_(chunk))
+            .alias("ranked")
+        )
+        rows = (
+            EpisodeModel.select(ranked.c.podcast_id, ranked.c.pubDate)
+            .from_(ranked)
+            .where(ranked.c.position <= history)
+            .order_by(ranked.c.podcast_id, ranked.c.position)
+            .tuples()
+        )
+        for podcast, pubdate in rows:
+            pubdates.setdefault(podcast, []).append(as_timestamp(pubdate))
+    return pubdates
+
+
+def due_podcasts(
+    podcasts: Iterable[PodcastModel],
+    now: int,
+    slack: int = DUE_SLACK
+) -> Tuple[List[PodcastModel], List[PodcastModel]]:
+    """
+    Splits podcasts into the ones whose feeds are due a check and the ones
+    that can be left alone this run.
+
+    args:
+    podcasts - any iterable of PodcastModel instances.
+    now - int, unix time of this run.
+    slack - int, seconds early a check may run, see DUE_SLACK.
+
+    returns:
+    a tuple of (due, not due) lists of PodcastModel. A podcast that has
+    never been scheduled is always due.
+    """
+    podcasts = list(podcasts)
+    next_checks: Dict[int, int] = {}
+    for chunk in chunked([p.id for p in podcasts], DEFAULT_CHUNK_SIZE):
+        rows = (
+            ScheduleModel.select(ScheduleModel.podcast, ScheduleModel.next_check)  # noqa: E501
+            .where(ScheduleModel.podcast.in_(chunk))
+            .tuples()
+        )
+        next_checks.update(rows)
+
+    due: List[PodcastModel] = []
+    waiting: List[PodcastModel] = []
+    for podcast in podcasts:
+        if next_checks.get(podcast.id, now) <= now + slack:
+            due.append(podcast)
+        else:
+            waiting.append(podcast)
+    return due, waiting
+
+
+def reschedule(podcasts: Iterable[PodcastModel], now: int) -> None:
+    """
+    Records when each of the given podcasts, just checked, should be
+    checked next. Meant to run after the new episodes are stored, so the
+    cadence takes them into account.
+
+    args:
+    podcasts - any iterable of PodcastModel instances.
+    now - int, unix time of the check.
+
+    returns:
+    nothing.
+    """
+    podcasts = list(podcasts)
+    if not podcasts:
+        return
+
+    history: Dict[int, List[int]] = load_pubdate_history(podcasts)
+    rows: List[dict] = []
+    for podcast in podcasts:
+        interval, next_check = plan_next_check(history.get(podcast.id, []), now)  # noqa: E501
+        rows.append({
+            "podcast": podcast.id,
+            "interval": interval,
+            "last_checked": now,
+            "next_check": next_check,
+        })
+
+    for chunk in chunked(rows, DEFAULT_CHUNK_SIZE):
+        (
+            ScheduleModel.insert_many(chunk)
+            .on_conflict(
+                conflict_target=[ScheduleModel.podcast],
+                preserve=[
+                    ScheduleModel.interval,
+                    ScheduleModel.last_checked,
+                    ScheduleModel.next_check,
+                ]
+            )
+            .execute()
+        )
@@ -0,0 +1,115 @@
+import re
+from typing import List, Match, Optional, Pattern, Sequence
+
+from peewee import SQL, fn  # type: ignore
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    EpisodeSearchModel
+)
+from podcast_cli.models.custom_types import SearchResult
+
+
+DEFAULT_SEARCH_LIMIT: int = 20
+SNIPPET_TOKENS: int = 16
+
+TERM: Pattern = re.compile(r"\w+\*?", re.UNICODE)
+# NOTE: Descriptions are mostly HTML. The index doesn't mind, but tags
+#       (and the halves of tags a snippet cuts through) make for
+#       unreadable results.
+TAGS: Pattern = re.compile(r"<[^>]*>|<[^>]*$|^[^<]*?>")
+
+
+def fts_query(text: str) -> str:
+    """
+    Turns whatever was typed into an FTS5 query that can't be a syntax
+    error: every word has to appear, in any order, and a trailing * makes
+    a word a prefix, i.e "planet mon*" -> '"planet" "mon"*'
+
+    raises ValueError if there are no words in text.
+    """
+    terms: List[str] = [
+        '"{}"{}'.format(term.rstrip("*"), "*" if term.endswith("*") else "")
+        for term in TERM.findall(text)
+    ]
+    if not terms:
+        raise ValueError("Nothing to search for in {!r}".format(text))
+    return " ".join(terms)
+
+
+def clean_snippet(
+    snippet: Optional[str],
+    marks: Sequence[str] = ()
+) -> str:
+    """
+    Strips the HTML out of a snippet and collapses its whitespace.
+
+    args:
+    snippet - str, a snippet as returned by FTS5, or None.
+    marks - sequence of str, the highlight marks put into the snippet.
+        Anything that merely looks like a tag but has one of these inside
+        stays, otherwise a snippet opening with "a > b" would lose the
+        mark that ends a highlight along with "a " and run it on into
+        whatever gets printed next.
+
+    returns:
+    the cleaned up snippet.
+    """
+    def strip(match: Match) -> str:
+        if any(mark and mark in match.group() for mark in marks):
+            return match.group()
+        return " "
+
+    return " ".join(TAGS.sub(strip, snippet or "").split())
+
+
+def search_episodes(
+    text: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    podcast: Optional[int] = None,
+    start_mark: str = "[",
+    end_mark: str = "]"
+) -> List[SearchResult]:
+    """
+    Full text search over every episode's title and description, best
+    match first (bm25, with title matches weighted up, see migrations.py).
+
+    args:
+    text - str, the words to look for. See fts_query().
+    limit - int, the most results to return.
+    podcast - int, pk of a podcast to search within, or None for all.
+    start_mark, end_mark - str, what goes around matched words in the
+        highlighted title and snippet.
+
+    returns:
+    a list of SearchResult.
+    """
+    search = EpisodeSearchModel._meta.entity
+    query = (
+        EpisodeSearchModel.select(
+            EpisodeModel.id,
+            PodcastModel.title,
+            fn.highlight(search, 0, start_mark, end_mark),
+            fn.snippet(search, 1, start_mark, end_mark, "...", SNIPPET_TOKENS),  # noqa: E501
+            EpisodeModel.pubDate,
+        )
+        .join(EpisodeModel, on=(EpisodeSearchModel.rowid == EpisodeModel.id))
+        .join(PodcastModel, on=(EpisodeModel.podcast == PodcastModel.id))
+        .where(EpisodeSearchModel.match(fts_query(text)))
+        .order_by(SQL("rank"))
+        .limit(limit)
+    )
+    if podcast is not None:
+        query = query.where(PodcastModel.id == podcast)
+
+    return [
+        SearchResult(
+            pk=pk,
+            podcast=podcast_title,
+            title=title,
+            snippet=clean_snippet(snippet, (start_mark, end_mark)),
+            pubDate=pubdate
+        )
+        for pk, podcast_title, title, snippet, pubdate in query.tuples()
+    ]
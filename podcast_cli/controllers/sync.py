@@ -0,0 +1,92 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+from peewee import chunked  # type: ignore
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import EpisodeType
+from podcast_cli.controllers.parser import FeedSource, iter_podcast_episodes
+from podcast_cli.controllers.ingest import DEFAULT_CHUNK_SIZE
+from podcast_cli.controllers.profiling import span
+
+
+# NOTE: Most feeds list newest first, so once we've read this many episodes
+#       in a row that we already have, we've caught up and can stop reading.
+#       It's a run rather than the first hit so that a feed which shuffles
+#       an old episode up to the top doesn't cut the sync short. Feeds that
+#       don't list newest first (some go oldest first) are read in full,
+#       see find_new_episodes().
+DEFAULT_KNOWN_RUN: int = 10
+
+
+def load_known_guids(podcasts: Iterable[PodcastModel]) -> Dict[int, Set[str]]:
+    """
+    Loads the guids of every stored episode for the given podcasts, one
+    query per DEFAULT_CHUNK_SIZE podcasts that only touches the guid /
+    podcast columns.
+
+    args:
+    podcasts - any iterable of PodcastModel instances.
+
+    returns:
+    a dict mapping podcast id to a set of guids. Podcasts with no episodes
+    map to an empty set.
+    """
+    known: Dict[int, Set[str]] = {p.id: set() for p in podcasts}
+    for chunk in chunked(list(known.keys()), DEFAULT_CHUNK_SIZE):
+        rows = (
+            EpisodeModel.select(EpisodeModel.podcast, EpisodeModel.guid)
+            .where(EpisodeModel.podcast.in_(chunk))
+            .tuples()
+        )
+        for podcast_id, guid in rows:
+            known[podcast_id].add(guid)
+
+    return known
+
+
+def find_new_episodes(
+    source: FeedSource,
+    known_guids: Set[str],
+    known_run: Optional[int] = DEFAULT_KNOWN_RUN
+) -> List[EpisodeType]:
+    """
+    Streams a feed and returns every episode whose guid isn't in
+    known_guids, i.e the set difference between the feed and the database.
+
+    Each item costs one set lookup, and reading stops after known_run
+    consecutive known episodes, so a feed that's mostly caught up only has
+    its first few items parsed. That's only safe while the feed has been
+    going newest first: as soon as an item is newer than the one before
+    it, the feed's order can't be trusted and it's read to the end, so an
+    oldest-first feed never loses the new episodes at its bottom.
+
+    args:
+    source - the raw feed body, or a binary file object.
+    known_guids - set of guids already stored for this podcast, see
+        load_known_guids().
+    known_run - int, how many known episodes in a row mean we've caught up.
+        None or 0 reads the whole feed.
+
+    returns:
+    a list of EpisodeType instances, in feed order.
+    """
+    new: List[EpisodeType] = []
+    run: int = 0
+    newest_first: bool = True
+    previous: Optional[int] = None
+    with span("parse"):
+        for episode in iter_podcast_episodes(source):
+            if previous is not None and episode["pubDate"] > previous:
+                newest_first = False
+            previous = episode["pubDate"]
+
+            if episode["guid"] not in known_guids:
+                new.append(episode)
+                run = 0
+                continue
+
+            run += 1
+            if known_run and newest_first and run >= known_run:
+                break
+
+    return new
@@ -1,17 +1,54 @@
-from typing import TypedDict, List, NewType, Tuple
+from datetime import datetime
+from typing import (
+    Any,
+    Optional,
+    TypedDict,
+    List,
+    NamedTuple,
+    NewType,
+    Tuple,
+    Union
+)
 from podcast_cli.models.database_models import PodcastModel, EpisodeModel
 
-import arrow  # type: ignore
-
 
 class EpisodeType(TypedDict, total=False):
     pk: str
     title: str
     description: str
-    pubDate: arrow.Arrow
+    # NOTE: a unix timestamp, or a formatted string once it's been
+    #       prepped for display.
+    pubDate: Union[int, str]
     guid: str
     link: str
     podcast: str
+    # NOTE: keyset pagination position, see controllers.episodes.iter_episodes
+    cursor: str
+
+
+# NOTE: Episode and Podcast are the read side's records. They're built
+#       straight from .tuples() cursors, with the podcast title joined in,
+#       so reading one costs a tuple and no per-row query. NamedTuples
+#       have no __dict__ (__slots__ = ()), and tabulate() takes a list of
+#       them with headers="keys" as is.
+class Episode(NamedTuple):
+    pk: int
+    title: str
+    description: Optional[str]
+    link: str
+    guid: str
+    # NOTE: the naive local datetime EpisodeModel.pubDate hands back,
+    #       see controllers.episodes.format_pubdate
+    pubDate: datetime
+    podcast: str
+
+
+class Podcast(NamedTuple):
+    pk: int
+    title: str
+    description: Optional[str]
+    link: str
+    guid: Optional[str]
 
 
 # trainyard, sorting factory
@@ -26,12 +63,99 @@ class PodcastType(TypedDict, total=False):
     # podcast: str
 
 
+class IngestReport(TypedDict):
+    inserted: int
+    updated: int
+    skipped: int
+    new_guids: List[str]
+
+
 PodcastEpisodeBundle = NewType(
     "PodcastEpisodeBundle",
-    Tuple[PodcastModel, List[EpisodeModel]]
+    Tuple[PodcastModel, IngestReport]
 )
 
 
 class PodcastEpisodeSet(TypedDict):
     pk: PodcastModel
     episodes: List[EpisodeType]
+
+
+class FeedRefreshResult(TypedDict):
+    podcast: PodcastModel
+    result: Any
+    error: Optional[Exception]
+
+
+class FeedCacheType(TypedDict, total=False):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+
+
+class FeedResponse(TypedDict):
+    url: str
+    not_modified: bool
+    body: Optional[bytes]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+
+
+class RemoteCheck(TypedDict):
+    feed: FeedResponse
+    episodes: List[EpisodeType]
+
+
+class DownloadJob(TypedDict):
+    episode: EpisodeModel
+    url: str
+    path: str
+
+
+class DownloadResult(TypedDict):
+    path: str
+    size: int
+    resumed: bool
+
+
+class DownloadOutcome(TypedDict):
+    job: DownloadJob
+    result: Optional[DownloadResult]
+    error: Optional[Exception]
+
+
+class PlaylistEntry(TypedDict):
+    pk: int
+    podcast: str
+    title: str
+    link: str
+    pubDate: datetime
+    path: Optional[str]
+
+
+class SearchResult(TypedDict):
+    pk: int
+    podcast: str
+    title: str
+    snippet: str
+    pubDate: datetime
+
+
+class OpmlFeed(TypedDict):
+    title: Optional[str]
+    url: str
+
+
+class ParsedFeed(TypedDict):
+    feed: FeedResponse
+    podcast: PodcastType
+    episodes: List[EpisodeType]
+
+
+class OpmlImportResult(TypedDict):
+    url: str
+    title: Optional[str]
+    status: str
+    episodes: int
+    error: Optional[str]
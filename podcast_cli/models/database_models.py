@@ -3,11 +3,17 @@ from peewee import SqliteDatabase       # type: ignore
 from peewee import CharField            # type: ignore
 from peewee import TimestampField       # type: ignore
 from peewee import ForeignKeyField      # type: ignore
+from peewee import IntegerField         # type: ignore
+from playhouse.sqlite_ext import FTS5Model, SearchField  # type: ignore
 # ^^This is the only way to do it while
 # respecting flake8's limits on line length.
 
 
-db = SqliteDatabase('datastore.db')
+# NOTE: Deferred, the path and pragmas are filled in by
+#       storage.configure_database() once the cli knows where the
+#       database lives (--db, PODCAST_CLI_DB, config.ini or the default
+#       of ~/.podcasts/datastore.db).
+db = SqliteDatabase(None)
 
 
 class PodcastModel(Model):
@@ -35,3 +41,89 @@ class EpisodeModel(Model):
 
     class Meta:
         database = db
+
+
+class FeedCacheModel(Model):
+    # NOTE: Kept in its own table rather than as extra columns on
+    #       PodcastModel, so that create_tables() picks it up on databases
+    #       that already exist.
+    podcast = ForeignKeyField(
+        PodcastModel,
+        unique=True,
+        on_delete="CASCADE"
+    )
+    etag = CharField(null=True)
+    last_modified = CharField(null=True)
+    content_hash = CharField(null=True)
+
+    class Meta:
+        database = db
+
+
+class DownloadModel(Model):
+    # NOTE: One row per episode that's ever been queued for download.
+    #       status is one of "downloading", "done" or "failed". A failed
+    #       download leaves its .part file behind, size_on_disk is how much
+    #       of it there is, and the next run picks up from there.
+    episode = ForeignKeyField(
+        EpisodeModel,
+        unique=True,
+        on_delete="CASCADE"
+    )
+    status = CharField()
+    path = CharField()
+    size_on_disk = IntegerField(default=0)
+    total_size = IntegerField(null=True)
+    error = CharField(null=True)
+
+    class Meta:
+        database = db
+
+
+class PlaylistModel(Model):
+    # NOTE: The daily playlist, kept up to date by podcast_update as new
+    #       episodes come in (see controllers/playlist.py) so exporting it
+    #       never has to rank the whole archive.
+    episode = ForeignKeyField(
+        EpisodeModel,
+        unique=True,
+        on_delete="CASCADE"
+    )
+    podcast = ForeignKeyField(
+        PodcastModel,
+        on_delete="CASCADE"
+    )
+
+    class Meta:
+        database = db
+
+
+class ScheduleModel(Model):
+    # NOTE: When podcast_update should next bother fetching each feed, see
+    #       controllers/schedule.py. Times are unix seconds. A podcast
+    #       without a row is always due.
+    podcast = ForeignKeyField(
+        PodcastModel,
+        unique=True,
+        on_delete="CASCADE"
+    )
+    interval = IntegerField()
+    last_checked = IntegerField()
+    next_check = IntegerField()
+
+    class Meta:
+        database = db
+
+
+class EpisodeSearchModel(FTS5Model):
+    # NOTE: An FTS5 index over episode titles and descriptions. It's an
+    #       "external content" table, meaning the text itself stays in
+    #       episodemodel and only the index lives here. Triggers on
+    #       episodemodel keep the two in step (see migrations.py), so
+    #       nothing in the python code has to remember to.
+    title = SearchField()
+    description = SearchField()
+
+    class Meta:
+        database = db
+        table_name = "episodesearch"
@@ -0,0 +1,149 @@
+from typing import Callable, List, Tuple
+
+from peewee import Database  # type: ignore
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    FeedCacheModel,
+    DownloadModel,
+    PlaylistModel,
+    ScheduleModel,
+)
+
+
+# NOTE: The schema version lives in sqlite's own PRAGMA user_version, so
+#       checking whether there's anything to do costs one pragma read and
+#       no extra table.
+#
+#       Migrations only ever get appended to MIGRATIONS, never edited or
+#       reordered. Keep in mind that a brand new database runs every one of
+#       them in order, and the baseline's create_tables() already uses the
+#       current model definitions, so anything that adds a column to an
+#       existing table has to check the column isn't already there
+#       (database.get_columns()) before adding it.
+
+
+def __baseline(database: Database) -> None:
+    # NOTE: Databases from before migrations existed already have these
+    #       tables. create_tables() is safe=True by default, so it just
+    #       skips them.
+    models = [PodcastModel, EpisodeModel, FeedCacheModel]
+    with database.bind_ctx(models):
+        database.create_tables(models)
+
+
+def __episode_podcast_pubdate_index(database: Database) -> None:
+    # NOTE: get_latest_number, the update check and podcast_list_episodes
+    #       all filter by podcast and order by pubDate. peewee can't spell
+    #       out DESC in Meta.indexes, hence the raw SQL.
+    database.execute_sql(
+        'CREATE INDEX IF NOT EXISTS "episodemodel_podcast_id_pubDate" '
+        'ON "episodemodel" ("podcast_id", "pubDate" DESC)'
+    )
+
+
+def __download_table(database: Database) -> None:
+    with database.bind_ctx([DownloadModel]):
+        database.create_tables([DownloadModel])
+
+
+def __playlist_table(database: Database) -> None:
+    with database.bind_ctx([PlaylistModel]):
+        database.create_tables([PlaylistModel])
+    # NOTE: Seeds the playlist with each podcast's newest episodes, same as
+    #       controllers.playlist.rebuild_playlist() at the time of writing.
+    #       Spelled out here so that later changes to the controller don't
+    #       change what this migration does.
+    database.execute_sql(
+        'INSERT OR IGNORE INTO "playlistmodel" ("episode_id", "podcast_id") '
+        'SELECT "id", "podcast_id" FROM ('
+        '  SELECT "id", "podcast_id", ROW_NUMBER() OVER ('
+        '    PARTITION BY "podcast_id" ORDER BY "pubDate" DESC, "id" DESC'
+        '  ) AS "position" FROM "episodemodel"'
+        ') WHERE "position" <= 3'
+    )
+
+
+def __episode_search_index(database: Database) -> None:
+    # NOTE: Titles count ten times as much as descriptions when ranking,
+    #       which is stored in the table's "rank" setting so that
+    #       ORDER BY rank picks it up.
+    statements: List[str] = [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "episodesearch" USING fts5('
+        '"title", "description", content="episodemodel", content_rowid="id", '
+        'tokenize="porter unicode61 remove_diacritics 2")',
+        'CREATE TRIGGER IF NOT EXISTS "episodesearch_insert" '
+        'AFTER INSERT ON "episodemodel" BEGIN '
+        'INSERT INTO "episodesearch" ("rowid", "title", "description") '
+        'VALUES (new."id", new."title", new."description"); END',
+        'CREATE TRIGGER IF NOT EXISTS "episodesearch_delete" '
+        'AFTER DELETE ON "episodemodel" BEGIN '
+        'INSERT INTO "episodesearch" ("episodesearch", "rowid", "title", "description") '  # noqa: E501
+        'VALUES (\'delete\', old."id", old."title", old."description"); END',
+        'CREATE TRIGGER IF NOT EXISTS "episodesearch_update" '
+        'AFTER UPDATE OF "title", "description" ON "episodemodel" BEGIN '
+        'INSERT INTO "episodesearch" ("episodesearch", "rowid", "title", "description") '  # noqa: E501
+        'VALUES (\'delete\', old."id", old."title", old."description"); '
+        'INSERT INTO "episodesearch" ("rowid", "title", "description") '
+        'VALUES (new."id", new."title", new."description"); END',
+        'INSERT INTO "episodesearch" ("episodesearch", "rank") '
+        'VALUES (\'rank\', \'bm25(10.0, 1.0)\')',
+        'INSERT INTO "episodesearch" ("episodesearch") VALUES (\'rebuild\')',
+    ]
+    for statement in statements:
+        database.execute_sql(statement)
+
+
+def __schedule_table(database: Database) -> None:
+    with database.bind_ctx([ScheduleModel]):
+        database.create_tables([ScheduleModel])
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Database], None]]] = [
+    (1, "baseline tables", __baseline),
+    (2, "index episodes on (podcast, pubDate)", __episode_podcast_pubdate_index),  # noqa: E501
+    (3, "per-episode download state", __download_table),
+    (4, "daily playlist", __playlist_table),
+    (5, "full text search over episodes", __episode_search_index),
+    (6, "per-feed polling schedule", __schedule_table),
+]
+
+SCHEMA_VERSION: int = MIGRATIONS[-1][0]
+
+
+def get_schema_version(database: Database) -> int:
+    """
+    Returns the schema version recorded in the database, 0 for a database
+    that has never been migrated (or doesn't exist yet).
+    """
+    return database.execute_sql("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(database: Database) -> List[int]:
+    """
+    Brings the database up to SCHEMA_VERSION, running every migration it
+    hasn't seen yet, in order, inside one transaction. If the database is
+    already current this is a single pragma read.
+
+    args:
+    database - the peewee Database to migrate, i.e database_models.db
+
+    returns:
+    a list of the migration versions that were applied, empty if there was
+    nothing to do.
+    """
+    current: int = get_schema_version(database)
+    if current >= SCHEMA_VERSION:
+        return []
+
+    applied: List[int] = []
+    with database.atomic():
+        for version, _, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step(database)
+            database.execute_sql("PRAGMA user_version = {}".format(version))
+            applied.append(version)
+
+    return applied
@@ -0,0 +1,133 @@
+import os
+from configparser import ConfigParser
+from typing import Dict, Optional, TypedDict
+
+from peewee import SqliteDatabase  # type: ignore
+
+
+class StorageConfig(TypedDict):
+    path: str
+    journal_mode: str
+    synchronous: str
+    cache_size: int
+    mmap_size: int
+    busy_timeout: int
+
+
+MEMORY_PATH: str = ":memory:"
+
+# NOTE: WAL lets podcast_list read while a long cron podcast_update is
+#       writing, instead of one of them getting "database is locked".
+#       synchronous=normal is safe under WAL (at worst the last commit is
+#       lost on power failure, never corruption) and means bulk writes
+#       aren't waiting on an fsync per transaction. cache_size is negative
+#       on purpose, that's sqlite for "this many KiB" rather than pages.
+DEFAULT_STORAGE: StorageConfig = StorageConfig(
+    path=os.path.join("~", ".podcasts", "datastore.db"),
+    journal_mode="wal",
+    synchronous="normal",
+    cache_size=-16000,
+    mmap_size=64 * 1024 * 1024,
+    busy_timeout=5000,
+)
+
+# NOTE: Every setting can come from, in increasing order of precedence:
+#       the defaults above, the [storage] section of ~/.podcasts/config.ini,
+#       a PODCAST_CLI_<SETTING> environment variable, and for the path,
+#       the --db flag on the cli group.
+CONFIG_FILE: str = os.path.join("~", ".podcasts", "config.ini")
+ENV_PREFIX: str = "PODCAST_CLI_"
+ENV_NAMES: Dict[str, str] = {
+    "path": ENV_PREFIX + "DB",
+    "journal_mode": ENV_PREFIX + "JOURNAL_MODE",
+    "synchronous": ENV_PREFIX + "SYNCHRONOUS",
+    "cache_size": ENV_PREFIX + "CACHE_SIZE",
+    "mmap_size": ENV_PREFIX + "MMAP_SIZE",
+    "busy_timeout": ENV_PREFIX + "BUSY_TIMEOUT",
+}
+INT_SETTINGS = ("cache_size", "mmap_size", "busy_timeout")
+
+
+def podcast_dir() -> str:
+    """
+    Returns the absolute path to the directory everything podcast_cli
+    stores lives under, i.e ~/.podcasts
+    """
+    return os.path.expanduser(os.path.join("~", ".podcasts"))
+
+
+def load_storage_config(
+    path: Optional[str] = None,
+    config_file: Optional[str] = None
+) -> StorageConfig:
+    """
+    Works out the storage settings from the defaults, the config file and
+    the environment, in that order.
+
+    args:
+    path - str, path to the database, i.e from the --db flag. Wins over
+        everything else. ":memory:" gives a throwaway in-memory database,
+        handy for tests and benchmarks.
+    config_file - str, path to an ini file with a [storage] section.
+        Defaults to ~/.podcasts/config.ini, which doesn't have to exist.
+
+    returns:
+    StorageConfig, with "path" expanded.
+    """
+    config: StorageConfig = StorageConfig(**DEFAULT_STORAGE)  # type: ignore
+
+    parser: ConfigParser = ConfigParser()
+    parser.read(os.path.expanduser(config_file or CONFIG_FILE))
+    if parser.has_section("storage"):
+        for key in config.keys():
+            if parser.has_option("storage", key):
+                config[key] = parser.get("storage", key)  # type: ignore
+
+    for key, env_name in ENV_NAMES.items():
+        if os.environ.get(env_name):
+            config[key] = os.environ[env_name]  # type: ignore
+
+    if path:
+        config["path"] = path
+
+    for key in INT_SETTINGS:
+        config[key] = int(config[key])  # type: ignore
+    if config["path"] != MEMORY_PATH:
+        config["path"] = os.path.expanduser(config["path"])
+
+    return config
+
+
+def configure_database(
+    database: SqliteDatabase,
+    config: StorageConfig
+) -> SqliteDatabase:
+    """
+    Points a (deferred) SqliteDatabase at the configured file and sets the
+    pragmas that get applied to every connection it opens.
+
+    args:
+    database - SqliteDatabase, i.e database_models.db
+    config - StorageConfig, output of load_storage_config()
+
+    returns:
+    the same database, for convenience.
+    """
+    if config["path"] != MEMORY_PATH:
+        directory: str = os.path.dirname(config["path"])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    database.init(
+        config["path"],
+        # NOTE: sqlite3's timeout is the busy handler, in seconds.
+        timeout=config["busy_timeout"] / 1000,
+        pragmas=[
+            ("journal_mode", config["journal_mode"]),
+            ("synchronous", config["synchronous"]),
+            ("cache_size", config["cache_size"]),
+            ("mmap_size", config["mmap_size"]),
+            ("busy_timeout", config["busy_timeout"]),
+        ]
+    )
+    return database
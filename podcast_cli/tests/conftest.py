@@ -0,0 +1,92 @@
+from typing import Iterable, List, Union
+
+import pytest
+from peewee import SqliteDatabase  # type: ignore
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    FeedCacheModel,
+    DownloadModel,
+    PlaylistModel,
+    EpisodeSearchModel,
+    ScheduleModel
+)
+from podcast_cli.models.custom_types import EpisodeType
+from podcast_cli.models.migrations import migrate
+
+
+MODELS = [
+    PodcastModel,
+    EpisodeModel,
+    FeedCacheModel,
+    DownloadModel,
+    PlaylistModel,
+    EpisodeSearchModel,
+    ScheduleModel
+]
+
+# NOTE: The first synthetic episode's pubDate, the n-th comes "every"
+#       seconds after it.
+FIRST_PUBDATE: int = 1600000000
+DAY: int = 24 * 3600
+
+
+@pytest.fixture
+def memory_db():
+    # NOTE: binds the models to a throwaway in-memory database for the
+    #       duration of a test, so nothing touches datastore.db.
+    test_db: SqliteDatabase = SqliteDatabase(":memory:")
+    with test_db.bind_ctx(MODELS):
+        migrate(test_db)
+        yield test_db
+    test_db.close()
+
+
+# NOTE: Shared factories for the tests that need podcasts and episodes in
+#       the database. Import them from here, i.e
+#       from podcast_cli.tests.conftest import make_podcast, make_episodes
+
+
+def make_podcast(n: Union[int, str] = 1, **fields) -> PodcastModel:
+    """
+    Stores "Podcast n", any field can be overridden, i.e
+    make_podcast(2, title="Planet Money").
+    """
+    values: dict = {
+        "title": "Podcast {}".format(n),
+        "description": "",
+        "link": "https://example.com/{}.xml".format(n),
+    }
+    values.update(fields)
+    return PodcastModel.create(**values)
+
+
+def make_episode(
+    n: int,
+    podcast: Union[int, str] = 1,
+    every: int = DAY,
+    **fields
+) -> EpisodeType:
+    """
+    The n-th episode of podcast, as the parser would return it. Its guid
+    is "<podcast>-<n>" and a higher n is newer.
+    """
+    episode: EpisodeType = EpisodeType(
+        title="Episode {}".format(n),
+        description="",
+        pubDate=FIRST_PUBDATE + n * every,
+        guid="{}-{}".format(podcast, n),
+        link="https://media.example.com/{}/{}.mp3".format(podcast, n),
+    )
+    episode.update(fields)  # type: ignore
+    return episode
+
+
+def make_episodes(
+    podcast: Union[int, str],
+    numbers: Iterable[int],
+    every: int = DAY,
+    **fields
+) -> List[EpisodeType]:
+    return [make_episode(n, podcast, every, **fields) for n in numbers]
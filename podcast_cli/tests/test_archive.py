@@ -0,0 +1,65 @@
+import os
+from typing import List
+
+from click.testing import CliRunner
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import FeedResponse
+from podcast_cli.controllers.archive import (
+    archive_dir,
+    archive_feed,
+    load_archived_feed,
+    snapshots
+)
+from podcast_cli.views.add_podcast_command import podcast_add
+
+
+URL: str = "https://feeds.npr.org/510289/podcast.xml"
+TEST_XML = os.path.join(os.getcwd(), "test_xml_planet_money.xml")
+
+
+def fetched(body: bytes, content_hash: str, modified: bool = True) -> FeedResponse:  # noqa: E501
+    return FeedResponse(
+        url=URL,
+        not_modified=not modified,
+        body=body if modified else None,
+        etag=None,
+        last_modified=None,
+        content_hash=content_hash
+    )
+
+
+def test_archive_dedupes_and_prunes(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert archive_dir() == str(tmp_path / ".podcasts" / "feeds")
+
+    paths: List[str] = []
+    for n in range(4):
+        paths.append(archive_feed(fetched(b"<rss>%d</rss>" % n, "h%d" % n), keep=3))  # noqa: E501
+        os.utime(paths[-1], (n, n))
+    assert snapshots(URL) == paths[:0:-1]
+
+    # NOTE: fetched again unchanged, by hash or by a 304.
+    assert archive_feed(fetched(b"<rss>1</rss>", "h1"), keep=3) == paths[1]
+    assert archive_feed(fetched(None, "h2", modified=False)) == paths[2]
+    assert archive_feed(fetched(None, "h0", modified=False)) is None
+
+    newest: FeedResponse = load_archived_feed(URL)
+    assert newest["body"] == b"<rss>2</rss>"
+    assert newest["content_hash"] == "h2"
+    assert not newest["not_modified"]
+
+
+def test_add_offline(memory_db, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    result = CliRunner().invoke(podcast_add, [URL, "--offline"])
+    assert result.exit_code == 1
+    assert "No archived copy" in result.output
+
+    with open(TEST_XML, "rb") as F:
+        archive_feed(fetched(F.read(), "abc"))
+    result = CliRunner().invoke(podcast_add, [URL, "--offline"])
+    assert result.exit_code == 0, result.output
+    assert PodcastModel.get().link == URL
+    assert EpisodeModel.select().count() > 0
@@ -0,0 +1,147 @@
+import os
+import socket
+import threading
+
+import click
+import pytest
+from peewee import SqliteDatabase  # type: ignore
+
+import main
+from podcast_cli.models.database_models import PodcastModel
+from podcast_cli.controllers import daemon
+from podcast_cli.controllers.daemon import (
+    client_for_cli,
+    request,
+    run_command,
+    DaemonServer,
+    HotCache
+)
+
+
+@pytest.fixture
+def server(memory_db, tmp_path):
+    daemon: DaemonServer = DaemonServer(
+        str(tmp_path / "daemon.sock"),
+        main.cli,
+        click.Context(main.cli),
+        memory_db,
+        str(tmp_path / "datastore.db")
+    )
+    yield daemon
+    daemon.server_close()
+
+
+def test_cli_runs_commands_and_caches_output(server):
+    PodcastModel.create(title="Planet Money", link="https://example.com/pm.xml")  # noqa: E501
+
+    response = server.dispatch({"method": "cli", "params": {"argv": ["podcast-list"]}})  # noqa: E501
+    assert response["ok"] and response["exit_code"] == 0
+    assert "Planet Money" in response["output"]
+
+    PodcastModel.create(title="Other Show", link="https://example.com/o.xml")  # noqa: E501
+    # NOTE: the daemon's own connection doesn't move data_version, so the
+    #       cached answer stands until something clears it.
+    assert server.dispatch({"method": "cli", "params": {"argv": ["podcast-list"]}}) == response  # noqa: E501
+    server.cache.clear()
+    assert "Other Show" in server.dispatch({"method": "cli", "params": {"argv": ["podcast-list"]}})["output"]  # noqa: E501
+
+
+def test_cli_reports_errors_and_refusals(server, tmp_path):
+    response = server.dispatch({"method": "cli", "params": {"argv": ["podcast-list-episodes", "1", "--limit", "x"]}})  # noqa: E501
+    assert response["exit_code"] == 2
+    assert "--limit" in response["stderr"]
+
+    assert server.dispatch({"method": "cli", "params": {"argv": ["podcast-remove", "1"]}})["refused"]  # noqa: E501
+    assert server.dispatch({"method": "cli", "params": {"argv": ["podcast-list"], "database": str(tmp_path / "other.db")}})["refused"]  # noqa: E501
+    assert server.dispatch({"method": "nope"})["error"] == "Unknown method 'nope'"  # noqa: E501
+
+
+def test_json_methods(server):
+    PodcastModel.create(title="Planet Money", link="https://example.com/pm.xml")  # noqa: E501
+
+    listed = server.dispatch({"method": "list"})
+    assert [p["title"] for p in listed["data"]] == ["Planet Money"]
+    assert server.dispatch({"method": "search", "params": {"query": "money"}})["data"] == []  # noqa: E501
+    assert not server.dispatch({"method": "search", "params": {}})["ok"]
+
+
+def test_hot_cache_sees_other_connections(tmp_path):
+    path: str = str(tmp_path / "datastore.db")
+    mine: SqliteDatabase = SqliteDatabase(path)
+    theirs: SqliteDatabase = SqliteDatabase(path)
+    mine.execute_sql("CREATE TABLE t (x)")
+    cache: HotCache = HotCache(mine)
+
+    assert cache.get("k") is None
+    cache.put("k", 1)
+    assert cache.get("k") == 1
+
+    theirs.execute_sql("INSERT INTO t VALUES (1)")
+    assert cache.get("k") is None
+
+
+def test_socket_round_trip(server, tmp_path):
+    assert os.stat(server.path).st_mode & 0o077 == 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert request("ping", path=server.path)["data"]["pid"] == os.getpid()
+        with pytest.raises(click.ClickException):
+            DaemonServer(server.path, main.cli, None, None, "")
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def test_no_daemon_or_stale_socket(tmp_path, monkeypatch):
+    path: str = str(tmp_path / "daemon.sock")
+    monkeypatch.setenv("PODCAST_CLI_SOCKET", path)
+    assert client_for_cli(["podcast-list"], "datastore.db") is None
+
+    stale: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    assert client_for_cli(["podcast-list"], "datastore.db") is None
+    # NOTE: a new daemon clears the leftover socket file out of the way.
+    DaemonServer(path, main.cli, None, None, "").server_close()
+    assert not os.path.exists(path)
+
+
+def test_run_command_collects_output():
+    @click.command()
+    def hello():
+        click.echo("hi")
+        click.echo("warn", err=True)
+        raise click.exceptions.Exit(3)
+
+    assert run_command(hello, "hello", []) == (3, "hi\n", "warn\n")
+
+
+def test_client_only_falls_back_when_refused(monkeypatch, capsys):
+    failed = {"ok": False, "refused": False, "error": "boom"}
+    monkeypatch.setattr(daemon, "request", lambda *args, **kwargs: failed)
+    assert client_for_cli(["podcast-update"], "datastore.db") == 1
+    assert "Error: boom" in capsys.readouterr().err
+
+    failed["refused"] = True
+    assert client_for_cli(["podcast-update"], "datastore.db") is None
+
+
+def test_run_command_reports_crashes():
+    @click.command()
+    def crash():
+        click.echo("partial")
+        raise RuntimeError("boom")
+
+    exit_code, output, stderr = run_command(crash, "crash", [])
+    assert (exit_code, output) == (1, "partial\n")
+    assert "RuntimeError: boom" in stderr
+
+
+def test_run_command_keeps_color_when_asked():
+    @click.command()
+    def styled():
+        click.echo(click.style("x", bold=True))
+
+    assert run_command(styled, "styled", [])[1] == "x\n"
+    assert run_command(styled, "styled", [], color=True)[1] == click.style("x", bold=True) + "\n"  # noqa: E501
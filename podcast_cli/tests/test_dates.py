@@ -0,0 +1,34 @@
+import calendar
+
+import pytest
+
+from podcast_cli.controllers.dates import parse_pubdate
+
+
+EXPECTED: int = calendar.timegm((2020, 10, 16, 23, 47, 20))
+
+
+@pytest.mark.parametrize("text", [
+    "Fri, 16 Oct 2020 19:47:20 -0400",
+    "Fri, 16 Oct 2020 23:47:20 GMT",
+    "Fri, 16 Oct 2020 18:47:20 EST",
+    "16 Oct 2020 23:47:20 +0000",
+    "Friday, 16 October 2020 23:47:20 UTC",
+    "Fri, 16 Oct 20 23:47:20 Z",
+    "Fri, 16 Oct 2020 23:47:20",
+    "2020-10-16T19:47:20-04:00",
+])
+def test_parse_pubdate_variants(text):
+    assert parse_pubdate(text) == EXPECTED
+
+
+def test_parse_pubdate_short_forms():
+    assert parse_pubdate("Fri, 2 Oct 2020 23:47 +0000") == calendar.timegm(
+        (2020, 10, 2, 23, 47, 0)
+    )
+    assert parse_pubdate("Fri, 16 Oct 2020 23:47:20 +05:30") == EXPECTED - 19800  # noqa: E501
+
+
+def test_parse_pubdate_garbage():
+    with pytest.raises(ValueError):
+        parse_pubdate("not a date at all")
@@ -0,0 +1,181 @@
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    DownloadModel
+)
+from podcast_cli.models.custom_types import DownloadJob
+from podcast_cli.controllers.downloader import (
+    download_file,
+    episode_filename,
+    guid_hash,
+    load_download_states,
+    parse_rate,
+    plan_downloads,
+    record_download,
+    safe_filename,
+    RateLimiter
+)
+
+
+BODY: bytes = bytes(range(256)) * 40
+
+
+class FakeMediaResponse():
+    def __init__(self, status_code: int, body: bytes, headers: Dict):
+        self.status_code: int = status_code
+        self.body: bytes = body
+        self.headers: Dict[str, str] = headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size: int):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakeMediaSession():
+    """
+    Serves BODY, honouring Range headers unless honour_range is False.
+    """
+    def __init__(self, honour_range: bool = True):
+        self.honour_range: bool = honour_range
+        self.ranges: List[Optional[str]] = []
+
+    def get(self, url: str, headers: Dict, **kwargs) -> FakeMediaResponse:
+        self.ranges.append(headers.get("Range"))
+        if "Range" not in headers or not self.honour_range:
+            return FakeMediaResponse(
+                200,
+                BODY,
+                {"Content-Length": str(len(BODY))}
+            )
+        start: int = int(headers["Range"][len("bytes="):-1])
+        return FakeMediaResponse(206, BODY[start:], {
+            "Content-Range": "bytes {}-{}/{}".format(start, len(BODY) - 1, len(BODY)),  # noqa: E501
+            "Content-Length": str(len(BODY) - start),
+        })
+
+
+def test_download_file_is_atomic(tmp_path):
+    path: str = str(tmp_path / "episode.mp3")
+
+    result = download_file(FakeMediaSession(), "https://x/e.mp3", path)
+
+    assert result == {"path": path, "size": len(BODY), "resumed": False}
+    assert open(path, "rb").read() == BODY
+    assert os.listdir(str(tmp_path)) == ["episode.mp3"]
+
+
+def test_download_file_resumes_partial_file(tmp_path):
+    path: str = str(tmp_path / "episode.mp3")
+    with open(path + ".part", "wb") as F:
+        F.write(BODY[:1000])
+    session: FakeMediaSession = FakeMediaSession()
+
+    result = download_file(session, "https://x/e.mp3", path)
+
+    assert session.ranges == ["bytes=1000-"]
+    assert result["resumed"]
+    assert open(path, "rb").read() == BODY
+
+
+def test_download_file_starts_over_without_range_support(tmp_path):
+    path: str = str(tmp_path / "episode.mp3")
+    with open(path + ".part", "wb") as F:
+        F.write(b"garbage")
+
+    result = download_file(FakeMediaSession(honour_range=False), "https://x/e.mp3", path)  # noqa: E501
+
+    assert not result["resumed"]
+    assert open(path, "rb").read() == BODY
+
+
+def test_rate_limiter_spaces_out_chunks():
+    slept: List[float] = []
+    limiter: RateLimiter = RateLimiter(1000, clock=lambda: 0.0, sleep=slept.append)  # noqa: E501
+
+    for _ in range(3):
+        limiter.consume(500)
+
+    assert slept == [0.5, 1.0, 1.5]
+
+
+def test_parse_rate():
+    assert parse_rate(None) is None
+    assert parse_rate("500K") == 500 * 1024
+    assert parse_rate("1.5mb") == int(1.5 * 1024 * 1024)
+    assert parse_rate("2048") == 2048
+
+
+def test_file_names_are_safe():
+    episode = SimpleNamespace(
+        title="Who/What? A: Story",
+        link="https://cdn.example.com/a/b/ep.MP3?token=1",
+        guid="guid-1",
+        pubDate=datetime(2020, 10, 16, 19, 47, 20)
+    )
+
+    assert safe_filename("../..") == "untitled"
+    assert episode_filename(episode) == "2020-10-16 Who_What_ A_ Story [{}].mp3".format(guid_hash("guid-1"))  # noqa: E501
+
+
+def test_same_day_same_title_episodes_get_their_own_file():
+    first = SimpleNamespace(
+        title="Update",
+        link="https://cdn.example.com/1.mp3",
+        guid="guid-1",
+        pubDate=datetime(2020, 10, 16, 9, 0, 0)
+    )
+    second = SimpleNamespace(
+        title="Update",
+        link="https://cdn.example.com/2.mp3",
+        guid="guid-2",
+        pubDate=datetime(2020, 10, 16, 17, 0, 0)
+    )
+
+    assert episode_filename(first) != episode_filename(second)
+
+
+def test_download_state_round_trip(memory_db, tmp_path):
+    parent: PodcastModel = PodcastModel.create(
+        title="Planet Money",
+        link="https://feeds.npr.org/510289/podcast.xml"
+    )
+    episode: EpisodeModel = EpisodeModel.create(
+        title="One",
+        link="https://media.example.com/1.mp3",
+        guid="1",
+        pubDate=1602892040,
+        podcast=parent
+    )
+    job: DownloadJob = DownloadJob(
+        episode=episode,
+        url=episode.link,
+        path=str(tmp_path / "1.mp3")
+    )
+    with open(job["path"] + ".part", "wb") as F:
+        F.write(BODY[:10])
+
+    record_download(job, "failed", "timed out")
+    state: DownloadModel = load_download_states([episode])[episode.id]
+    assert (state.status, state.size_on_disk) == ("failed", 10)
+
+    os.replace(job["path"] + ".part", job["path"])
+    record_download(job, "done")
+    states = load_download_states([episode])
+    assert states[episode.id].status == "done"
+    assert states[episode.id].error is None
+    assert plan_downloads([episode], states) == []
+    assert DownloadModel.select().count() == 1
@@ -0,0 +1,87 @@
+from typing import List
+
+from playhouse.test_utils import count_queries  # type: ignore
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import EpisodeType, Episode
+from podcast_cli.controllers.ingest import ingest_episodes
+from podcast_cli.controllers.episodes import (
+    get_latest_per_podcast,
+    format_pubdate,
+    iter_episodes,
+    decode_cursor,
+    get_all_episodes,
+    get_one_episode
+)
+from podcast_cli.tests.conftest import make_podcast, make_episodes
+
+
+def make_show(n: int) -> PodcastModel:
+    parent: PodcastModel = make_podcast(n)
+    ingest_episodes(parent, make_episodes(n, range(10), every=3600))
+    return parent
+
+
+def test_get_latest_per_podcast(memory_db):
+    make_show(1)
+    make_show(2)
+
+    eps: List[EpisodeType] = get_latest_per_podcast(3)
+
+    assert len(eps) == 6
+    assert [ep["guid"] for ep in eps[:3]] == ["1-9", "1-8", "1-7"]
+    assert [ep["podcast"] for ep in eps[3:]] == ["Podcast 2"] * 3
+    assert set(eps[0].keys()) == {"pk", "title", "guid", "podcast", "pubDate"}
+
+
+def test_format_pubdate_accepts_model_values(memory_db):
+    parent: PodcastModel = make_show(1)
+    stored = parent.episodemodel_set.order_by(EpisodeModel.pubDate).first()
+
+    assert format_pubdate(stored.pubDate) == format_pubdate(1600000000)
+
+
+def test_iter_episodes_pages_without_gaps(memory_db):
+    parent: PodcastModel = make_show(1)
+    # NOTE: two episodes released at the same second as an existing one.
+    ingest_episodes(parent, [
+        EpisodeType(
+            title="Tie {}".format(i),
+            description="",
+            pubDate=1600000000 + 5 * 3600,
+            guid="tie-{}".format(i),
+            link="https://example.com/tie/{}.mp3".format(i),
+        )
+        for i in range(2)
+    ])
+    everything: List[EpisodeType] = list(iter_episodes(parent.id))
+
+    pages: List[EpisodeType] = []
+    cursor = None
+    while True:
+        page: List[EpisodeType] = list(iter_episodes(parent.id, 4, cursor))
+        if not page:
+            break
+        pages.extend(page)
+        cursor = decode_cursor(page[-1]["cursor"])
+
+    assert len(everything) == 12
+    assert pages == everything
+    assert [ep["pubDate"] for ep in everything] == sorted(
+        (ep["pubDate"] for ep in everything),
+        reverse=True
+    )
+
+
+def test_episode_records_need_one_query(memory_db):
+    parent: PodcastModel = make_show(1)
+
+    with count_queries() as counter:
+        eps: List[Episode] = get_all_episodes(parent.id)
+        podcasts = [ep.podcast for ep in eps]
+
+    assert counter.count == 1
+    assert podcasts == ["Podcast 1"] * 10
+    assert eps[0].guid == "1-9"
+    assert not hasattr(eps[0], "__dict__")
+    assert get_one_episode(eps[0].pk) == eps[0]
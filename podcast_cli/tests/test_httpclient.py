@@ -0,0 +1,69 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from podcast_cli.controllers.profiling import PROFILER
+from podcast_cli.controllers.httpclient import (
+    make_session,
+    pool_size,
+    session_stats,
+    DEFAULT_POOL_SIZE
+)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body: bytes = b"<rss/>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)  # noqa: E501
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{}".format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connections_are_reused(server):
+    session = make_session()
+    PROFILER.enable()
+    try:
+        for n in range(3):
+            assert session.get("{}/{}.xml".format(server, n)).content == b"<rss/>"  # noqa: E501
+    finally:
+        PROFILER.disable()
+
+    assert session_stats(session) == {"requests": 3, "connections": 1, "reused": 2}  # noqa: E501
+    counters = PROFILER.report()["counters"]
+    assert counters["http_requests"] == 3
+    assert counters["http_connections"] == 1
+
+
+def test_streamed_responses_go_back_to_the_pool(server):
+    session = make_session()
+    for n in range(2):
+        res = session.get(server, stream=True)
+        assert b"".join(res.iter_content(2)) == b"<rss/>"
+        res.close()
+
+    assert session_stats(session)["connections"] == 1
+
+
+def test_pool_size(monkeypatch):
+    monkeypatch.delenv("PODCAST_CLI_POOL_SIZE", raising=False)
+    assert pool_size() == DEFAULT_POOL_SIZE
+    monkeypatch.setenv("PODCAST_CLI_POOL_SIZE", "2")
+    assert pool_size() == 2
+    assert make_session().get_adapter("http://")._pool_maxsize == 2
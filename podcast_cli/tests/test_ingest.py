@@ -0,0 +1,68 @@
+from typing import List
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import EpisodeType, IngestReport
+from podcast_cli.controllers.ingest import ingest_episodes, load_foreign_guids
+from podcast_cli.tests.conftest import (
+    make_podcast,
+    make_episode,
+    make_episodes
+)
+
+
+def test_ingest_inserts_in_chunks(memory_db):
+    parent: PodcastModel = make_podcast()
+    episodes: List[EpisodeType] = make_episodes(1, range(250))
+
+    report: IngestReport = ingest_episodes(parent, episodes, chunk_size=40)
+
+    assert report["inserted"] == 250
+    assert report["skipped"] == 0
+    assert len(report["new_guids"]) == 250
+    assert EpisodeModel.select().count() == 250
+
+
+def test_ingest_skips_and_updates(memory_db):
+    parent: PodcastModel = make_podcast()
+    ingest_episodes(parent, make_episodes(1, range(5)))
+
+    report: IngestReport = ingest_episodes(parent, [
+        make_episode(0),
+        make_episode(1, title="Renamed"),
+        make_episode(5),
+        make_episode(5),
+        make_episode(6, link=make_episode(2)["link"]),
+    ])
+
+    assert report["inserted"] == 1
+    assert report["updated"] == 1
+    assert report["skipped"] == 3
+    assert report["new_guids"] == ["1-5"]
+    assert EpisodeModel.get(EpisodeModel.guid == "1-1").title == "Renamed"
+    assert EpisodeModel.select().count() == 6
+
+
+def test_ingest_leaves_other_podcasts_guids_alone(memory_db):
+    first: PodcastModel = make_podcast(1)
+    second: PodcastModel = make_podcast(2)
+    ingest_episodes(first, [make_episode(1, guid="1")])
+
+    report: IngestReport = ingest_episodes(second, [
+        make_episode(1, podcast=2, guid="1", title="Other"),
+    ])
+
+    assert report["inserted"] == 0
+    assert report["updated"] == 0
+    assert report["skipped"] == 1
+    stored: EpisodeModel = EpisodeModel.get(EpisodeModel.guid == "1")
+    assert stored.title == "Episode 1"
+    assert stored.podcast_id == first.id
+
+
+def test_load_foreign_guids(memory_db):
+    first: PodcastModel = make_podcast(1)
+    second: PodcastModel = make_podcast(2)
+    ingest_episodes(first, make_episodes(1, range(1, 3)))
+
+    assert load_foreign_guids(second, ["1-1", "1-3"], chunk_size=1) == {"1-1"}
+    assert load_foreign_guids(first, ["1-1", "1-3"]) == set()
@@ -0,0 +1,30 @@
+from peewee import SqliteDatabase  # type: ignore
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.migrations import (
+    migrate,
+    get_schema_version,
+    SCHEMA_VERSION
+)
+
+
+def test_fresh_database_is_current(memory_db):
+    assert get_schema_version(memory_db) == SCHEMA_VERSION
+    assert migrate(memory_db) == []
+
+    indexes = [i.name for i in memory_db.get_indexes("episodemodel")]
+    assert "episodemodel_podcast_id_pubDate" in indexes
+
+
+def test_legacy_database_is_upgraded():
+    # NOTE: a database from before migrations, made by create_tables()
+    legacy_db: SqliteDatabase = SqliteDatabase(":memory:")
+    with legacy_db.bind_ctx([PodcastModel, EpisodeModel]):
+        legacy_db.create_tables([PodcastModel, EpisodeModel])
+        PodcastModel.create(title="Old", link="https://example.com/feed")
+
+        applied = migrate(legacy_db)
+
+        assert applied == list(range(1, SCHEMA_VERSION + 1))
+        assert PodcastModel.select().count() == 1
+    legacy_db.close()
@@ -0,0 +1,105 @@
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    FeedCacheModel,
+    PlaylistModel
+)
+from podcast_cli.models.custom_types import (
+    EpisodeType,
+    FeedRefreshResult,
+    FeedResponse,
+    ParsedFeed,
+    PodcastType
+)
+from podcast_cli.controllers.podcasts import get_all_podcasts
+from podcast_cli.controllers.opml import (
+    parse_opml,
+    render_opml,
+    split_known_feeds,
+    store_fetched_podcasts
+)
+
+
+OPML: bytes = b"""<?xml version="1.0" encoding="utf-8"?>
+<opml version="1.0"><head><title>Subscriptions</title></head><body>
+  <outline text="News">
+    <outline type="rss" text="Planet Money" xmlUrl=" https://feeds.npr.org/510289/podcast.xml "/>
+  </outline>
+  <outline type="rss" title="Behind The Bastards" text="btb" xmlUrl="https://feeds.megaphone.fm/behindthebastards"/>
+  <outline type="rss" text="again" xmlUrl="https://feeds.npr.org/510289/podcast.xml"/>
+  <outline text="no feed here"/>
+</body></opml>
+"""  # noqa: E501
+
+
+def fetched(url: str, title: str, guid: str, error=None) -> FeedRefreshResult:  # noqa: E501
+    parsed = ParsedFeed(
+        feed=FeedResponse(
+            url=url,
+            not_modified=False,
+            body=b"",
+            etag='"v1"',
+            last_modified=None,
+            content_hash="abc"
+        ),
+        podcast=PodcastType(title=title, description=None, link=url, guid=guid),  # noqa: E501
+        episodes=[
+            EpisodeType(
+                title="{} {}".format(title, n),
+                description=None,
+                pubDate=1600000000 + n,
+                guid="{}-{}".format(guid, n),
+                link="{}/{}.mp3".format(url, n),
+            )
+            for n in range(2)
+        ]
+    )
+    return FeedRefreshResult(
+        podcast=PodcastModel(title=None, link=url),
+        result=None if error else parsed,
+        error=error
+    )
+
+
+def test_parse_opml_flattens_and_dedupes():
+    assert parse_opml(OPML) == [
+        {"title": "Planet Money", "url": "https://feeds.npr.org/510289/podcast.xml"},  # noqa: E501
+        {"title": "Behind The Bastards", "url": "https://feeds.megaphone.fm/behindthebastards"},  # noqa: E501
+    ]
+
+
+def test_store_fetched_podcasts(memory_db):
+    results = store_fetched_podcasts([
+        fetched("https://a.example/feed", "A", "a"),
+        fetched("https://b.example/feed", "B", "b", error=OSError("timed out")),  # noqa: E501
+        # same podcast under a second url.
+        fetched("https://a.example/rss", "A", "a"),
+        # a different podcast whose title is taken.
+        fetched("https://c.example/feed", "A", "c"),
+    ])
+
+    assert [(r["status"], r["episodes"]) for r in results] == [
+        ("added", 2),
+        ("failed", 0),
+        ("exists", 0),
+        ("failed", 0),
+    ]
+    assert results[1]["error"] == "timed out"
+    # NOTE: the failed savepoint didn't take the others with it.
+    assert [p.link for p in PodcastModel.select()] == ["https://a.example/feed"]  # noqa: E501
+    assert EpisodeModel.select().count() == 2
+    assert FeedCacheModel.get().etag == '"v1"'
+    assert PlaylistModel.select().count() == 2
+
+
+def test_split_known_feeds_and_export_round_trip(memory_db):
+    store_fetched_podcasts([fetched("https://feeds.npr.org/510289/podcast.xml", "Planet Money", "pm")])  # noqa: E501
+
+    new, known = split_known_feeds(parse_opml(OPML))
+    assert [f["url"] for f in new] == ["https://feeds.megaphone.fm/behindthebastards"]  # noqa: E501
+    assert [f["url"] for f in known] == ["https://feeds.npr.org/510289/podcast.xml"]  # noqa: E501
+
+    exported = parse_opml(render_opml(get_all_podcasts()))
+    assert exported == [
+        {"title": "Planet Money", "url": "https://feeds.npr.org/510289/podcast.xml"}  # noqa: E501
+    ]
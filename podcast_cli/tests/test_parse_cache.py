@@ -0,0 +1,104 @@
+import os
+from unittest.mock import patch
+
+from podcast_cli.models.custom_types import FeedResponse
+from podcast_cli.controllers.parser import (
+    parse_podcast_metadata,
+    parse_podcast_episodeset
+)
+from podcast_cli.controllers import parse_cache
+from podcast_cli.controllers.parse_cache import (
+    cache_dir,
+    load_parsed,
+    parse_feed_cached,
+    store_parsed
+)
+
+
+TEST_XML = os.path.join(os.getcwd(), "test_xml_planet_money.xml")
+
+
+def feed_response(body: bytes, content_hash=None) -> FeedResponse:
+    return FeedResponse(
+        url="https://feeds.npr.org/510289/podcast.xml",
+        not_modified=False,
+        body=body,
+        etag=None,
+        last_modified=None,
+        content_hash=content_hash
+    )
+
+
+def test_hit_matches_a_fresh_parse(tmp_path):
+    with open(TEST_XML, "rb") as F:
+        body: bytes = F.read()
+    root: str = str(tmp_path)
+
+    first = parse_feed_cached(feed_response(body), root)
+    with patch("podcast_cli.controllers.parse_cache.parse_podcast_episodeset") as p:  # noqa: E501
+        second = parse_feed_cached(feed_response(body), root)
+        assert not p.called
+
+    assert first == second
+    assert second == (parse_podcast_metadata(body), parse_podcast_episodeset(body))  # noqa: E501
+
+
+def test_parser_version_change_clears_the_cache(tmp_path, monkeypatch):
+    root: str = str(tmp_path)
+    store_parsed("abc", {"title": "Old"}, [], root=root)
+    old_dir: str = cache_dir(root)
+    assert load_parsed("abc", root)[0]["title"] == "Old"
+
+    monkeypatch.setattr(parse_cache, "PARSER_VERSION", parse_cache.PARSER_VERSION + 1)  # noqa: E501
+    assert load_parsed("abc", root) is None
+    store_parsed("def", {"title": "New"}, [], root=root)
+    assert not os.path.exists(old_dir)
+    assert load_parsed("def", root)[0]["title"] == "New"
+
+
+def test_other_pythons_caches_are_left_alone(tmp_path):
+    root: str = str(tmp_path)
+    other: str = os.path.join(root, "v{}-py27".format(parse_cache.PARSER_VERSION))  # noqa: E501
+    os.makedirs(other)
+
+    store_parsed("abc", {"title": "New"}, [], root=root)
+    assert os.path.isdir(other)
+    assert load_parsed("abc", root)[0]["title"] == "New"
+
+
+def test_failed_write_falls_back_to_a_plain_parse(tmp_path):
+    with open(TEST_XML, "rb") as F:
+        body: bytes = F.read()
+    # NOTE: a file where the cache directory should be, so every write
+    #       fails.
+    root: str = str(tmp_path / "parsed")
+    open(root, "w").close()
+
+    podcast, episodes = parse_feed_cached(feed_response(body), root)
+    assert podcast == parse_podcast_metadata(body)
+    assert len(episodes) == len(parse_podcast_episodeset(body))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    root: str = str(tmp_path)
+    episodes = [{"title": "x" * 100, "pubDate": 1}]
+    for n, key in enumerate(["a", "b"]):
+        store_parsed(key, {}, episodes, root=root)
+        path = os.path.join(cache_dir(root), key + ".marshal")
+        os.utime(path, (n, n))
+    size: int = os.path.getsize(path)
+
+    # NOTE: reading "a" makes "b" the least recently used.
+    assert load_parsed("a", root) is not None
+    store_parsed("c", {}, episodes, max_bytes=2 * size, root=root)
+    assert load_parsed("b", root) is None
+    assert load_parsed("a", root) is not None
+    assert load_parsed("c", root) is not None
+
+
+def test_damaged_entry_is_a_miss(tmp_path):
+    root: str = str(tmp_path)
+    store_parsed("abc", {}, [], root=root)
+    with open(os.path.join(cache_dir(root), "abc.marshal"), "wb") as F:
+        F.write(b"\x00garbage")
+    assert load_parsed("abc", root) is None
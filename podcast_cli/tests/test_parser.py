@@ -3,43 +3,29 @@ from typing import List
 import os
 
 import pytest
-from bs4 import BeautifulSoup
 
 from podcast_cli.models.custom_types import (
     PodcastType,
-    EpisodeType
+    EpisodeType,
+    FeedResponse
 )
 from podcast_cli.controllers.parser import (
-    parse_podcast_xml,
+    fetch_podcast_feed,
     parse_podcast_metadata,
     parse_podcast_episodeset,
+    iter_podcast_episodes,
+    read_feed_body,
 )
 
 
 TEST_XML = os.path.join(os.getcwd(), "test_xml_planet_money.xml")
 
 
-def test_parse_xml():
-    full_path: str = os.path.join(os.getcwd(), "test_xml_planet_money.xml")
-
-    with open(full_path, "r") as F:
-        # NOTE: wow this is weird
-        class TempObject():
-            text = F.read()
-
-        with patch("podcast_cli.controllers.parser.requests.get") as p:
-            p.return_value = TempObject()
-            soup: BeautifulSoup = parse_podcast_xml("")
-
-            assert isinstance(soup, BeautifulSoup)
-
-
 def test_parse_podcast_metadata():
-    with open(TEST_XML, "r") as F:
-        contents: str = F.read()
+    with open(TEST_XML, "rb") as F:
+        contents: bytes = F.read()
 
-    soup: BeautifulSoup = BeautifulSoup(contents, "xml")
-    metadata: PodcastType = parse_podcast_metadata(soup)
+    metadata: PodcastType = parse_podcast_metadata(contents)
 
     assert isinstance(metadata, dict)
     assert "title" in metadata.keys()
@@ -52,7 +38,113 @@ def test_parse_podcast_episodeset():
     with open(TEST_XML, "r") as F:
         contents: str = F.read()
 
-    soup: BeautifulSoup = BeautifulSoup(contents, "xml")
-    episodeset: List[EpisodeType] = parse_podcast_episodeset(soup)
+    episodeset: List[EpisodeType] = parse_podcast_episodeset(contents)
 
     assert len(episodeset) != 0
+
+
+class FakeResponse():
+    # NOTE: no .content or .text on purpose, the body should only ever be
+    #       read through iter_content().
+    def __init__(self, status_code: int, content: bytes = b"", headers=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._content = content
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self._content), chunk_size):
+            yield self._content[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        pass
+
+
+def test_fetch_podcast_feed_sends_validators():
+    with patch("podcast_cli.controllers.parser.http_get") as p:
+        p.return_value = FakeResponse(304)
+        feed: FeedResponse = fetch_podcast_feed(
+            "", etag='"abc"', last_modified="Fri, 16 Oct 2020 19:47:20 GMT"
+        )
+
+        headers: dict = p.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"abc"'
+        assert headers["If-Modified-Since"] == "Fri, 16 Oct 2020 19:47:20 GMT"
+        assert feed["not_modified"]
+        assert feed["body"] is None
+
+
+def test_read_feed_body_caps_size():
+    res: FakeResponse = FakeResponse(200, b"x" * 100)
+    assert read_feed_body(res, max_bytes=100) == b"x" * 100
+    assert res.closed
+
+    with pytest.raises(IOError):
+        read_feed_body(FakeResponse(200, b"x" * 101), max_bytes=100)
+    with pytest.raises(IOError):
+        read_feed_body(
+            FakeResponse(200, b"", {"Content-Length": "101"}),
+            max_bytes=100
+        )
+
+
+def test_fetched_bytes_use_the_declared_encoding():
+    feed: bytes = (
+        '<?xml version="1.0" encoding="iso-8859-1"?><rss><channel>'
+        '<title>Caf\u00e9</title><item><title>Cr\u00e8me</title>'
+        '<pubDate>Fri, 16 Oct 2020 19:47:20 GMT</pubDate><guid>1</guid>'
+        '<enclosure url="https://example.com/1.mp3"/></item>'
+        '</channel></rss>'
+    ).encode("iso-8859-1")
+    with patch("podcast_cli.controllers.parser.http_get") as p:
+        p.return_value = FakeResponse(200, feed)
+        fetched: FeedResponse = fetch_podcast_feed("")
+
+    assert p.call_args[1]["headers"]["Accept-Encoding"] == "gzip, deflate"
+    assert parse_podcast_metadata(fetched["body"])["title"] == "Caf\u00e9"
+    assert parse_podcast_episodeset(fetched["body"])[0]["title"] == "Cr\u00e8me"  # noqa: E501
+
+
+def test_fetch_podcast_feed_same_hash_is_not_modified():
+    with open(TEST_XML, "rb") as F:
+        contents: bytes = F.read()
+
+    with patch("podcast_cli.controllers.parser.http_get") as p:
+        p.return_value = FakeResponse(200, contents, {"ETag": '"v1"'})
+        first: FeedResponse = fetch_podcast_feed("")
+        second: FeedResponse = fetch_podcast_feed(
+            "", content_hash=first["content_hash"]
+        )
+
+    assert not first["not_modified"]
+    assert first["etag"] == '"v1"'
+    assert second["not_modified"]
+    assert second["body"] is None
+
+
+def test_iter_podcast_episodes_streams_in_feed_order():
+    with open(TEST_XML, "rb") as F:
+        contents: bytes = F.read()
+
+    episodes = iter_podcast_episodes(contents)
+    first: EpisodeType = next(episodes)
+
+    assert first["guid"] == "c7869fe7-466c-48d2-8d6f-0411bb89d56c"
+    assert first["link"].startswith("https://")
+    assert 1 + sum(1 for _ in episodes) == contents.count(b"<item>")
+
+
+def test_item_without_guid_falls_back_to_its_enclosure():
+    feed: bytes = (
+        b'<rss><channel><title>Feed</title><item><title>No guid</title>'
+        b'<pubDate>Fri, 16 Oct 2020 19:47:20 GMT</pubDate>'
+        b'<enclosure url="https://example.com/1.mp3"/></item>'
+        b'</channel></rss>'
+    )
+
+    episode: EpisodeType = parse_podcast_episodeset(feed)[0]
+    assert episode["guid"] == "https://example.com/1.mp3"
@@ -0,0 +1,95 @@
+from typing import List
+
+from peewee import SqliteDatabase  # type: ignore
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    DownloadModel,
+    PlaylistModel
+)
+from podcast_cli.models.custom_types import PlaylistEntry
+from podcast_cli.models.migrations import migrate
+from podcast_cli.controllers.ingest import ingest_episodes
+from podcast_cli.controllers.playlist import (
+    add_to_playlist,
+    get_playlist,
+    rebuild_playlist,
+    render_m3u
+)
+from podcast_cli.tests.conftest import make_podcast, make_episodes
+
+
+def titles(entries: List[PlaylistEntry]) -> List[str]:
+    return ["{} {}".format(e["podcast"], e["title"]) for e in entries]
+
+
+def test_add_to_playlist_keeps_newest(memory_db):
+    parent: PodcastModel = make_podcast(1)
+    report = ingest_episodes(parent, make_episodes(1, range(5)))
+    add_to_playlist(report["new_guids"], keep=2)
+    assert titles(get_playlist()) == ["Podcast 1 Episode 4", "Podcast 1 Episode 3"]  # noqa: E501
+
+    report = ingest_episodes(parent, make_episodes(1, range(5, 6)))
+    add_to_playlist(report["new_guids"], keep=2)
+    assert titles(get_playlist()) == ["Podcast 1 Episode 5", "Podcast 1 Episode 4"]  # noqa: E501
+
+
+def test_rebuild_matches_incremental(memory_db):
+    for n in (1, 2):
+        parent: PodcastModel = make_podcast(n)
+        report = ingest_episodes(parent, make_episodes(n, range(4)))
+        add_to_playlist(report["new_guids"])
+    incremental: List[PlaylistEntry] = get_playlist()
+
+    assert rebuild_playlist() == 6
+    assert get_playlist() == incremental
+
+
+def test_playlist_follows_podcast_removal(memory_db):
+    parent: PodcastModel = make_podcast(1)
+    report = ingest_episodes(parent, make_episodes(1, range(2)))
+    add_to_playlist(report["new_guids"])
+
+    parent.delete_instance(recursive=True)
+
+    assert PlaylistModel.select().count() == 0
+
+
+def test_migration_seeds_playlist():
+    # NOTE: a database at schema version 3, from before the playlist.
+    test_db: SqliteDatabase = SqliteDatabase(":memory:")
+    models = [PodcastModel, EpisodeModel, DownloadModel, PlaylistModel]
+    with test_db.bind_ctx(models):
+        test_db.create_tables(models[:3])
+        ingest_episodes(make_podcast(1), make_episodes(1, range(5)))
+        test_db.execute_sql("PRAGMA user_version = 3")
+
+        assert migrate(test_db)[0] == 4
+        assert titles(get_playlist()) == [
+            "Podcast 1 Episode 4",
+            "Podcast 1 Episode 3",
+            "Podcast 1 Episode 2",
+        ]
+    test_db.close()
+
+
+def test_render_m3u():
+    entries: List[PlaylistEntry] = [
+        PlaylistEntry(pk=1, podcast="A", title="One\nTwo", link="https://x/1.mp3", pubDate=None, path="/tmp/1.mp3"),  # noqa: E501
+        PlaylistEntry(pk=2, podcast="B", title="Three", link="https://x/3.mp3", pubDate=None, path=None),  # noqa: E501
+    ]
+
+    remote, skipped = render_m3u(entries)
+    assert skipped == 0
+    assert remote.splitlines() == [
+        "#EXTM3U",
+        "#EXTINF:-1,A - One Two",
+        "https://x/1.mp3",
+        "#EXTINF:-1,B - Three",
+        "https://x/3.mp3",
+    ]
+
+    local, skipped = render_m3u(entries, local=True)
+    assert skipped == 1
+    assert local.splitlines()[-1] == "/tmp/1.mp3"
@@ -0,0 +1,94 @@
+import json
+import threading
+
+import pytest
+
+from podcast_cli.controllers.profiling import (
+    PROFILER,
+    NO_OP,
+    span,
+    feed_context,
+    count,
+    render_report
+)
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.enable()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def test_span_is_a_no_op_when_disabled():
+    PROFILER.reset()
+
+    with span("fetch") as s:
+        count("bytes_fetched", 10)
+
+    assert s is NO_OP
+    assert PROFILER.report()["stages"] == {}
+    assert PROFILER.report()["counters"] == {}
+
+
+def test_span_records_calls_and_counters(profiler):
+    for _ in range(3):
+        with span("parse"):
+            pass
+    count("rows_written", 2)
+    count("rows_written", 3)
+
+    report = profiler.report()
+    assert report["stages"]["parse"]["calls"] == 3
+    assert report["counters"] == {"rows_written": 5}
+    assert report["feeds"] == {}
+
+
+def test_feed_context_is_per_thread(profiler):
+    def work(feed: str, size: int):
+        with feed_context(feed):
+            with span("fetch"):
+                count("bytes_fetched", size)
+
+    threads = [
+        threading.Thread(target=work, args=("One", 100)),
+        threading.Thread(target=work, args=("Two", 200)),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    report = profiler.report()
+    assert report["stages"]["fetch"]["calls"] == 2
+    assert report["counters"]["bytes_fetched"] == 300
+    assert report["feeds"]["One"]["counters"]["bytes_fetched"] == 100
+    assert report["feeds"]["Two"]["counters"]["bytes_fetched"] == 200
+    assert report["feeds"]["One"]["stages"]["fetch"]["calls"] == 1
+    assert set(report["feeds"]["One"]["stages"]["fetch"]) == {"calls", "wall", "cpu"}  # noqa: E501
+    assert profiler.current_feed() is None
+
+
+def test_render_report(profiler):
+    with feed_context("One"):
+        with span("insert"):
+            count("rows_written", 1)
+
+    report = profiler.report()
+    table: str = render_report(report)
+    assert "insert" in table and "One" in table and "total" in table
+    assert table.count("cpu (s)") == 2
+    assert json.loads(render_report(report, "json"))["counters"] == {
+        "rows_written": 1
+    }
+
+
+def test_feed_stage_named_like_a_counter_stays_apart(profiler):
+    with feed_context("One"):
+        with span("rows_written"):
+            count("rows_written", 7)
+
+    feed = profiler.report()["feeds"]["One"]
+    assert feed["counters"] == {"rows_written": 7}
+    assert feed["stages"]["rows_written"]["calls"] == 1
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from typing import List
+import threading
+import time
+
+from podcast_cli.controllers.refresh import refresh_feeds, interleave_by_host
+from podcast_cli.models.custom_types import FeedRefreshResult
+
+
+def make_podcasts() -> List[SimpleNamespace]:
+    return [
+        SimpleNamespace(id=1, title="One", link="https://a.example.com/1"),
+        SimpleNamespace(id=2, title="Two", link="https://a.example.com/2"),
+        SimpleNamespace(id=3, title="Three", link="https://a.example.com/3"),
+        SimpleNamespace(id=4, title="Four", link="https://b.example.com/4"),
+    ]
+
+
+def test_interleave_by_host():
+    ordered = interleave_by_host(make_podcasts())
+
+    assert [p.id for p in ordered] == [1, 4, 2, 3]
+
+
+def test_refresh_feeds_returns_every_result():
+    results: List[FeedRefreshResult] = list(
+        refresh_feeds(make_podcasts(), lambda p: p.id * 10, jobs=4)
+    )
+
+    assert sorted(r["result"] for r in results) == [10, 20, 30, 40]
+    assert all(r["error"] is None for r in results)
+
+
+def test_refresh_feeds_respects_per_host_limit():
+    lock = threading.Lock()
+    in_flight: dict = {"now": 0, "peak": 0}
+
+    def fetch(podcast):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["now"] -= 1
+        return podcast.id
+
+    podcasts = [p for p in make_podcasts() if "a.example" in p.link]
+    list(refresh_feeds(podcasts, fetch, jobs=8, per_host=1))
+
+    assert in_flight["peak"] == 1
+
+
+def test_refresh_feeds_reports_errors():
+    def fetch(podcast):
+        if podcast.id == 2:
+            raise ValueError("bad feed")
+        return podcast.id
+
+    results: List[FeedRefreshResult] = list(
+        refresh_feeds(make_podcasts(), fetch)
+    )
+    failed = [r for r in results if r["error"] is not None]
+
+    assert len(results) == 4
+    assert len(failed) == 1
+    assert failed[0]["podcast"].id == 2
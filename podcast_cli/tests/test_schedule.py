@@ -0,0 +1,87 @@
+from typing import List
+
+import pytest
+
+from podcast_cli.models.database_models import PodcastModel, ScheduleModel
+from podcast_cli.controllers import schedule
+from podcast_cli.controllers.ingest import ingest_episodes, DEFAULT_CHUNK_SIZE
+from podcast_cli.controllers.schedule import (
+    due_podcasts,
+    estimate_cadence,
+    load_pubdate_history,
+    plan_next_check,
+    reschedule,
+    MAX_INTERVAL,
+    MIN_INTERVAL
+)
+from podcast_cli.tests.conftest import make_podcast, make_episode
+
+
+HOUR: int = 60 * 60
+DAY: int = 24 * HOUR
+NOW: int = 1600000000
+
+
+def releases(every: int, count: int, last: int = NOW) -> List[int]:
+    return [last - every * n for n in range(count)]
+
+
+def test_estimate_cadence_uses_the_median_gap():
+    assert estimate_cadence([]) is None
+    assert estimate_cadence(releases(DAY, 2)) is None
+    # NOTE: a bonus episode two hours after a regular one.
+    assert estimate_cadence([NOW + 2 * HOUR] + releases(7 * DAY, 5)) == 7 * DAY  # noqa: E501
+
+
+def test_plan_next_check():
+    # too little history, check every run.
+    assert plan_next_check([NOW], NOW) == (MIN_INTERVAL, NOW + MIN_INTERVAL)
+    # daily show, four checks a release.
+    assert plan_next_check(releases(DAY, 5), NOW) == (6 * HOUR, NOW + 6 * HOUR)  # noqa: E501
+    # monthly show, capped at once a day.
+    assert plan_next_check(releases(30 * DAY, 5), NOW) == (MAX_INTERVAL, NOW + DAY)  # noqa: E501
+    # weekly show due out in three hours, check then.
+    weekly = releases(7 * DAY, 5, last=NOW - 7 * DAY + 3 * HOUR)
+    assert plan_next_check(weekly, NOW) == (MAX_INTERVAL, NOW + 3 * HOUR)
+    # ... but never sooner than the next run.
+    weekly = releases(7 * DAY, 5, last=NOW - 7 * DAY + 60)
+    assert plan_next_check(weekly, NOW) == (MAX_INTERVAL, NOW + HOUR)
+
+
+def make_show(title: str, every: int, count: int) -> PodcastModel:
+    podcast: PodcastModel = make_podcast(title, title=title)
+    ingest_episodes(podcast, [
+        make_episode(n, title, pubDate=pubdate)
+        for n, pubdate in enumerate(releases(every, count))
+    ])
+    return podcast
+
+
+# NOTE: 1 puts every podcast in its own chunk of the IN (...) lookups.
+@pytest.mark.parametrize("chunk_size", [DEFAULT_CHUNK_SIZE, 1])
+def test_reschedule_and_due(memory_db, monkeypatch, chunk_size):
+    monkeypatch.setattr(schedule, "DEFAULT_CHUNK_SIZE", chunk_size)
+    daily = make_show("daily", DAY, 20)
+    monthly = make_show("monthly", 30 * DAY, 3)
+    empty = make_show("empty", DAY, 0)
+
+    history = load_pubdate_history([daily, monthly, empty], history=3)
+    assert history == {
+        daily.id: releases(DAY, 3),
+        monthly.id: releases(30 * DAY, 3),
+    }
+
+    # never checked, so everything is due.
+    assert due_podcasts([daily, monthly, empty], NOW) == ([daily, monthly, empty], [])  # noqa: E501
+
+    reschedule([daily, monthly, empty], NOW)
+    reschedule([daily], NOW)
+    assert ScheduleModel.select().count() == 3
+
+    later: int = NOW + 2 * HOUR
+    assert due_podcasts([daily, monthly, empty], later) == ([empty], [daily, monthly])  # noqa: E501
+    later = NOW + 6 * HOUR - 60
+    assert due_podcasts([daily, monthly, empty], later) == ([daily, empty], [monthly])  # noqa: E501
+
+    monthly.delete_instance(recursive=True)
+    assert ScheduleModel.select().count() == 2
@@ -0,0 +1,73 @@
+from typing import List
+
+import pytest
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeSearchModel
+from podcast_cli.controllers.ingest import ingest_episodes
+from podcast_cli.controllers.search import (
+    clean_snippet,
+    fts_query,
+    search_episodes
+)
+from podcast_cli.tests.conftest import make_podcast, make_episode
+
+
+@pytest.fixture
+def parent(memory_db) -> PodcastModel:
+    podcast: PodcastModel = make_podcast(title="Planet Money")
+    ingest_episodes(podcast, [
+        make_episode(1, title="Opening Schools", description="<p>Emily Oster looks at <b>risk</b>.</p>"),  # noqa: E501
+        make_episode(2, title="Rigging The Economy", description="Two guys talk about schools."),  # noqa: E501
+        make_episode(3, title="Caste In Silicon Valley", description="Tech companies."),  # noqa: E501
+    ])
+    return podcast
+
+
+def titles(text: str, **kwargs) -> List[str]:
+    return [r["title"] for r in search_episodes(text, start_mark="", end_mark="", **kwargs)]  # noqa: E501
+
+
+def test_search_ranks_title_matches_first(parent):
+    results = search_episodes("schools")
+
+    assert [r["title"] for r in results] == [
+        "Opening [Schools]",
+        "Rigging The Economy",
+    ]
+    assert results[1]["snippet"] == "Two guys talk about [schools]."
+    assert results[0]["podcast"] == "Planet Money"
+
+
+def test_search_prefix_and_filters(parent):
+    assert titles("silic*") == ["Caste In Silicon Valley"]
+    assert titles("risk") == ["Opening Schools"]
+    assert titles("schools", podcast=parent.id + 1) == []
+
+
+def test_index_follows_updates_and_removal(parent):
+    ingest_episodes(parent, [
+        make_episode(3, title="Caste In Tech", description="Tech companies.")
+    ])
+    assert titles("silicon") == []
+    assert titles("caste") == ["Caste In Tech"]
+
+    parent.delete_instance(recursive=True)
+    assert titles("tech") == []
+    assert EpisodeSearchModel.select().where(EpisodeSearchModel.match("tech")).count() == 0  # noqa: E501
+
+
+def test_fts_query_escapes_input():
+    assert fts_query('planet "mon*" OR -x') == '"planet" "mon"* "OR" "x"'
+    with pytest.raises(ValueError):
+        fts_query('"( )')
+
+
+def test_clean_snippet():
+    assert clean_snippet('ref="x">Some <b>bold</b> text <a hr') == "Some bold text"  # noqa: E501
+
+
+def test_clean_snippet_keeps_highlight_marks():
+    marks = ("[", "]")
+    assert clean_snippet("[win]s > losses <b>ok</b>", marks) == "[win]s > losses ok"  # noqa: E501
+    assert clean_snippet("x < [y] > z", marks) == "x < [y] > z"
+    assert clean_snippet('ref="x">[a] <i>b', marks) == "[a] b"
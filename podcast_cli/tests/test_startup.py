@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+
+REPO_ROOT: str = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+NETWORK_STACK: List[str] = ["requests", "lxml", "arrow"]
+READ_ONLY_COMMANDS: List[List[str]] = [
+    ["podcast-list"],
+    ["podcast-inspect", "1"],
+    ["podcast-list-episodes", "1"],
+    ["podcast-list-latest-episodes"],
+]
+
+# NOTE: Runs a command in a fresh interpreter and reports which of the
+#       heavy modules got imported along the way.
+PROBE: str = """
+import json, sys
+sys.path.insert(0, {root!r})
+import main
+from click.testing import CliRunner
+result = CliRunner().invoke(main.cli, {args!r})
+print(json.dumps({{
+    "exit_code": result.exit_code,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe(args: List[str], tmp_path) -> dict:
+    env: dict = dict(os.environ, HOME=str(tmp_path))
+    out = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            PROBE.format(root=REPO_ROOT, args=args, heavy=NETWORK_STACK)
+        ],
+        cwd=str(tmp_path),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("args", READ_ONLY_COMMANDS)
+def test_read_only_commands_skip_network_stack(args, tmp_path):
+    probe: dict = run_probe(args, tmp_path)
+
+    assert probe["exit_code"] == 0
+    assert probe["loaded"] == []
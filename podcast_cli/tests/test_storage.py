@@ -0,0 +1,58 @@
+import os
+
+from peewee import SqliteDatabase  # type: ignore
+
+from podcast_cli.models.storage import (
+    load_storage_config,
+    configure_database,
+    StorageConfig,
+    MEMORY_PATH
+)
+
+
+def test_storage_config_precedence(tmp_path, monkeypatch):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text(
+        "[storage]\npath = /from/file.db\ncache_size = -2000\nsynchronous = full\n"  # noqa: E501
+    )
+    monkeypatch.setenv("PODCAST_CLI_SYNCHRONOUS", "off")
+    monkeypatch.delenv("PODCAST_CLI_DB", raising=False)
+
+    from_file: StorageConfig = load_storage_config(
+        config_file=str(config_file)
+    )
+    from_flag: StorageConfig = load_storage_config(
+        path="~/flag.db",
+        config_file=str(config_file)
+    )
+
+    assert from_file["path"] == "/from/file.db"
+    assert from_file["cache_size"] == -2000
+    assert from_file["synchronous"] == "off"
+    assert from_file["journal_mode"] == "wal"
+    assert from_flag["path"] == os.path.expanduser("~/flag.db")
+
+
+def test_configure_database_sets_pragmas(tmp_path):
+    config: StorageConfig = load_storage_config(
+        path=str(tmp_path / "nested" / "datastore.db"),
+        config_file=str(tmp_path / "missing.ini")
+    )
+    database: SqliteDatabase = configure_database(SqliteDatabase(None), config)
+    database.connect()
+
+    assert database.journal_mode == "wal"
+    assert database.execute_sql("PRAGMA busy_timeout").fetchone()[0] == 5000
+    database.close()
+
+
+def test_configure_database_in_memory(tmp_path):
+    config: StorageConfig = load_storage_config(
+        path=MEMORY_PATH,
+        config_file=str(tmp_path / "missing.ini")
+    )
+    database: SqliteDatabase = configure_database(SqliteDatabase(None), config)
+    database.connect()
+
+    assert database.database == MEMORY_PATH
+    database.close()
@@ -0,0 +1,119 @@
+import os
+from typing import List
+
+import pytest
+
+from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import EpisodeType, IngestReport
+from podcast_cli.controllers.parser import parse_podcast_episodeset
+from podcast_cli.controllers.ingest import ingest_episodes
+from podcast_cli.controllers.sync import (
+    find_new_episodes,
+    load_known_guids,
+    DEFAULT_KNOWN_RUN
+)
+from podcast_cli.tests.conftest import make_podcast
+
+
+TEST_XML = os.path.join(os.getcwd(), "test_xml_planet_money.xml")
+
+
+def read_feed() -> bytes:
+    with open(TEST_XML, "rb") as F:
+        return F.read()
+
+
+def test_sync_adds_every_missing_episode(memory_db):
+    contents: bytes = read_feed()
+    everything: List[EpisodeType] = parse_podcast_episodeset(contents)
+    parent: PodcastModel = make_podcast()
+    # NOTE: pretend the last three releases were missed.
+    ingest_episodes(parent, everything[3:])
+
+    known = load_known_guids([parent])[parent.id]
+    report: IngestReport = ingest_episodes(
+        parent,
+        find_new_episodes(contents, known)
+    )
+
+    assert sorted(report["new_guids"]) == sorted(
+        ep["guid"] for ep in everything[:3]
+    )
+    assert EpisodeModel.select().count() == len(everything)
+
+
+def test_find_new_episodes_stops_once_caught_up():
+    contents: bytes = read_feed()
+    everything: List[EpisodeType] = parse_podcast_episodeset(contents)
+    known: set = {ep["guid"] for ep in everything[1:]}
+
+    assert find_new_episodes(contents, known, known_run=5) == everything[:1]
+    assert find_new_episodes(contents, set(), known_run=5) == everything
+
+
+def test_load_known_guids(memory_db):
+    parent: PodcastModel = make_podcast()
+    ingest_episodes(parent, parse_podcast_episodeset(read_feed())[:4])
+
+    known = load_known_guids([parent])
+
+    assert len(known[parent.id]) == 4
+
+
+def test_find_new_episodes_reads_oldest_first_feeds_to_the_end():
+    contents: bytes = read_feed()
+    everything: List[EpisodeType] = parse_podcast_episodeset(contents)
+    items: List[bytes] = contents.split(b"<item>")
+    # NOTE: the same feed with its items reversed, oldest first.
+    tail: bytes = items[-1][items[-1].index(b"</item>") + len(b"</item>"):]
+    bodies: List[bytes] = [
+        item[:item.index(b"</item>") + len(b"</item>")]
+        for item in items[1:]
+    ]
+    reversed_feed: bytes = items[0] + b"".join(
+        b"<item>" + body for body in reversed(bodies)
+    ) + tail
+    known: set = {ep["guid"] for ep in everything[3:]}
+
+    found = find_new_episodes(reversed_feed, known, known_run=5)
+
+    assert sorted(ep["guid"] for ep in found) == sorted(
+        ep["guid"] for ep in everything[:3]
+    )
+
+
+def make_feed(items: List[int]) -> bytes:
+    """
+    A minimal feed with one <item> per number, in the order given. Higher
+    numbers are newer.
+    """
+    return (
+        b"<rss><channel><title>Feed</title>"
+        + b"".join(
+            "<item><title>{0}</title><guid>guid-{0}</guid>"
+            "<pubDate>{1}</pubDate>"
+            '<enclosure url="https://example.com/{0}.mp3"/></item>'.format(
+                n,
+                "Fri, {:02d} Oct 2020 10:00:00 GMT".format(n)
+            ).encode("utf-8")
+            for n in items
+        )
+        + b"</channel></rss>"
+    )
+
+
+@pytest.mark.parametrize("newest_first", [True, False])
+def test_find_new_episodes_in_either_order(newest_first):
+    # NOTE: 30 episodes, the 25 oldest of them already stored. More known
+    #       episodes than DEFAULT_KNOWN_RUN sit between the start of an
+    #       oldest-first feed and its new episodes.
+    numbers: List[int] = list(range(1, 31))
+    if newest_first:
+        numbers.reverse()
+    known: set = {"guid-{}".format(n) for n in range(1, 26)}
+
+    found = find_new_episodes(make_feed(numbers), known, DEFAULT_KNOWN_RUN)
+
+    assert sorted(ep["guid"] for ep in found) == sorted(
+        "guid-{}".format(n) for n in range(26, 31)
+    )
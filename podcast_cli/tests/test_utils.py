@@ -4,8 +4,10 @@ import os
 
 import pytest
 
-from podcast_cli.views.utils import exclude_keys, prep_ep_for_report
-from podcast_cli.models.custom_types import EpisodeType
+from podcast_cli.views.utils import (
+    exclude_keys,
+    stream_table
+)
 
 
 def test_exlclude_keys():
@@ -23,18 +25,16 @@ def test_exlclude_keys():
     assert "key3" not in new_dict
 
 
-def test_prep_ep():
-    podcast: dict = {
-        "pk": 25,
-        "title": "Test Podcast 1",
-        "description": "Hello World One Two Three",
-        "link": "https://www.google.com",
-        "guid": "abcd-efgh-lkc-12345",
-        "pubDate": 1603002506,
-        "podcast": {"title": "Planet Money"},
-    }
-
-    new_cast: EpisodeType = prep_ep_for_report(podcast)
+def test_stream_table():
+    lines = list(stream_table(
+        iter([{"id": 1, "title": "A rather\nlong title"}]),
+        [("id", 3), ("title", 10)]
+    ))
 
-    assert "description" not in new_cast.keys()
-    assert "link" not in new_cast.keys()
+    assert lines == [
+        "+-----+------------+",
+        "| id  | title      |",
+        "+=====+============+",
+        "| 1   | A rathe... |",
+        "+-----+------------+",
+    ]
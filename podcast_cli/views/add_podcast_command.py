@@ -2,20 +2,24 @@ from typing import List, Dict
 
 import click
 from tabulate import tabulate
-from bs4 import BeautifulSoup                       # type: ignore
-from playhouse.shortcuts import model_to_dict       # type: ignore
 from peewee import DoesNotExist                     # type: ignore
 
 from podcast_cli.controllers.parser import (
-    parse_podcast_xml,
-    parse_podcast_metadata,
-    parse_podcast_episodeset,
+    fetch_podcast_feed,
     insert_to_db
 )
+from podcast_cli.controllers.feed_cache import save_feed_cache
+from podcast_cli.controllers.playlist import add_to_playlist
+from podcast_cli.controllers.podcasts import podcast_record
+from podcast_cli.controllers.profiling import span
+from podcast_cli.controllers.archive import archive_feed, load_archived_feed
+from podcast_cli.controllers.parse_cache import parse_feed_cached
 from podcast_cli.models.custom_types import (
     PodcastType,
     PodcastEpisodeBundle,
-    EpisodeType
+    EpisodeType,
+    FeedResponse,
+    IngestReport
 )
 from podcast_cli.models.database_models import PodcastModel
 from podcast_cli.views.utils import exclude_keys
@@ -25,9 +29,28 @@ from podcast_cli.views.utils import exclude_keys
 # the podcast name and metadata out.
 @click.command()
 @click.argument("url")
-def podcast_add(url: str):
-    soup: BeautifulSoup = parse_podcast_xml(url)
-    cast: PodcastType = parse_podcast_metadata(soup)
+@click.option("--offline", is_flag=True, help="Parse the feed's newest archived copy instead of fetching it.")  # noqa: E501
+def podcast_add(url: str, offline: bool):
+    # NOTE: Checked before fetching anything, re-adding a feed by the same
+    #       url shouldn't cost a download and a parse to turn down.
+    if PodcastModel.select().where(PodcastModel.link == url).exists():
+        click.echo("This podcast already exists in our system!")
+        return
+
+    if offline:
+        try:
+            feed: FeedResponse = load_archived_feed(url)
+        except IOError as e:
+            raise click.ClickException(str(e))
+    else:
+        feed = fetch_podcast_feed(url)
+        archive_feed(feed)
+    # NOTE: Parsed in full up front, rather than the metadata first, since
+    #       a feed that's been parsed before (re-added, or --offline) is a
+    #       cache load either way.
+    cast: PodcastType
+    raw_episodes: List[EpisodeType]
+    cast, raw_episodes = parse_feed_cached(feed)
 
     # NOTE: This is a guard to ensure that podcasts don't get added twice
     try:
@@ -40,18 +63,23 @@ def podcast_add(url: str):
     # NOTE: I've decided i want the link to be to the rss feed and not
     # to the homepage. The override is out here.
     cast["link"] = url
-    raw_episodes: List[EpisodeType] = parse_podcast_episodeset(soup)
 
     bundle: PodcastEpisodeBundle = insert_to_db(cast, raw_episodes)
-    parent: Dict = model_to_dict(bundle[0])
-
-    episodes: List[Dict] = [model_to_dict(ep) for ep in bundle[1]]
+    # NOTE: Remembering the validators now means the first podcast_update
+    #       can already get away with a 304.
+    if not offline:
+        save_feed_cache(bundle[0], feed)
+    parent: Dict = podcast_record(bundle[0])._asdict()
+    report: IngestReport = bundle[1]
+    add_to_playlist(report["new_guids"])
 
     # NOTE: printing large bodies of text through tabulate breaks it
     #       in terrible ways. to mitigate this I will
     #       exclude them selectively, manually.
     podcastoutput: dict = exclude_keys(parent, ["description"])
 
-    podcastoutput["episode_count"] = len(episodes)
+    podcastoutput["episode_count"] = report["inserted"]
+    podcastoutput["skipped"] = report["skipped"]
     click.echo("Below is a summary of the podcasts added")
-    click.echo(tabulate([podcastoutput], headers="keys", tablefmt="grid"))
+    with span("render"):
+        click.echo(tabulate([podcastoutput], headers="keys", tablefmt="grid"))
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+
+import click
+from tabulate import tabulate
+
+from podcast_cli.models.database_models import (
+    PodcastModel,
+    EpisodeModel,
+    DownloadModel
+)
+from podcast_cli.models.custom_types import DownloadJob
+from podcast_cli.controllers.episodes import get_latest_per_podcast
+from podcast_cli.controllers.downloader import (
+    download_episodes,
+    load_download_states,
+    parse_rate,
+    plan_downloads,
+    record_download,
+    RateLimiter,
+    DEFAULT_DOWNLOAD_JOBS
+)
+from podcast_cli.controllers.profiling import span
+from podcast_cli.controllers.httpclient import get_session
+
+
+@click.command()
+@click.option("--pk", default=None, help="Only download episodes of the podcast with this id.")  # noqa: E501
+@click.option("--episode", "episode_pk", default=None, help="Download the episode with this id.")  # noqa: E501
+@click.option("--latest", default=1, help="Number of each podcast's newest episodes to download.")  # noqa: E501
+@click.option("--jobs", default=DEFAULT_DOWNLOAD_JOBS, help="Number of episodes to download at the same time.")  # noqa: E501
+@click.option("--limit-rate", default=None, help="Cap on total bandwidth in bytes per second, i.e 500K or 2M.")  # noqa: E501
+def podcast_download(
+    pk: Optional[int],
+    episode_pk: Optional[int],
+    latest: int,
+    jobs: int,
+    limit_rate: Optional[str]
+):
+    """
+    Downloads episodes into ~/.podcasts/<podcast>/, by default the newest
+    one of every podcast. Interrupted downloads pick up where they left
+    off the next time around, and finished ones are skipped.
+    """
+    try:
+        rate: Optional[int] = parse_rate(limit_rate)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--limit-rate")
+
+    # NOTE: joining on PodcastModel here means the download threads never
+    #       have to go back to the db for episode.podcast.title.
+    query = EpisodeModel.select(EpisodeModel, PodcastModel).join(PodcastModel)
+    if episode_pk:
+        query = query.where(EpisodeModel.id == episode_pk)
+    else:
+        query = query.where(EpisodeModel.id.in_([
+            ep["pk"] for ep in get_latest_per_podcast(latest)
+        ]))
+    if pk:
+        query = query.where(PodcastModel.id == pk)
+    episodes: List[EpisodeModel] = list(query.order_by(EpisodeModel.pubDate.desc()))  # noqa: E501
+
+    if not episodes:
+        click.echo("Nothing to download.")
+        return
+
+    states: Dict[int, DownloadModel] = load_download_states(episodes)
+    queue: List[DownloadJob] = plan_downloads(episodes, states)
+    already: int = len(episodes) - len(queue)
+    if already:
+        click.echo("{} episode(s) already downloaded.".format(already))
+    if not queue:
+        return
+
+    with DownloadModel._meta.database.atomic():
+        for job in queue:
+            record_download(job, "downloading")
+
+    summary: List[Dict] = []
+    limiter: RateLimiter = RateLimiter(rate)
+    # NOTE: the shared session, so downloads after an update reuse its
+    #       connections to hosts that serve both feeds and media.
+    for outcome in download_episodes(queue, get_session(), jobs, limiter=limiter):  # noqa: E501
+        job: DownloadJob = outcome["job"]
+        title: str = job["episode"].title
+        if outcome["error"] is not None:
+            click.echo("Failed to download {}: {}".format(title, outcome["error"]))  # noqa: E501
+            record_download(job, "failed", str(outcome["error"]))
+            status: str = "failed"
+        else:
+            click.echo("Downloaded {}".format(title))
+            record_download(job, "done")
+            status = "resumed" if outcome["result"]["resumed"] else "done"
+        summary.append({
+            "pk": job["episode"].id,
+            "podcast": job["episode"].podcast.title,
+            "title": title,
+            "status": status,
+            "path": job["path"],
+        })
+
+    with span("render"):
+        click.echo(tabulate(summary, headers="keys", tablefmt="grid"))
@@ -1,22 +1,26 @@
+from typing import List
+
 import click
 from tabulate import tabulate
 from peewee import DoesNotExist                 # type: ignore
-from playhouse.shortcuts import model_to_dict   # type: ignore
 
-from podcast_cli.models.database_models import PodcastModel
-from podcast_cli.views.utils import exclude_keys
+from podcast_cli.models.custom_types import Podcast
+from podcast_cli.controllers.podcasts import get_one_podcast
+from podcast_cli.views.utils import pick_fields
 
 
 @click.command()
 @click.argument("pk")
 def podcast_inspect(pk: int):
     try:
-        cast: PodcastModel = PodcastModel.get(PodcastModel.id == pk)
+        cast: Podcast = get_one_podcast(pk)
     except DoesNotExist:
         click.echo("Podcast with id # {} does not exist!".format(pk))
         return
 
-    dict_cast: dict = model_to_dict(cast)
-    filtered_cast: dict = exclude_keys(dict_cast, ["description"])
-
-    click.echo(tabulate([filtered_cast], headers="keys", tablefmt="grid"))
+    fields: List[str] = ["pk", "title", "link", "guid"]
+    click.echo(tabulate(
+        pick_fields([cast], fields),
+        headers=fields,
+        tablefmt="grid"
+    ))
@@ -0,0 +1,58 @@
+from importlib import import_module
+from typing import Callable, Dict, List, Optional
+
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    A click.Group that only imports a command's module when that command is
+    actually invoked.
+
+    Commands are registered as "command-name": "module.path:attribute", so
+    running podcast-list never pulls in requests / lxml just because
+    podcast-add happens to need them.
+
+    delegate, if given, gets a look at every invocation before the group's
+    own callback runs, i.e to hand it to a running daemon (see
+    controllers/daemon.py). It's called with the group's context and the
+    subcommand's argv, and returns an exit code if it dealt with the
+    invocation or None to carry on as normal.
+    """
+    def __init__(
+        self,
+        *args,
+        lazy_commands: Optional[Dict[str, str]] = None,
+        delegate: Optional[Callable[[click.Context, List[str]], Optional[int]]] = None,  # noqa: E501
+        **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands: Dict[str, str] = lazy_commands or {}
+        self.delegate = delegate
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(
+            set(super().list_commands(ctx)) | set(self.lazy_commands.keys())
+        )
+
+    def get_command(
+        self,
+        ctx: click.Context,
+        cmd_name: str
+    ) -> Optional[click.Command]:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_path, attribute = self.lazy_commands[cmd_name].split(":")
+            command: click.Command = getattr(
+                import_module(module_path),
+                attribute
+            )
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def invoke(self, ctx: click.Context):
+        argv: List[str] = ctx.protected_args + ctx.args
+        if self.delegate is not None and argv:
+            exit_code: Optional[int] = self.delegate(ctx, argv)
+            if exit_code is not None:
+                ctx.exit(exit_code)
+        return super().invoke(ctx)
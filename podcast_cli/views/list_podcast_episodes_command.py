@@ -1,43 +1,66 @@
-from typing import List, Dict
+from typing import Iterator, List, Optional, Tuple
 
 import click
-from tabulate import tabulate
 from peewee import DoesNotExist                     # type: ignore
-from peewee import ModelObjectCursorWrapper         # type: ignore
-from playhouse.shortcuts import model_to_dict       # type: ignore
 
-from podcast_cli.models.database_models import PodcastModel, EpisodeModel
+from podcast_cli.models.custom_types import Podcast
 from podcast_cli.controllers.podcasts import get_one_podcast
-from podcast_cli.views.utils import exclude_keys
+from podcast_cli.controllers.episodes import (
+    decode_cursor,
+    format_pubdate,
+    iter_episodes,
+    EpisodeCursor
+)
+from podcast_cli.controllers.profiling import span
+from podcast_cli.views.utils import stream_table
+
+
+COLUMNS: List[Tuple[str, int]] = [("id", 7), ("title", 60), ("pubDate", 25)]
 
 
 @click.command()
 @click.argument("pk")
-def podcast_list_episodes(pk: int):
+@click.option("--limit", default=None, type=int, help="Show at most this many episodes.")  # noqa: E501
+@click.option("--after", default=None, help="Start after this cursor, as printed at the end of the previous page.")  # noqa: E501
+def podcast_list_episodes(pk: int, limit: Optional[int], after: Optional[str]):
     try:
         # parent: PodcastModel = PodcastModel.get_by_id(pk)
         # NOTE: the exceptions will bubble up, won't they?
-        parent: PodcastModel = get_one_podcast(pk)
+        parent: Podcast = get_one_podcast(pk)
         click.echo(
-            "Listing all recorded episodes for podcast {}".format(parent["title"])
+            "Listing all recorded episodes for podcast {}".format(parent.title)
         )
     except DoesNotExist:
         click.echo("No podcast with that id exists. Check id and try again.")
         return
 
-    # TODO: Write the episode thing getter
-    q: ModelObjectCursorWrapper = (
-        EpisodeModel.select()
-                    .where(EpisodeModel.podcast.id == parent["pk"])
-                    .execute()
-    )
-    raw_episodes: List[EpisodeModel] = [ep for ep in q]
-
-    dict_episodes: List[Dict] = [model_to_dict(ep) for ep in raw_episodes]
-    # TODO: refactor this to use the new prep_ep_for_report() function.
-    filtered_dict: List[Dict] = [
-        exclude_keys(ep, ["description", "podcast", "link", "guid"])
-        for ep in dict_episodes
-    ]
-
-    click.echo(tabulate(filtered_dict, headers="keys", tablefmt="grid"))
+    cursor: Optional[EpisodeCursor] = None
+    if after:
+        try:
+            cursor = decode_cursor(after)
+        except ValueError:
+            raise click.BadParameter("expected <pubDate>:<id>", param_hint="--after")  # noqa: E501
+
+    # NOTE: rows are printed as the cursor hands them over rather than
+    #       collected for tabulate(), so a podcast with thousands of
+    #       episodes starts printing straight away and memory stays flat.
+    shown: int = 0
+    last: Optional[str] = None
+
+    def rows() -> Iterator[dict]:
+        nonlocal shown, last
+        for ep in iter_episodes(parent.pk, limit, cursor):
+            shown += 1
+            last = ep["cursor"]
+            yield {
+                "id": ep["pk"],
+                "title": ep["title"],
+                "pubDate": format_pubdate(ep["pubDate"]),
+            }
+
+    with span("render"):
+        for line in stream_table(rows(), COLUMNS):
+            click.echo(line)
+
+    if limit and shown == limit:
+        click.echo("More episodes: --after {}".format(last))
@@ -1,11 +1,12 @@
+from itertools import groupby
 from typing import List
 
 from tabulate import tabulate
 import click
 
-from podcast_cli.models.database_models import PodcastModel
 from podcast_cli.models.custom_types import EpisodeType
-from podcast_cli.views.utils import get_latest_number
+from podcast_cli.controllers.episodes import get_latest_per_podcast
+from podcast_cli.controllers.profiling import span
 
 
 @click.command()
@@ -26,10 +27,10 @@ def podcast_list_latest_episodes(count: int):
         nothing.
     """
     click.echo("Examining local database.")
-    pcs: List[PodcastModel] = PodcastModel.select()
+    # NOTE: the goal is to get the first 5 for every podcast, which is now
+    #       one windowed query rather than one query per podcast.
+    eps: List[EpisodeType] = get_latest_per_podcast(count)
 
-    # NOTE: the goal is to get the first 5 for every podcast.
-    eps: List[List[EpisodeType]] = [get_latest_number(pc, count) for pc in pcs]
-
-    for ep in eps:
-        click.echo(tabulate(ep, headers="keys", tablefmt="grid"))
+    with span("render"):
+        for _, podcast_eps in groupby(eps, key=lambda ep: ep["podcast"]):
+            click.echo(tabulate(list(podcast_eps), headers="keys", tablefmt="grid"))  # noqa: E501
@@ -0,0 +1,67 @@
+import os
+from typing import Dict, List
+
+import click
+from tabulate import tabulate
+
+from podcast_cli.models.custom_types import OpmlFeed, OpmlImportResult
+from podcast_cli.controllers.opml import import_opml, parse_opml, render_opml
+from podcast_cli.controllers.podcasts import get_all_podcasts
+from podcast_cli.controllers.refresh import DEFAULT_JOBS
+from podcast_cli.controllers.profiling import span
+
+
+@click.command()
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, allow_dash=True))  # noqa: E501
+@click.option("--jobs", default=DEFAULT_JOBS, help="Number of feeds to fetch at the same time.")  # noqa: E501
+def podcast_import_opml(path: str, jobs: int):
+    """
+    Subscribes to every podcast in an OPML file, as exported by most
+    podcast apps. Podcasts already subscribed to are skipped without
+    being fetched.
+    """
+    with click.open_file(path, "rb") as F:
+        try:
+            feeds: List[OpmlFeed] = parse_opml(F.read())
+        except (ValueError, SyntaxError) as e:
+            raise click.ClickException("Couldn't read {}: {}".format(path, e))  # noqa: E501
+
+    click.echo("Found {} feeds in {}".format(len(feeds), path))
+    results: List[OpmlImportResult] = import_opml(feeds, jobs=jobs)
+
+    summary: Dict[str, int] = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+
+    fields: List[str] = ["status", "title", "episodes", "url", "error"]
+    with span("render"):
+        click.echo(tabulate(
+            [[r[f] for f in fields] for r in results],
+            headers=fields,
+            tablefmt="grid"
+        ))
+    click.echo("Added {}, already subscribed {}, failed {}.".format(
+        summary.get("added", 0),
+        summary.get("exists", 0),
+        summary.get("failed", 0)
+    ))
+
+
+@click.command()
+@click.option("--output", "-o", default="-", help="File to write the OPML to. Defaults to stdout.")  # noqa: E501
+def podcast_export_opml(output: str):
+    """
+    Writes every subscribed podcast out as an OPML file that other podcast
+    apps can import.
+    """
+    podcasts = get_all_podcasts()
+    with span("render"):
+        document: bytes = render_opml(podcasts)
+
+    if output == "-":
+        click.echo(document, nl=False)
+        return
+
+    with open(os.path.expanduser(output), "wb") as F:
+        F.write(document)
+    click.echo("Wrote {} podcasts to {}".format(len(podcasts), output), err=True)  # noqa: E501
@@ -0,0 +1,57 @@
+import os
+from typing import List, Optional
+
+import click
+
+from podcast_cli.models.custom_types import PlaylistEntry
+from podcast_cli.controllers.playlist import (
+    get_playlist,
+    rebuild_playlist,
+    render_m3u
+)
+from podcast_cli.controllers.profiling import span
+
+
+@click.command()
+@click.option("--output", "-o", default="-", help="File to write the playlist to. Defaults to stdout.")  # noqa: E501
+@click.option("--format", "fmt", type=click.Choice(["m3u", "m3u8"]), default=None, help="Defaults to the --output file's extension, or m3u8.")  # noqa: E501
+@click.option("--local", is_flag=True, help="Point at downloaded files instead of the episode links. Episodes that aren't downloaded are left out.")  # noqa: E501
+@click.option("--rebuild", is_flag=True, help="Build the playlist again from scratch before exporting it.")  # noqa: E501
+def podcast_playlist(
+    output: str,
+    fmt: Optional[str],
+    local: bool,
+    rebuild: bool
+):
+    """
+    Exports the daily playlist, every podcast's newest few episodes with
+    the newest first, as an M3U / M3U8 playlist.
+
+    podcast-update keeps the playlist current as new episodes come in, so
+    this is a single read of a small table.
+    """
+    if rebuild:
+        click.echo("Rebuilt playlist with {} episodes.".format(rebuild_playlist()), err=True)  # noqa: E501
+
+    entries: List[PlaylistEntry] = get_playlist()
+    with span("render"):
+        playlist, skipped = render_m3u(entries, local=local)
+    if skipped:
+        click.echo(
+            "Left out {} episode(s) that aren't downloaded yet, see the download command.".format(skipped),  # noqa: E501
+            err=True
+        )
+
+    if fmt is None:
+        fmt = "m3u" if output.lower().endswith(".m3u") else "m3u8"
+    # NOTE: .m3u8 is M3U in utf-8 by definition, plain .m3u is traditionally
+    #       latin-1 and some players still read it that way.
+    encoding: str = "utf-8" if fmt == "m3u8" else "latin-1"
+
+    if output == "-":
+        click.echo(playlist, nl=False)
+        return
+
+    with open(os.path.expanduser(output), "w", encoding=encoding, errors="replace") as F:  # noqa: E501
+        F.write(playlist)
+    click.echo("Wrote {} episodes to {}".format(len(entries) - skipped, output), err=True)  # noqa: E501
@@ -0,0 +1,49 @@
+from typing import List, Optional, Tuple
+
+import click
+
+from podcast_cli.models.custom_types import SearchResult
+from podcast_cli.controllers.episodes import format_pubdate
+from podcast_cli.controllers.search import (
+    search_episodes,
+    DEFAULT_SEARCH_LIMIT
+)
+from podcast_cli.controllers.profiling import span
+
+
+@click.command()
+@click.argument("words", nargs=-1, required=True)
+@click.option("--limit", default=DEFAULT_SEARCH_LIMIT, help="Show at most this many episodes.")  # noqa: E501
+@click.option("--pk", default=None, type=int, help="Only search the podcast with this id.")  # noqa: E501
+def podcast_search(words: Tuple[str, ...], limit: int, pk: Optional[int]):
+    """
+    Searches the titles and descriptions of every stored episode, best
+    match first. End a word with * to match anything starting with it.
+    """
+    try:
+        results: List[SearchResult] = search_episodes(
+            " ".join(words),
+            limit=limit,
+            podcast=pk,
+            start_mark=click.style("", bold=True, reset=False),
+            end_mark=click.style("", reset=True)
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="WORDS")
+
+    if not results:
+        click.echo("No episodes match.")
+        return
+
+    # NOTE: Not a table, tabulate would have to wrap the snippets and
+    #       wrapping doesn't get along with the bold highlighting.
+    with span("render"):
+        for result in results:
+            click.echo("[{}] {} - {} ({})".format(
+                result["pk"],
+                result["podcast"],
+                result["title"],
+                format_pubdate(result["pubDate"])
+            ))
+            if result["snippet"]:
+                click.echo("    {}".format(result["snippet"]))
@@ -0,0 +1,41 @@
+import signal
+import sys
+from typing import Optional
+
+import click
+
+from podcast_cli.models.database_models import db
+from podcast_cli.controllers.daemon import (
+    socket_path,
+    DaemonServer,
+    DAEMON_COMMANDS
+)
+
+
+@click.command()
+@click.option("--socket", "path", default=None, help="Unix socket to listen on. Defaults to PODCAST_CLI_SOCKET or ~/.podcasts/daemon.sock.")  # noqa: E501
+@click.pass_context
+def podcast_serve(ctx: click.Context, path: Optional[str]):
+    group: click.Context = ctx.parent
+    path = path or socket_path()
+    server: DaemonServer = DaemonServer(
+        path,
+        group.command,
+        group,
+        db,
+        db.database
+    )
+    # NOTE: Import every command the daemon runs now rather than on the
+    #       first request, that's most of the start up it's here to save.
+    for name in DAEMON_COMMANDS:
+        group.command.get_command(group, name)
+
+    # NOTE: so `kill` shuts down as cleanly as ctrl-c, socket file and all.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    click.echo("Serving {} on {}".format(db.database, path), err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,176 +1,257 @@
-from typing import Optional, List
+import time
+from typing import Optional, List, Dict, Set
 
 import click
-import arrow                                        # type: ignore
-from peewee import ModelObjectCursorWrapper         # type: ignore
-from playhouse.shortcuts import model_to_dict       # type: ignore
-from bs4 import BeautifulSoup                       # type: ignore
+from peewee import DoesNotExist                     # type: ignore
 from tabulate import tabulate
 
 from podcast_cli.models.database_models import (
     PodcastModel,
     EpisodeModel
 )
-from podcast_cli.models.custom_types import EpisodeType
-from podcast_cli.views.utils import exclude_keys, prep_ep_for_report
-from podcast_cli.controllers.parser import (
-    parse_podcast_episodeset,
-    parse_podcast_xml
+from podcast_cli.models.custom_types import (
+    Episode,
+    FeedCacheType,
+    FeedResponse,
+    IngestReport,
+    RemoteCheck
+)
+from podcast_cli.views.utils import pick_fields
+from podcast_cli.controllers.episodes import get_episodes_by_guid
+from podcast_cli.controllers.parser import fetch_podcast_feed
+from podcast_cli.controllers.feed_cache import (
+    load_feed_caches,
+    save_feed_cache
+)
+from podcast_cli.controllers.refresh import refresh_feeds, DEFAULT_JOBS
+from podcast_cli.controllers.ingest import (
+    ingest_episodes,
+    load_foreign_guids
+)
+from podcast_cli.controllers.playlist import add_to_playlist
+from podcast_cli.controllers.profiling import span, feed_context
+from podcast_cli.controllers.schedule import due_podcasts, reschedule
+from podcast_cli.controllers.parse_cache import parse_feed_cached
+from podcast_cli.controllers.archive import (
+    archive_feed,
+    load_archived_feed,
+    snapshots
+)
+from podcast_cli.controllers.sync import (
+    load_known_guids,
+    find_new_episodes,
+    DEFAULT_KNOWN_RUN
 )
 
 
-def get_timestamp(some_date: str) -> int:
-    return arrow.get(some_date).timestamp
-
-
-def get_latest_episode_remote(podcast: PodcastModel) -> EpisodeType:
-    click.echo("Fetching latest episode for {}".format(podcast.title))
-    res: BeautifulSoup = parse_podcast_xml(podcast.link)
-    eps: List[EpisodeType] = parse_podcast_episodeset(res)
-    sorted_eps: List[EpisodeType] = sorted(
-        eps,
-        key=lambda x: -(x["pubDate"])
-    )
-    # NOTE: It's worth noting that I probably could just whip up a
-    #       function that only scrapes the first -item- from the XML file
-    #       but at this point it strikes me as premature optimization.
-    #       On top of that, I'm not sure bs4 will preserve the order it
-    #       encounters the items in, so simply taking the first element
-    #       might not be accurate.
-    return sorted_eps[0]
-
-
-def get_latest_episode_local(podcast: PodcastModel) -> EpisodeType:
-    click.echo(
-        "Checking latest stored episode for podcast {}".format(podcast.title)
-    )
-    raw_ep: EpisodeModel = (
-        EpisodeModel.select()
-                    .where(EpisodeModel.podcast == podcast)
-                    .order_by(EpisodeModel.pubDate.desc())
-                    .get()
-    )
-
-    dict_ep: dict = model_to_dict(raw_ep)
-    # ep = exclude_keys(dict_ep, ["description", "link"])
-
-    return EpisodeType(
-        pk=dict_ep.get("id", None),
-        title=dict_ep.get("title", None),
-        description=dict_ep.get("description", None),
-        pubDate=dict_ep.get("pubDate", None),
-        guid=dict_ep.get("guid", None),
-        link=dict_ep.get("link", None),
-    )
-
-
-def is_remote_newer(remote: EpisodeType, local: EpisodeType) -> bool:
-    r_timestamp: int = get_timestamp(remote["pubDate"])
-    l_timestamp: int = get_timestamp(local["pubDate"])
-
-    is_different: bool = remote["guid"] > local["guid"]
-    is_more_recent: bool = r_timestamp > l_timestamp
-
-    if is_different and is_more_recent:
-        return True
-    else:
-        return False
+def check_podcast_remote(
+    podcast: PodcastModel,
+    cache: Optional[FeedCacheType],
+    known_guids: Set[str],
+    known_run: Optional[int] = DEFAULT_KNOWN_RUN,
+    offline: bool = False
+) -> RemoteCheck:
+    """
+    Does a conditional fetch of the podcast's feed and, only if it changed
+    since the last fetch, picks out every episode we don't have yet.
+
+    This runs on refresh_feeds()'s worker threads, so everything it needs
+    from the database is loaded up front and handed in.
+
+    args:
+    podcast - PodcastModel, the podcast to check.
+    cache - FeedCacheType, validators from the last fetch, or None.
+    known_guids - set of guids already stored for this podcast.
+    known_run - int, see find_new_episodes().
+    offline - bool, parse the newest archived copy of the feed instead of
+        fetching it (see controllers/archive.py).
+
+    returns:
+    RemoteCheck, where "episodes" is empty if the feed hasn't changed or
+    has nothing new in it.
+    """
+    click.echo("Checking feed for {}".format(podcast.title))
+    validators: FeedCacheType = cache or FeedCacheType()
+    with feed_context(podcast.title):
+        if offline:
+            feed: FeedResponse = load_archived_feed(podcast.link)
+        else:
+            # NOTE: A feed we have no archived copy of (i.e one last
+            #       fetched before the archive existed) is fetched in full
+            #       once, a 304 would leave nothing to archive.
+            if not snapshots(podcast.link):
+                validators = FeedCacheType()
+            feed = fetch_podcast_feed(
+                podcast.link,
+                etag=validators.get("etag"),
+                last_modified=validators.get("last_modified"),
+                content_hash=validators.get("content_hash")
+            )
+            archive_feed(feed)
+        if feed["not_modified"]:
+            return RemoteCheck(feed=feed, episodes=[])
+
+        # NOTE: An archived feed is read over and over (every --offline
+        #       run), so it's worth parsing in full and caching. A freshly
+        #       fetched one has a body we've never seen, which would be a
+        #       cache miss anyway, and streaming it lets find_new_episodes()
+        #       stop as soon as it's caught up.
+        if offline:
+            _, episodes = parse_feed_cached(feed)
+            return RemoteCheck(
+                feed=feed,
+                episodes=[e for e in episodes if e["guid"] not in known_guids]  # noqa: E501
+            )
+        return RemoteCheck(
+            feed=feed,
+            episodes=find_new_episodes(feed["body"], known_guids, known_run)
+        )
 
 
-# TODO: Split this into two commands
-#       "podcast_update_one", and "podcast_update_all"
 @click.command()
 @click.option("--pk", default=None)
-def podcast_update(pk: Optional[int]):
+@click.option("--jobs", default=DEFAULT_JOBS, help="Number of feeds to fetch at the same time.")  # noqa: E501
+@click.option("--full", is_flag=True, help="Read every item in each feed instead of stopping once caught up.")  # noqa: E501
+@click.option("--force", is_flag=True, help="Check every feed, not just the ones due a check by their release schedule.")  # noqa: E501
+@click.option("--offline", is_flag=True, help="Parse each feed's newest archived copy instead of fetching it. With --full, re-ingests every episode in it, not just new ones.")  # noqa: E501
+def podcast_update(
+    pk: Optional[int],
+    jobs: int,
+    full: bool,
+    force: bool,
+    offline: bool
+):
+    now: int = int(time.time())
     if pk:
-        parent: PodcastModel = PodcastModel.get_by_id(pk)
-        click.echo("Checking for new episodes of {}".format(parent.title))
+        try:
+            parents: List[PodcastModel] = [PodcastModel.get_by_id(pk)]
+        except DoesNotExist:
+            click.echo("Podcast with id {} does not exist.".format(pk))
+            return
+        click.echo("Checking for new episodes of {}".format(parents[0].title))
+    else:
+        parents = list(PodcastModel.select())
+        click.echo("Checking all podcasts for new episodes.")
+        # NOTE: Feeds are only fetched when their podcast is due to have
+        #       released something, going by its past episodes (see
+        #       controllers/schedule.py). Asking for one podcast by --pk
+        #       always checks it.
+        if not (force or offline):
+            parents, waiting = due_podcasts(parents, now)
+            if waiting:
+                click.echo(
+                    "Skipping {} podcast(s) not due a check yet, use --force to check them anyway.".format(len(waiting))  # noqa: E501
+                )
 
-        # NOTE: List[EpisodeType] == List[dict] and
-        #       EpisodeType == Dict
-        latest_feed: EpisodeType = get_latest_episode_remote(parent)
-        latest_local: EpisodeType = get_latest_episode_local(parent)
+    # NOTE: what I'm doing might not be obvious here
+    #       I'm putting together a dict such that
+    #       {"1": <podcast>, "2": <podcast>}
+    #       such that key is the pk of the podcast model
+    #       and value is the podcast model itself.
+    ez_ref: Dict[int, PodcastModel] = {p.id: p for p in parents}
 
-        if is_remote_newer(latest_feed, latest_local):
-            click.echo("Found a new episode:")
-            click.echo(
-                tabulate(
-                    [exclude_keys(latest_feed, ["description", "link"])],
-                    headers="keys",
-                    tablefmt="grid"
-                )
-            )
-            new: EpisodeModel = EpisodeModel.create(
-                title=latest_feed["title"],
-                guid=latest_feed["guid"],
-                description=latest_feed["description"],
-                link=latest_feed["link"],
-                podcast=parent
-            )
+    # NOTE: Instead of comparing the newest remote episode against the
+    #       newest local one (which loses episodes if more than one came
+    #       out since the last run), every episode in the feed whose guid
+    #       we haven't stored gets added. The guids and feed validators are
+    #       loaded here, since the feeds themselves are fetched and parsed
+    #       concurrently (see --jobs) on threads that leave the db alone.
+    caches: Dict[int, FeedCacheType] = load_feed_caches(parents)
+    known: Dict[int, Set[str]] = load_known_guids(parents)
+    known_run: Optional[int] = None if full else DEFAULT_KNOWN_RUN
+    # NOTE: Reprocessing from the archive, i.e after a parser fix, should
+    #       go over every episode again. ingest_episodes() updates the
+    #       ones that parse differently now and skips the rest.
+    if offline and full:
+        known = {p.id: set() for p in parents}
+
+    checks: Dict[int, RemoteCheck] = {}
+    for fetched in refresh_feeds(
+        parents,
+        lambda p: check_podcast_remote(
+            p,
+            caches.get(p.id),
+            known[p.id],
+            known_run,
+            offline
+        ),
+        jobs=jobs
+    ):
+        podcast: PodcastModel = fetched["podcast"]
+        if fetched["error"] is not None:
+            click.echo("Failed to fetch {}: {}".format(
+                podcast.title,
+                fetched["error"]
+            ))
+            continue
+
+        check: RemoteCheck = fetched["result"]
+        # NOTE: guids are unique across podcasts, so an episode whose guid
+        #       another podcast already has can never be stored under this
+        #       one (see ingest_episodes()). Left in, it would be "new" on
+        #       every single run.
+        foreign: Set[str] = load_foreign_guids(
+            podcast,
+            [e["guid"] for e in check["episodes"]]
+        )
+        if foreign:
+            check["episodes"] = [
+                e for e in check["episodes"] if e["guid"] not in foreign
+            ]
             click.echo(
-                "Added new episode {} to db with id of {}".format(
-                    latest_feed["title"],
-                    new.id
-                )
+                "Skipping {} episode(s) of {} whose guid belongs to another podcast.".format(len(foreign), podcast.title)  # noqa: E501
             )
+        checks[podcast.id] = check
+        count: int = len(check["episodes"])
+        if count == 0:
+            click.echo("Nothing new for {}.".format(podcast.title))
+        elif offline and full:
+            click.echo("Re-reading {} episode(s) of {}".format(count, podcast.title))  # noqa: E501
         else:
-            click.echo("No new episodes found.")
+            click.echo("Found {} new episode(s) of {}".format(count, podcast.title))  # noqa: E501
 
-    else:
-        parents: ModelObjectCursorWrapper = PodcastModel.select().execute()
-        click.echo("Checking all podcasts for new episodes.")
-        # NOTE: what I'm doing might not be obvious here
-        #       I'm putting together a list of dicts such that
-        #       {"1": <podcast>, "2": <podcast>}
-        #       such that key is the pk of the podcast model
-        #       and value is the podcast model itself. 1 / 3
-        ez_ref: dict = {
-            p.id: p
-            for p in parents
-        }
-        # NOTE: The above allows me to create another dict
-        #       where the keys are the PK of the podcast
-        #       and the value is the latest episode model
-        #       {"1": <episode>, "2": <episode>} 2 / 3
-        latest_remote_mapping: dict = {
-            k[0]: get_latest_episode_remote(k[1])
-            for k in ez_ref.items()
-        }
-        # NOTE: Same as the above, but the source for below
-        #       is the locally stored podcasts 3 / 3
-        latest_local_mapping: dict = {
-            k[0]: get_latest_episode_local(k[1])
-            for k in ez_ref.items()
-        }
-        results: dict = {
-            k: v
-            for k, v in latest_remote_mapping.items()
-            if is_remote_newer(v, latest_local_mapping[k])
-        }
-
-        click.echo("Found {} new episodes!".format(len(results)))
-
-        # "assembly"
-        db_insert_results: List[EpisodeModel] = [
-            EpisodeModel.create(
-                title=v["title"],
-                description=v["description"],
-                pubDate=v["pubDate"],
-                link=v["link"],
-                guid=v["guid"],
-                podcast=ez_ref[k]
-            )
-            for k, v in results.items()
-        ]
-
-        # "reporting"
-        pre_report: List[dict] = [
-            exclude_keys(model_to_dict(m), ["description", "link"])
-            for m in db_insert_results
-        ]
-        report: List[EpisodeType] = [
-            prep_ep_for_report(ep)
-            for ep in pre_report
-        ]
-
-        click.echo(tabulate(report, headers="keys", tablefmt="grid"))
+    # "assembly"
+    # NOTE: Everything goes in under one transaction, new episodes and feed
+    #       validators alike. The validators are only stored alongside the
+    #       episodes, so a run that dies halfway will re-fetch next time.
+    ingested: List[IngestReport] = []
+    with EpisodeModel._meta.database.atomic():
+        for k, v in checks.items():
+            if not v["episodes"]:
+                continue
+            with feed_context(ez_ref[k].title):
+                ingested.append(ingest_episodes(ez_ref[k], v["episodes"]))
+        # NOTE: An offline run hasn't learned anything about the feeds
+        #       themselves, their validators and schedule stay as they were.
+        if not offline:
+            for k, v in checks.items():
+                save_feed_cache(ez_ref[k], v["feed"])
+            reschedule([ez_ref[k] for k in checks], now)
+        add_to_playlist(
+            guid
+            for report in ingested
+            for guid in report["new_guids"]
+        )
+
+    new_guids: List[str] = [
+        guid
+        for report in ingested
+        for guid in report["new_guids"]
+    ]
+    click.echo("Found {} new episodes!".format(len(new_guids)))
+    updated: int = sum(report["updated"] for report in ingested)
+    if updated:
+        click.echo("Updated {} episodes that changed.".format(updated))
+    if not new_guids:
+        return
+
+    # "reporting"
+    report: List[Episode] = get_episodes_by_guid(new_guids)
+    fields: List[str] = ["pk", "title", "guid", "podcast"]
+
+    with span("render"):
+        click.echo(tabulate(
+            pick_fields(report, fields),
+            headers=fields,
+            tablefmt="grid"
+        ))
@@ -1,11 +1,8 @@
-from typing import List, Mapping, Union
-
-import arrow                                    # type: ignore
-from peewee import ModelObjectCursorWrapper     # type: ignore
-from playhouse.shortcuts import model_to_dict   # type: ignore
+from typing import Iterable, Iterator, List, Mapping, Tuple, Union
 
 from podcast_cli.models.database_models import EpisodeModel, PodcastModel
-from podcast_cli.models.custom_types import PodcastType, EpisodeType
+from podcast_cli.models.custom_types import Episode, Podcast
+from podcast_cli.controllers.episodes import format_pubdate, select_episodes
 
 
 # NOTE: This folder will house functions that can be used across
@@ -27,7 +24,7 @@ def exclude_keys(d: Mapping, keys: List[str]) -> dict:
     return {x: d[x] for x in d if x not in keys}
 
 
-def get_latest_number(cast: PodcastModel, max_limit: int) -> List[EpisodeType]:
+def get_latest_number(cast: PodcastModel, max_limit: int) -> List[Episode]:
     """
     Will get the latest max_limit of episodes, where max_limit is an int.
     i.e get_latest_number(someCast, 5) will get the latest 5 episodes for
@@ -39,55 +36,77 @@ def get_latest_number(cast: PodcastModel, max_limit: int) -> List[EpisodeType]:
     max_limit - int, number of episodes
 
     return:
-    a list of dicts representing podcast episodes, suitable for use with
-    tabulate()
+    a list of Episode records, newest first. Pass them through
+    pick_fields() for use with tabulate()
+
+    NOTE: Nothing in the cli calls this anymore, podcast_list_latest_episodes
+          gets every podcast's latest episodes in one windowed query (see
+          get_latest_per_podcast()). It's kept as the one-query-per-podcast
+          baseline that benchmarks/run.py measures that against.
     """
-    query: ModelObjectCursorWrapper = (
-        EpisodeModel.select()
-                    .where(EpisodeModel.podcast == cast)
-                    .order_by(-EpisodeModel.pubDate)
-                    .limit(max_limit)
-                    .execute()
+    rows = (
+        select_episodes()
+        .where(EpisodeModel.podcast == cast)
+        .order_by(-EpisodeModel.pubDate)
+        .limit(max_limit)
+        .tuples()
     )
-    step1: List[dict] = [model_to_dict(x) for x in query]
-
-    # NOTE: model_to_dict includes the entire PodcastModel object
-    #       as a sub-object. This will break tabulate(), so I
-    #       exclude_keys() and replace it with a new "podcast" key with only
-    #       its title.
-    step2: List[EpisodeType] = [
-        prep_ep_for_report(d)
-        for d in step1
-    ]
+    return [Episode._make(row) for row in rows]
 
-    return step2
 
+def pick_fields(
+    records: Iterable[Union[Episode, Podcast]],
+    fields: List[str]
+) -> List[tuple]:
+    """
+    Cuts Episode / Podcast records down to the fields worth printing, for
+    tabulate(rows, headers=fields). pubDate gets formatted on the way.
+
+    args:
+    records - any iterable of Episode or Podcast records.
+    fields - list of field names, in the order they should be shown.
 
-def prep_ep_for_report(episode: Union[EpisodeModel, dict]) -> EpisodeType:
+    returns:
+    a list of tuples.
     """
-    Helper function to prep model_to_dict(EpisodeModel())
-    for use with tabulate(). It removes the "link", "description",
-    and "podcast" keys.
+    return [
+        tuple(
+            format_pubdate(record.pubDate) if field == "pubDate"
+            else getattr(record, field)
+            for field in fields
+        )
+        for record in records
+    ]
+
 
-    It will replace the "podcast" key with the podcast title as
-    opposed to the full sub object.
+def __cell(value, width: int) -> str:
+    text: str = " ".join(str(value).split())
+    if len(text) > width:
+        text = text[:width - 3] + "..."
+    return text.ljust(width)
 
-    Finally, it will take the unix timestamp in pubDate, convert it
-    to datetime, str() it, and shift it to the local timezone via .local()
+
+def stream_table(
+    rows: Iterable[Mapping],
+    columns: List[Tuple[str, int]]
+) -> Iterator[str]:
+    """
+    Renders rows as a grid that looks like tabulate(tablefmt="grid"), but a
+    line at a time and with fixed column widths, so the first row can be
+    printed before the last one has been read. Values that don't fit their
+    column are cut short.
 
     args:
-    episode - dict, specifically the output of model_to_dict(EpisodeModel())
+    rows - any iterable of dicts, i.e a database cursor.
+    columns - list of (key, width) pairs, in display order.
 
     returns:
-    a dict missing the "link" and "description" keys, "podcast" replaced
-    with podcast.title, and the date humanized and localized.
+    an iterator of lines, without newlines.
     """
-    episode["podcast"] = episode["podcast"]["title"]
-    new_ep = exclude_keys(episode, ["link", "description"])
-    new_ep["pubDate"] = str(arrow.get(new_ep["pubDate"]).to("local").datetime)
-    return EpisodeType(
-        pk=episode.get("id", None),
-        title=episode.get("title", None),
-        guid=episode.get("guid", None),
-        podcast=episode.get("podcast", None)
-    )
+    border: str = "+" + "+".join("-" * (w + 2) for _, w in columns) + "+"
+    yield border
+    yield "| " + " | ".join(__cell(k, w) for k, w in columns) + " |"
+    yield border.replace("-", "=")
+    for row in rows:
+        yield "| " + " | ".join(__cell(row[k], w) for k, w in columns) + " |"
+        yield border